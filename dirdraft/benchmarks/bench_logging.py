@@ -0,0 +1,52 @@
+"""
+Benchmark the cost of logging on node construction.
+
+Builds a tree one node at a time through Node.__init__ and add_child, which emit
+entry/exit records at the TRACE level, with the logging pipeline of setup_logger at
+INFO (tracing disabled), at TRACE, and at TRACE with sampling. Records are written to a
+temporary log file by the background listener.
+
+Usage:
+   python benchmarks/bench_logging.py [node_count]
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.node import Node
+from utils.logger import setup_logger, shutdown_logger
+
+def build(node_count, fan_out=10):
+   root = Node("Root", ".", "folder")
+   level = [root]
+   created = 1
+   while created < node_count:
+      next_level = []
+      for parent in level:
+         for i in range(min(fan_out, node_count - created)):
+            child = Node(f"node_{created}", ".", "folder")
+            parent.add_child(child)
+            next_level.append(child)
+            created += 1
+      level = next_level
+   return root
+
+def main():
+   node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+   print(f"Building {node_count:,} nodes")
+   with tempfile.TemporaryDirectory() as directory:
+      for label, level, sample_interval in (("INFO, tracing off", "INFO", 1), ("TRACE", "TRACE", 1), ("TRACE, 1 in 100 sampled", "TRACE", 100)):
+         log_file = os.path.join(directory, f"{level}_{sample_interval}.log")
+         setup_logger(level, log_file, console=False, sample_interval=sample_interval)
+         start = time.perf_counter()
+         build(node_count)
+         elapsed = time.perf_counter() - start
+         shutdown_logger()
+         size = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+         print(f"{label:<26} {elapsed:8.3f} s  {node_count / elapsed:10,.0f} nodes/sec  log {size / 1e6:6.1f} MB")
+
+if __name__ == "__main__":
+   main()
@@ -0,0 +1,67 @@
+"""
+Benchmark node construction throughput.
+
+Compares building a tree one node at a time through Node.__init__ and add_child (the way
+Node.deserialize used to work) with the trusted bulk path now used by Node.deserialize.
+Logging is configured at INFO, as setup_logger does, but written to memory.
+
+Usage:
+   python benchmarks/bench_node_construction.py [node_count]
+"""
+import io
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.node import Node
+
+def make_serialized_tree(node_count, fan_out=10):
+   root = {'name': 'Root', 'path': '.', 'type': 'folder', 'tags': ['root_node'], 'children': []}
+   level = [root]
+   created = 1
+   while created < node_count:
+      next_level = []
+      for parent in level:
+         for i in range(fan_out):
+            if created >= node_count:
+               break
+            node_type = 'folder' if i % 2 == 0 else 'file'
+            child = {'name': f"{node_type}_{created}", 'path': '.', 'type': node_type, 'tags': ['generated'], 'children': []}
+            parent['children'].append(child)
+            next_level.append(child)
+            created += 1
+      level = next_level
+   return root
+
+def build_per_node(serialized_data):
+   node = Node(serialized_data['name'], serialized_data['path'], serialized_data['type'], serialized_data.get('tags', []))
+   for child_data in serialized_data.get('children', []):
+      node.add_child(build_per_node(child_data))
+   return node
+
+def measure(label, build, serialized_data, node_count):
+   start = time.perf_counter()
+   build(serialized_data)
+   elapsed = time.perf_counter() - start
+   print(f"{label:<28} {elapsed:8.3f} s  {node_count / elapsed:12,.0f} nodes/sec")
+
+def main():
+   node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+   sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+   root_logger = logging.getLogger()
+   root_logger.setLevel(logging.INFO)
+   handler = logging.StreamHandler(io.StringIO())
+   handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
+   root_logger.addHandler(handler)
+
+   serialized_data = make_serialized_tree(node_count)
+   print(f"Building {node_count:,} nodes")
+   measure("before: Node() + add_child", build_per_node, serialized_data, node_count)
+   measure("after: Node.deserialize", Node.deserialize, serialized_data, node_count)
+
+if __name__ == "__main__":
+   main()
@@ -0,0 +1,62 @@
+"""
+Benchmark the memory used per node.
+
+Compares the compact Node (__slots__, shared tag tuples, paths derived from the parent
+chain) with a stand-in for the previous layout: a per-instance __dict__ holding a logger
+reference, a tags list and a full path string per node.
+
+Usage:
+   python benchmarks/bench_node_memory.py [node_count]
+"""
+import os
+import sys
+import logging
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.node import Node
+from bench_node_construction import make_serialized_tree
+
+class LegacyNode:
+   def __init__(self, name, path, node_type, tags):
+      self.logger = logging.getLogger(__name__)
+      self.name = name
+      self.path = path
+      self.type = node_type
+      self.root = False
+      self.tags = list(tags)
+      self.children = []
+      self.parent = None
+
+def build_legacy(serialized_data):
+   root = LegacyNode(serialized_data['name'], serialized_data['path'], serialized_data['type'], serialized_data['tags'])
+   stack = [(root, serialized_data)]
+   while stack:
+      node, data = stack.pop()
+      for child_data in data['children']:
+         child = LegacyNode(child_data['name'], os.path.join(node.path, child_data['name']), child_data['type'], child_data['tags'])
+         child.parent = node
+         node.children.append(child)
+         stack.append((child, child_data))
+   return root
+
+def measure(label, build, serialized_data, node_count):
+   tracemalloc.start()
+   tree = build(serialized_data)
+   current, _ = tracemalloc.get_traced_memory()
+   tracemalloc.stop()
+   print(f"{label:<24} {current / 2**20:8.1f} MiB  {current / node_count:8.0f} bytes/node")
+   return tree
+
+def main():
+   node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+   logging.disable(logging.CRITICAL)
+
+   serialized_data = make_serialized_tree(node_count)
+   print(f"Building {node_count:,} nodes")
+   measure("before: dict-based node", build_legacy, serialized_data, node_count)
+   measure("after: compact Node", Node.deserialize, serialized_data, node_count)
+
+if __name__ == "__main__":
+   main()
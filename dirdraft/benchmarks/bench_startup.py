@@ -0,0 +1,71 @@
+"""
+Benchmark startup import time against a budget.
+
+Runs a fresh interpreter with -X importtime for each startup entry point and reports the
+cumulative import time of the entry module and its slowest dependencies. The script
+exits with status 1 when an entry point exceeds its budget, so it can run as a check.
+Entry points whose dependencies are not installed, e.g. PyQt5 on a build server, are
+reported as skipped.
+
+Usage:
+   python benchmarks/bench_startup.py [--top N] [--repeat N]
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Module imported at startup, and its cumulative import time budget in milliseconds
+ENTRY_POINTS = [
+   ("gui.main_window", 400),
+   ("cli", 150),
+]
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def measure(module):
+   """
+   Import a module in a new interpreter and return the cumulative microseconds per module,
+   or None if the import fails.
+   """
+   process = subprocess.run(
+      [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+      cwd=SRC_DIR, capture_output=True, text=True,
+   )
+   if process.returncode != 0:
+      return None
+   timings = {}
+   for line in process.stderr.splitlines():
+      match = IMPORT_TIME_LINE.match(line)
+      if match:
+         timings[match.group(4)] = int(match.group(2))
+   return timings
+
+def main():
+   parser = argparse.ArgumentParser(description="Check startup import time against a budget.")
+   parser.add_argument("--top", type=int, default=8, help="number of slowest imports to list")
+   parser.add_argument("--repeat", type=int, default=3, help="runs per entry point, the fastest is kept")
+   args = parser.parse_args()
+
+   over_budget = False
+   for module, budget in ENTRY_POINTS:
+      runs = [measure(module) for _ in range(args.repeat)]
+      runs = [timings for timings in runs if timings is not None]
+      if not runs:
+         print(f"{module:<20} skipped, import failed")
+         continue
+      timings = min(runs, key=lambda timings: timings[module])
+      total = timings[module] / 1000
+      status = "ok" if total <= budget else "OVER BUDGET"
+      over_budget = over_budget or total > budget
+      print(f"{module:<20} {total:8.1f} ms  budget {budget} ms  {status}")
+      slowest = sorted((cumulative, name) for name, cumulative in timings.items() if name != module)[-args.top:]
+      for cumulative, name in reversed(slowest):
+         print(f"   {name:<40} {cumulative / 1000:8.1f} ms")
+   return 1 if over_budget else 0
+
+if __name__ == "__main__":
+   sys.exit(main())
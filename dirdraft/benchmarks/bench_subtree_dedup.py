@@ -0,0 +1,70 @@
+"""
+Benchmark sharing of repeated subtrees.
+
+Builds a template where every service folder holds the same src/tests/docs skeleton,
+then compares the file size and the memory held after loading for the compact format
+and the compact format with shared subtrees.
+
+Usage:
+   python benchmarks/bench_subtree_dedup.py [service_count]
+"""
+import io
+import os
+import sys
+import time
+import logging
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.node import Node
+from core.template import Template
+from utils.template_writer import TemplateWriter
+from utils.template_loader import TemplateLoader
+
+def make_services_template(service_count):
+   root = Node("Repo", ".", "folder", ["root_node"])
+   for service in range(service_count):
+      service_node = Node.from_trusted(f"service_{service}", None, "folder")
+      root.add_child(service_node)
+      for top in ("src", "tests", "docs"):
+         top_node = Node.from_trusted(top, None, "folder", ["generated"])
+         service_node.add_child(top_node)
+         for package in range(10):
+            package_node = Node.from_trusted(f"{top}_{package}", None, "folder")
+            top_node.add_child(package_node)
+            package_node.add_children([Node.from_trusted(f"module_{module}.py", None, "file") for module in range(5)])
+   return Template(root, "services")
+
+def measure_load(file_path):
+   tracemalloc.start()
+   start = time.perf_counter()
+   template = TemplateLoader().load(file_path)
+   elapsed = time.perf_counter() - start
+   current, _ = tracemalloc.get_traced_memory()
+   tracemalloc.stop()
+   return template, elapsed, current
+
+def main():
+   service_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+   root_logger = logging.getLogger()
+   root_logger.setLevel(logging.INFO)
+   handler = logging.StreamHandler(io.StringIO())
+   handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
+   root_logger.addHandler(handler)
+
+   template = make_services_template(service_count)
+   print(f"{service_count:,} services, {template.root_node.count_nodes():,} nodes")
+   print(f"{'format':<18} {'size':>10} {'load':>9} {'memory':>10}")
+   with tempfile.TemporaryDirectory() as directory:
+      for label, writer in (("compact", TemplateWriter(compact=True)), ("compact + dedup", TemplateWriter(dedup=True))):
+         file_path = os.path.join(directory, f"{label.replace(' ', '')}.json")
+         writer.write(template, file_path)
+         loaded, elapsed, memory = measure_load(file_path)
+         print(f"{label:<18} {os.path.getsize(file_path) / 1e6:8.2f}MB {elapsed:8.3f}s {memory / 1e6:8.1f}MB")
+         del loaded
+
+if __name__ == "__main__":
+   main()
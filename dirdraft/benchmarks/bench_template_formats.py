@@ -0,0 +1,57 @@
+"""
+Benchmark the on-disk template formats.
+
+Saves one generated template as indented JSON, compact JSON and binary, then reports the
+file size, save time and load time of each format.
+
+Usage:
+   python benchmarks/bench_template_formats.py [node_count]
+"""
+import io
+import os
+import sys
+import time
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.node import Node
+from core.template import Template
+from utils.template_writer import TemplateWriter
+from utils.template_loader import TemplateLoader
+from utils.binary_format import BinaryTemplateWriter
+from bench_node_construction import make_serialized_tree
+
+def timed(action):
+   start = time.perf_counter()
+   action()
+   return time.perf_counter() - start
+
+def main():
+   node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+   root_logger = logging.getLogger()
+   root_logger.setLevel(logging.INFO)
+   handler = logging.StreamHandler(io.StringIO())
+   handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
+   root_logger.addHandler(handler)
+
+   template = Template(Node.deserialize(make_serialized_tree(node_count)), "bench")
+   writers = [
+      ("json (indented)", TemplateWriter(), ".json"),
+      ("json (compact)", TemplateWriter(compact=True), ".json"),
+      ("binary", BinaryTemplateWriter(), ".ddt"),
+   ]
+   print(f"{node_count:,} nodes")
+   print(f"{'format':<18} {'size':>10} {'save':>9} {'load':>9}")
+   with tempfile.TemporaryDirectory() as directory:
+      for label, writer, extension in writers:
+         file_path = os.path.join(directory, f"bench_{len(label)}{extension}")
+         save_time = timed(lambda: writer.write(template, file_path))
+         load_time = timed(lambda: TemplateLoader().load(file_path))
+         size = os.path.getsize(file_path)
+         print(f"{label:<18} {size / 1e6:8.1f}MB {save_time:8.3f}s {load_time:8.3f}s")
+
+if __name__ == "__main__":
+   main()
@@ -0,0 +1,54 @@
+"""
+Benchmark the time until a loaded template can be shown.
+
+Saves a generated template, then compares loading the whole tree with loading only the
+levels the tree view shows first (eager_depth=2, as TemplateDesignPage does). Expanding a
+folder afterwards builds just that folder's children.
+
+Usage:
+   python benchmarks/bench_template_load.py [node_count]
+"""
+import io
+import os
+import sys
+import time
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.node import Node
+from core.template import Template
+from utils.template_writer import TemplateWriter
+from utils.template_loader import TemplateLoader
+from bench_node_construction import make_serialized_tree
+
+def measure(label, action):
+   start = time.perf_counter()
+   result = action()
+   elapsed = time.perf_counter() - start
+   print(f"{label:<28} {elapsed:8.3f} s")
+   return result
+
+def main():
+   node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+   root_logger = logging.getLogger()
+   root_logger.setLevel(logging.INFO)
+   handler = logging.StreamHandler(io.StringIO())
+   handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
+   root_logger.addHandler(handler)
+
+   template = Template(Node.deserialize(make_serialized_tree(node_count)), "bench")
+   with tempfile.TemporaryDirectory() as directory:
+      file_path = os.path.join(directory, "bench.json")
+      TemplateWriter().write(template, file_path)
+      print(f"Loading {node_count:,} nodes ({os.path.getsize(file_path) / 1e6:.1f} MB)")
+      measure("eager: whole tree", lambda: TemplateLoader().load(file_path))
+      lazy = measure("lazy: eager_depth=2", lambda: TemplateLoader(eager_depth=2).load(file_path))
+      folder = next(child for child in lazy.root_node.children if child.has_children())
+      grandchild = next(child for child in folder.children if child.has_children())
+      measure("lazy: expand one folder", lambda: list(grandchild.children))
+
+if __name__ == "__main__":
+   main()
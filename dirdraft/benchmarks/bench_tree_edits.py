@@ -0,0 +1,96 @@
+"""
+Benchmark edits of a large template shown in the tree model.
+
+Builds a template with folder_count folders of ten files each, fetches every row into a
+TemplateTreeModel, then times looking up the index of a node and telling the model that
+a node was renamed, added or removed, as the CommandManager does after each command.
+The node index of the model answers each of these without walking the tree, so the time
+per edit should stay flat as the template grows.
+
+Runs without a display on the offscreen platform. The benchmark is skipped when PyQt5
+is not installed.
+
+Usage:
+   python benchmarks/bench_tree_edits.py [folder_count ...]
+"""
+import os
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+   from PyQt5.QtWidgets import QApplication
+except ImportError:
+   QApplication = None
+
+from core.node import Node
+
+EDIT_COUNT = 2000
+
+def build(folder_count):
+   root = Node("Root", os.path.abspath("."), "folder", tags=["root_node"])
+   for i in range(folder_count):
+      folder = Node.from_trusted(f"folder_{i:06d}", None, "folder")
+      root.add_child(folder)
+      folder.add_children([Node.from_trusted(f"file_{j}.txt", None, "file") for j in range(10)])
+   return root
+
+def fetch_all(model, node):
+   stack = [node]
+   while stack:
+      current = stack.pop()
+      index = model.index_of(current)
+      while model.canFetchMore(index):
+         model.fetchMore(index)
+      stack.extend(model.fetched_rows(current) or ())
+
+def per_edit(fn, nodes):
+   start = time.perf_counter()
+   for node in nodes:
+      fn(node)
+   return (time.perf_counter() - start) / len(nodes) * 1e6
+
+def main():
+   folder_counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+   if QApplication is None:
+      print("PyQt5 is not installed, skipped")
+      return
+   logging.disable(logging.CRITICAL)
+
+   from gui.template_tree_model import TemplateTreeModel
+
+   app = QApplication.instance() or QApplication(sys.argv)
+   print(f"{'nodes':>10} {'index_of':>12} {'rename':>12} {'add':>12} {'remove':>12}")
+   for folder_count in folder_counts:
+      root = build(folder_count)
+      model = TemplateTreeModel()
+      model.set_root_node(root)
+      fetch_all(model, root)
+      files = [file for folder in root.children for file in folder.children]
+      sample = random.Random(0).sample(files, min(EDIT_COUNT, len(files)))
+
+      lookup = per_edit(model.index_of, sample)
+      rename = per_edit(model.node_changed, sample)
+
+      added = []
+      def add(node):
+         new_node = Node.from_trusted(f"new_{len(added)}.txt", None, "file")
+         node.parent.add_child(new_node)
+         model.node_added(node.parent, new_node)
+         added.append(new_node)
+      add_time = per_edit(add, sample)
+
+      def remove(node):
+         parent_node = node.parent
+         parent_node.remove_child(node)
+         model.node_removed(parent_node, node)
+      remove_time = per_edit(remove, added)
+
+      print(f"{root.count_nodes():>10,} {lookup:>9.2f} us {rename:>9.2f} us {add_time:>9.2f} us {remove_time:>9.2f} us")
+
+if __name__ == "__main__":
+   main()
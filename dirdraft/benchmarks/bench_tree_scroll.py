@@ -0,0 +1,97 @@
+"""
+Benchmark the frame time of scrolling a large template in the tree view.
+
+Shows a template with one folder of node_count files in a TemplateTreeView, then
+scrolls it from top to bottom a few rows per frame, repainting the viewport
+synchronously after each step. Rows are plain or styled by their tags, and styled rows
+are painted with and without the document cache of the HTMLDelegate. Each mode is
+scrolled twice: the first pass also fetches the rows and fills the caches.
+
+Runs without a display on the offscreen platform. The benchmark is skipped when PyQt5
+is not installed.
+
+Usage:
+   python benchmarks/bench_tree_scroll.py [node_count] [rows_per_frame]
+"""
+import os
+import sys
+import time
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+   from PyQt5.QtWidgets import QApplication, QAbstractItemView
+except ImportError:
+   QApplication = None
+
+from core.node import Node
+
+TAGS = [["file", "image"], ["file", "text", "draft"], ["file", "code"], ["file"]]
+
+def build(node_count):
+   root = Node("Root", os.path.abspath("."), "folder", tags=["root_node"])
+   root.add_children([
+      Node(f"file_{i:07d}.txt", ".", "file", tags=TAGS[i % len(TAGS)]) for i in range(node_count - 1)
+   ])
+   return root
+
+def scroll(app, view, rows_per_frame):
+   """
+   Scroll the view from top to bottom and return the frame times in milliseconds.
+   """
+   scroll_bar = view.verticalScrollBar()
+   scroll_bar.setValue(0)
+   app.processEvents()
+   frame_times = []
+   while True:
+      value = scroll_bar.value()
+      start = time.perf_counter()
+      scroll_bar.setValue(value + rows_per_frame)
+      view.viewport().repaint()
+      app.processEvents()
+      frame_times.append((time.perf_counter() - start) * 1000)
+      if scroll_bar.value() == value:
+         return frame_times
+
+def report(label, frame_times):
+   frame_times = sorted(frame_times)
+   p95 = frame_times[int(len(frame_times) * 0.95) - 1] if len(frame_times) > 1 else frame_times[0]
+   print(f"{label:<40} {len(frame_times):6} frames  mean {statistics.mean(frame_times):7.2f} ms  median {statistics.median(frame_times):7.2f} ms  p95 {p95:7.2f} ms  max {frame_times[-1]:7.2f} ms")
+
+def main():
+   node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+   rows_per_frame = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+   if QApplication is None:
+      print("PyQt5 is not installed, skipped")
+      return
+
+   from gui.template_tree_view import TemplateTreeView
+   from utils.html_delegate import HTMLDelegate, render_text, render_tags
+
+   app = QApplication.instance() or QApplication(sys.argv)
+   root = build(node_count)
+   print(f"Scrolling {node_count:,} nodes, {rows_per_frame} rows per frame")
+
+   for label, stylized, cache_size in (("plain", False, None), ("styled, no document cache", True, 0), ("styled", True, None)):
+      render_text.cache_clear()
+      render_tags.cache_clear()
+      view = TemplateTreeView()
+      if cache_size is not None:
+         view.setItemDelegate(HTMLDelegate(view, cache_size=cache_size))
+      # Scroll bar values count rows
+      view.setVerticalScrollMode(QAbstractItemView.ScrollPerItem)
+      view.resize(1000, 700)
+      view.show()
+      view.set_styling_mode(stylized)
+      view.set_root_node(root)
+      app.processEvents()
+      report(f"{label}, first pass", scroll(app, view, rows_per_frame))
+      report(f"{label}, second pass", scroll(app, view, rows_per_frame))
+      view.close()
+      view.deleteLater()
+      app.processEvents()
+
+if __name__ == "__main__":
+   main()
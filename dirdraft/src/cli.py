@@ -0,0 +1,240 @@
+"""
+Headless command line interface of DirDraft.
+
+Applies, scans, compares and validates templates without the GUI. Nothing in this
+module, or in the modules it imports, depends on PyQt5.
+
+Usage:
+   python src/cli.py apply TEMPLATE TARGET [TARGET ...] [--workers N] [--jobs N] [--dry-run] [--json]
+   python src/cli.py scan DIRECTORY [-o OUTPUT] [--include PATTERN] [--exclude PATTERN] [--max-depth N]
+   python src/cli.py diff A B [--ignore-tags] [--json]
+   python src/cli.py validate TEMPLATE [TEMPLATE ...] [--json]
+
+Exit status is 0 on success, 1 when a job failed, differences were found or a template
+is invalid, and 2 for usage errors.
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from core.template import Template
+from core.lifecycle import LifecycleRegistry
+from core.sync import TemplateSync
+from core.traversal import iter_nodes
+from core.template_diff import diff
+from utils.template_utils import TemplateManager
+from utils.template_loader import TemplateLoader
+from utils.template_writer import TemplateWriter
+
+logger = logging.getLogger(__name__)
+
+def load_template(file_path):
+   template = TemplateManager().load_template(file_path)
+   if template is None:
+      raise CommandError(f"Could not load template: {file_path}")
+   return template
+
+def scan_directory(directory_path, args):
+   if not os.path.isdir(directory_path):
+      raise CommandError(f"Not a directory: {directory_path}")
+   name = getattr(args, 'name', None) or os.path.basename(os.path.abspath(directory_path))
+   template = Template(None, name)
+   template.build_from_directory(
+      directory_path,
+      include=getattr(args, 'include', None),
+      exclude=getattr(args, 'exclude', None),
+      max_depth=getattr(args, 'max_depth', None),
+      follow_symlinks=getattr(args, 'follow_symlinks', False),
+      max_workers=args.workers,
+   )
+   return template
+
+class CommandError(Exception):
+   """
+   Raised by a command for an error that should be reported without a traceback.
+   """
+
+def apply_command(args):
+   template = load_template(args.template)
+   root_node = template.root_node
+   if args.jobs > 1:
+      # Build any lazily loaded subtrees up front, so concurrent jobs only read built nodes
+      root_node.materialize_subtree()
+
+   def apply_one(target):
+      sync = TemplateSync(args.workers)
+      plan = sync.plan(root_node, target)
+      report = None if args.dry_run else sync.apply(plan)
+      result = {
+         'target': target,
+         'dry_run': args.dry_run,
+         'missing': plan.count_missing(),
+         'conflicts': [{'path': path, 'expected': node.type, 'actual': actual_type} for node, path, actual_type in plan.conflicts],
+         'extra': [{'path': path, 'type': actual_type} for path, actual_type in plan.extra],
+      }
+      if report is None:
+         result['create'] = [{'path': path, 'type': node.type} for node, path in plan.iter_missing()]
+      else:
+         result['created'] = len(report.created)
+         result['skipped'] = len(report.skipped)
+         result['failed'] = [result.path for result in report.failed]
+      return result
+
+   with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+      results = list(pool.map(apply_one, args.targets))
+
+   failed = any(result.get('failed') for result in results)
+   if args.json:
+      print_json({'template': template.name, 'results': results})
+   else:
+      for result in results:
+         if args.dry_run:
+            print(f"{result['target']}: {result['missing']} to create, {len(result['conflicts'])} conflicts, {len(result['extra'])} extra")
+            for entry in result['create']:
+               print(f"  Create {entry['type']}: {entry['path']}")
+         else:
+            print(f"{result['target']}: {result['created']} created, {len(result['failed'])} failed, {result['skipped']} skipped, {len(result['conflicts'])} conflicts")
+            for path in result['failed']:
+               print(f"  Failed: {path}")
+         for conflict in result['conflicts']:
+            print(f"  Conflict: {conflict['path']} is a {conflict['actual']}, template expects a {conflict['expected']}")
+   return 1 if failed else 0
+
+def scan_command(args):
+   template = scan_directory(args.directory, args)
+   if args.output:
+      TemplateManager().save_template(template, args.output, compact=args.compact, binary=args.binary, dedup=args.dedup)
+      node_count = template.root_node.count_nodes()
+      if args.json:
+         print_json({'template': template.name, 'output': args.output, 'nodes': node_count})
+      else:
+         print(f"Saved {node_count} nodes to {args.output}")
+   else:
+      # Without an output file the template is written to stdout
+      for chunk in TemplateWriter(args.compact, args.dedup).iter_chunks(template):
+         sys.stdout.write(chunk)
+      sys.stdout.write('\n')
+   return 0
+
+def diff_command(args):
+   templates = []
+   for path in (args.a, args.b):
+      templates.append(scan_directory(path, args) if os.path.isdir(path) else load_template(path))
+   result = diff(templates[0], templates[1], compare_tags=not args.ignore_tags)
+   if args.json:
+      print_json({
+         'added': [{'path': node.relative_path, 'type': node.type} for node in result.added],
+         'removed': [{'path': node.relative_path, 'type': node.type} for node in result.removed],
+         'renamed': [{'from': node_a.relative_path, 'to': node_b.relative_path} for node_a, node_b in result.renamed],
+         'retyped': [{'path': node_b.relative_path, 'from': node_a.type, 'to': node_b.type} for node_a, node_b in result.retyped],
+         'retagged': [{'path': node_b.relative_path, 'from': list(node_a.tags), 'to': list(node_b.tags)} for node_a, node_b in result.retagged],
+      })
+   else:
+      for line in result.describe():
+         print(line)
+   return 0 if result.is_empty() else 1
+
+def validate_command(args):
+   results = []
+   for file_path in args.templates:
+      try:
+         # Load without the manager, which reports errors by returning None
+         template = TemplateLoader().load(file_path)
+         node_count = sum(1 for _ in iter_nodes(template.root_node))
+         results.append({'template': file_path, 'valid': True, 'name': template.name, 'nodes': node_count})
+      except Exception as e:
+         results.append({'template': file_path, 'valid': False, 'error': f"{e.__class__.__name__}: {e}"})
+
+   if args.json:
+      print_json({'results': results})
+   else:
+      for result in results:
+         if result['valid']:
+            print(f"{result['template']}: valid, {result['nodes']} nodes")
+         else:
+            print(f"{result['template']}: invalid, {result['error']}")
+   return 0 if all(result['valid'] for result in results) else 1
+
+def print_json(data):
+   json.dump(data, sys.stdout, indent=4)
+   sys.stdout.write('\n')
+
+def positive_int(value):
+   number = int(value)
+   if number < 1:
+      raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+   return number
+
+def non_negative_int(value):
+   number = int(value)
+   if number < 0:
+      raise argparse.ArgumentTypeError(f"must be at least 0: {value}")
+   return number
+
+def build_parser():
+   parser = argparse.ArgumentParser(prog="dirdraft", description="Apply, scan, compare and validate DirDraft templates.")
+   parser.add_argument("-v", "--verbose", action="store_true", help="log progress to stderr")
+   subparsers = parser.add_subparsers(dest="command", required=True)
+
+   common = argparse.ArgumentParser(add_help=False)
+   common.add_argument("--workers", type=positive_int, default=None, help="threads used per job to scan and create entries")
+   common.add_argument("--json", action="store_true", help="print the results as JSON")
+
+   scanning = argparse.ArgumentParser(add_help=False)
+   scanning.add_argument("--include", action="append", metavar="PATTERN", help="glob pattern a file must match, can be repeated")
+   scanning.add_argument("--exclude", action="append", metavar="PATTERN", help="glob pattern of files and folders to skip, can be repeated")
+   scanning.add_argument("--max-depth", type=non_negative_int, default=None, help="maximum depth of scanned entries")
+   scanning.add_argument("--follow-symlinks", action="store_true", help="descend into symlinked folders")
+
+   apply_parser = subparsers.add_parser("apply", parents=[common], help="create the missing entries of a template in one or more directories")
+   apply_parser.add_argument("template", help="template file")
+   apply_parser.add_argument("targets", nargs="+", metavar="target", help="directory to apply the template to")
+   apply_parser.add_argument("--jobs", type=positive_int, default=1, help="number of targets processed at the same time")
+   apply_parser.add_argument("--dry-run", action="store_true", help="only report what would be created")
+   apply_parser.set_defaults(handler=apply_command)
+
+   scan_parser = subparsers.add_parser("scan", parents=[common, scanning], help="build a template from a directory")
+   scan_parser.add_argument("directory", help="directory to scan")
+   scan_parser.add_argument("-o", "--output", help="template file to write, stdout if omitted")
+   scan_parser.add_argument("--name", help="template name, the directory name by default")
+   scan_format = scan_parser.add_mutually_exclusive_group()
+   scan_format.add_argument("--compact", action="store_true", help="write the compact JSON format")
+   scan_format.add_argument("--dedup", action="store_true", help="write the compact JSON format with shared subtrees")
+   scan_format.add_argument("--binary", action="store_true", help="write the binary format")
+   scan_parser.set_defaults(handler=scan_command)
+
+   diff_parser = subparsers.add_parser("diff", parents=[common, scanning], help="compare two templates or directories")
+   diff_parser.add_argument("a", help="template file or directory")
+   diff_parser.add_argument("b", help="template file or directory")
+   diff_parser.add_argument("--ignore-tags", action="store_true", help="ignore tag differences, e.g. when comparing with a directory")
+   diff_parser.set_defaults(handler=diff_command)
+
+   validate_parser = subparsers.add_parser("validate", parents=[common], help="check that template files load")
+   validate_parser.add_argument("templates", nargs="+", metavar="template", help="template file")
+   validate_parser.set_defaults(handler=validate_command)
+
+   return parser
+
+def main(argv=None):
+   args = build_parser().parse_args(argv)
+   logging.basicConfig(
+      level=logging.INFO if args.verbose else logging.WARNING,
+      format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+      stream=sys.stderr,
+   )
+   if args.command == "scan" and args.binary and not args.output:
+      build_parser().error("--binary needs --output")
+   try:
+      return args.handler(args)
+   except CommandError as e:
+      print(f"dirdraft: {e}", file=sys.stderr)
+      return 1
+   finally:
+      # Report how many nodes and templates were created and released, if tracking is enabled
+      LifecycleRegistry().log_summary()
+
+if __name__ == "__main__":
+   sys.exit(main())
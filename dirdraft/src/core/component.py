@@ -1,15 +1,58 @@
+import sys
 import logging
 
+from utils.logger import TRACE
+
+# Shared, interned tag tuples. Nodes with the same tags reference the same tuple.
+_tag_sets = {}
+
+def intern_tags(tags):
+   """
+   Return the shared tuple for the given tags, interning each tag string.
+   """
+   if type(tags) is tuple:
+      shared = _tag_sets.get(tags)
+      if shared is not None:
+         return shared
+   key = tuple(sys.intern(tag) for tag in tags)
+   return _tag_sets.setdefault(key, key)
+
 class Component:
+   """
+   Base class of the composite pattern.
+
+   Components use __slots__ and share their logger and tag tuples, so that trees with
+   millions of nodes stay compact in memory.
+   """
+
+   __slots__ = ('name', '_path', 'type', 'root', '_tags')
+
+   logger = logging.getLogger(__name__)
+
    def __init__(self, name, path, component_type, tags=None, root=False):
-      self.logger = logging.getLogger(__name__)
       self.name = name
       self.path = path
       self.type = component_type
       self.root = root
-      self.tags = tags or []
-      
-      self.logger.info(f"Created {self.__class__.__name__}: {self.name}")
+      self.tags = tags or ()
+
+      self.logger.log(TRACE, "Created %s: %s", self.__class__.__name__, self.name)
+
+   @property
+   def path(self):
+      return self._path
+
+   @path.setter
+   def path(self, path):
+      self._path = path
+
+   @property
+   def tags(self):
+      return self._tags
+
+   @tags.setter
+   def tags(self, tags):
+      self._tags = intern_tags(tags)
 
    def add_child(self, child):
       raise NotImplementedError("add_child method must be implemented in subclasses")
@@ -18,4 +61,4 @@ class Component:
       raise NotImplementedError("remove_child method must be implemented in subclasses")
 
    def __repr__(self):
-      return f"{self.__class__.__name__}(Name: {self.name}, Path: {self.path}, Type: {self.type}, Tags: {self.tags}, Root: {self.root})"
\ No newline at end of file
+      return f"{self.__class__.__name__}(Name: {self.name}, Path: {self.path}, Type: {self.type}, Tags: {self.tags}, Root: {self.root})"
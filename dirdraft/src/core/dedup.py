@@ -0,0 +1,152 @@
+from collections import Counter
+
+from core.node import COMPACT_KEYS, EMPTY_DIGEST, digest_contents, digest_node
+from core.traversal import iter_nodes
+
+def subtree_digests(root_node):
+   """
+   Return Merkle digests for every node of a tree.
+
+   The digest of a node is its structural_hash: it covers its name, type and tags and
+   the digest of its contents, which covers the digests of the children in order. The
+   tree is walked with iter_nodes, so the nodes are for reading.
+
+   Returns:
+      tuple: Two dicts mapping each node to the digest of its subtree and of its contents.
+   """
+   node_digests = {}
+   content_digests = {}
+   for node in iter_nodes(root_node):
+      node_digests[node] = node.structural_hash
+      content_digests[node] = node.content_hash
+   return node_digests, content_digests
+
+def find_shared_contents(root_node, min_nodes=2):
+   """
+   Find the folder contents that occur more than once in a tree.
+
+   The tree is read with Node.iter_children, so lazily loaded and shared contents are
+   not built for good, and contents backed by the same serialized list are only walked
+   once. Digests are computed bottom-up during the walk and equal the structural hashes.
+
+   Returns:
+      dict: Maps the contents key (see Node.contents_key) of every repeated contents
+         holding at least min_nodes nodes to a (digest, node) pair, where node is one of
+         the folders holding the contents.
+   """
+   known = {}  # Contents key to (contents digest, node count, folder)
+   counts = Counter()
+   digests = {}  # Digests of the finished children of the nodes on the stack
+   stack = [(root_node, None)]
+   while stack:
+      node, children = stack.pop()
+      key = node.contents_key()
+      if children is None and node.has_children() and key not in known:
+         children = list(node.iter_children())
+         stack.append((node, children))
+         stack.extend((child, None) for child in reversed(children))
+         continue
+      if children:
+         child_digests = []
+         size = 0
+         for child in children:
+            child_digests.append(digests.pop(child))
+            size += 1 + (known[child.contents_key()][1] if child.has_children() else 0)
+         known[key] = (digest_contents(child_digests), size, node)
+      if node.has_children():
+         contents_digest = known[key][0]
+         counts[contents_digest] += 1
+      else:
+         contents_digest = EMPTY_DIGEST
+      digests[node] = digest_node(node.name, node.type, node.tags, contents_digest)
+
+   return {
+      key: (digest, node) for key, (digest, size, node) in known.items()
+      if size >= min_nodes and counts[digest] > 1
+   }
+
+def freeze_children(node, frozen=None, shared=None):
+   """
+   Return the children of a node as compact serialized data, without paths.
+
+   Contents listed in shared (see find_shared_contents) are frozen once per digest and
+   the same list is reused for every occurrence, collected in frozen (digest to list).
+   The children are read with iter_children, so nothing is built for good.
+   """
+   frozen = {} if frozen is None else frozen
+   shared = shared or {}
+   keys = COMPACT_KEYS
+   result = []
+   stack = [(node, result)]
+   while stack:
+      parent, target = stack.pop()
+      for child in parent.iter_children():
+         child_data = {keys['name']: child.name, keys['type']: child.type}
+         if child.tags:
+            child_data[keys['tags']] = list(child.tags)
+         target.append(child_data)
+         if not child.has_children():
+            continue
+         entry = shared.get(child.contents_key())
+         digest = entry[0] if entry is not None else None
+         if digest is not None and digest in frozen:
+            child_data[keys['children']] = frozen[digest]
+            continue
+         grandchildren = []
+         child_data[keys['children']] = grandchildren
+         if digest is not None:
+            frozen[digest] = grandchildren
+         stack.append((child, grandchildren))
+   return result
+
+def share_subtrees(root_node, min_nodes=2):
+   """
+   Hash-cons the repeated folder contents of a tree.
+
+   Every repeated contents is frozen into one compact serialized list, and each folder
+   holding it releases its child nodes and defers to the shared list instead.
+
+   Sharing is copy-on-write: read-only walks, such as saving, executing or syncing the
+   template, read the shared list through Node.iter_children without building anything.
+   Only accessing the children of a folder for editing, through Node.children, builds
+   them, privately for that folder, so editing one copy never changes the others.
+
+   Returns:
+      int: The number of nodes released.
+   """
+   shared = find_shared_contents(root_node, min_nodes)
+   frozen = {}
+   released = 0
+   # Walk down from the root, so the outermost repeated contents are shared first. Only
+   # built nodes are walked: lazily loaded contents are serialized data already.
+   queue = [root_node]
+   while queue:
+      node = queue.pop()
+      if not node.has_children():
+         continue
+      entry = shared.get(node.contents_key())
+      if entry is None:
+         if node.is_materialized():
+            queue.extend(node.children)
+         continue
+      digest = entry[0]
+      if digest not in frozen:
+         frozen[digest] = freeze_children(node, frozen, shared)
+      released += count_built_descendants(node)
+      node.defer_children(frozen[digest])
+   return released
+
+def count_built_descendants(node):
+   """
+   Return the number of descendants of a node that exist as Node objects.
+   """
+   count = 0
+   stack = [node]
+   while stack:
+      current = stack.pop()
+      if current.is_materialized():
+         # Reading the children of a built node does not build anything
+         children = list(current.children)
+         count += len(children)
+         stack.extend(children)
+   return count
@@ -0,0 +1,162 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from core.traversal import iter_levels
+from utils.file_operations import FileOperations
+from utils.progress import OperationCancelled
+from utils.logger import TRACE
+
+CREATED = 'created'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+class NodeResult:
+   """
+   The outcome of materializing a single node on disk.
+
+   Attributes:
+      node (Node): The node that was processed.
+      path (str): The filesystem path of the node.
+      status (str): One of 'created', 'failed' or 'skipped'.
+   """
+
+   def __init__(self, node, path, status):
+      self.node = node
+      self.path = path
+      self.status = status
+
+   def __repr__(self):
+      return f"NodeResult(Path: {self.path}, Type: {self.node.type}, Status: {self.status})"
+
+class ExecutionReport:
+   """
+   Collects the per-node results of a template execution.
+
+   Attributes:
+      results (list): A list of NodeResult objects, in the order they completed.
+   """
+
+   def __init__(self):
+      self.results = []
+
+   def __repr__(self):
+      return f"ExecutionReport(Created: {len(self.created)}, Failed: {len(self.failed)}, Skipped: {len(self.skipped)})"
+
+   def add(self, result):
+      self.results.append(result)
+
+   def _with_status(self, status):
+      return [result for result in self.results if result.status == status]
+
+   @property
+   def created(self):
+      return self._with_status(CREATED)
+
+   @property
+   def failed(self):
+      return self._with_status(FAILED)
+
+   @property
+   def skipped(self):
+      return self._with_status(SKIPPED)
+
+   @property
+   def succeeded(self):
+      return not any(result.status != CREATED for result in self.results)
+
+class TemplateExecutor:
+   """
+   Materializes a node tree on disk using a bounded thread pool.
+
+   Folders are created one depth level at a time: siblings are independent once their
+   parent exists, so each level is fanned out across the pool and the next level only
+   starts after the current one has finished. Files are created last, once every folder
+   is in place. If a folder cannot be created, its whole subtree is reported as skipped.
+
+   Attributes:
+      max_workers (int): The maximum number of worker threads. None uses the
+         ThreadPoolExecutor default.
+      file_operations (FileOperations): The object used to touch the filesystem.
+   """
+
+   def __init__(self, max_workers=None, file_operations=None):
+      self.logger = logging.getLogger(__name__)
+      if max_workers is not None and max_workers < 1:
+         raise ValueError(f"Invalid worker count: {max_workers}")
+      self.max_workers = max_workers
+      self.file_operations = file_operations or FileOperations()
+
+   def execute(self, root_node, base_dir=None, progress=None):
+      """
+      Create the tree under base_dir, or at the path of root_node if base_dir is None.
+
+      Node paths are resolved from their cached relative paths, so the tree is not modified.
+      """
+      self.logger.log(TRACE, "Entering execute with args: arg1=%s, arg2=%s", root_node.name, base_dir)
+      if base_dir is None:
+         base_dir = root_node.path
+      report = self.create([root_node], base_dir, progress)
+      self.logger.log(TRACE, "Exiting execute with result: %s", report)
+      return report
+
+   def create(self, nodes, base_dir, progress=None):
+      """
+      Create the given nodes and their subtrees.
+
+      The nodes must belong to the same tree and base_dir is the path of that tree's root
+      node. Each node's parent folder is expected to exist already.
+
+      Each processed node is reported to progress, if given. When the operation is
+      cancelled, entries already being created are finished, no new ones are started and
+      OperationCancelled is raised.
+      """
+      join = os.path.join
+      report = ExecutionReport()
+      files = []
+      failed = set()
+      if progress is not None:
+         progress.start(sum(node.count_nodes() for node in nodes), "nodes")
+
+      with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+         try:
+            for level in iter_levels(*nodes):
+               folders = []
+               for node in level:
+                  relative_path = node.relative_path
+                  path = join(base_dir, relative_path) if relative_path else base_dir
+                  if node.parent in failed:
+                     # The parent folder could not be created, so neither can this node
+                     report.add(NodeResult(node, path, SKIPPED))
+                     failed.add(node)
+                  elif node.type == 'folder':
+                     folders.append((node, path))
+                  else:
+                     files.append((node, path))
+
+               for result in pool.map(self._create_directory, folders):
+                  report.add(result)
+                  if result.status != CREATED:
+                     failed.add(result.node)
+                  if progress is not None:
+                     progress.advance()
+
+            for result in pool.map(self._create_file, files):
+               report.add(result)
+               if progress is not None:
+                  progress.advance()
+         except OperationCancelled:
+            pool.shutdown(cancel_futures=True)
+            raise
+
+      return report
+
+   def _create_directory(self, item):
+      node, path = item
+      created = self.file_operations.create_directory(path)
+      return NodeResult(node, path, CREATED if created else FAILED)
+
+   def _create_file(self, item):
+      node, path = item
+      created = self.file_operations.create_file(path)
+      return NodeResult(node, path, CREATED if created else FAILED)
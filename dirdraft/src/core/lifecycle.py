@@ -0,0 +1,69 @@
+import os
+import logging
+import threading
+import weakref
+from collections import Counter
+
+from utils.singleton import Singleton
+
+class LifecycleRegistry(metaclass=Singleton):
+   """
+   Singleton class to track the lifecycle of nodes and templates for debugging.
+
+   Tracking is opt-in: call enable() or set the DIRDRAFT_TRACK_LIFECYCLE environment
+   variable. Tracked objects are held in a weak set, so tracking does not keep them alive
+   and does not need a finalizer per object. Counters are aggregated per class.
+
+   Attributes:
+      enabled (bool): Whether newly created objects are tracked.
+   """
+
+   def __init__(self):
+      self.logger = logging.getLogger(__name__)
+      self.enabled = bool(os.environ.get("DIRDRAFT_TRACK_LIFECYCLE"))
+      self._live = weakref.WeakSet()
+      self._created = Counter()
+      self._lock = threading.Lock()
+
+   def enable(self):
+      self.enabled = True
+      self.logger.info("Lifecycle tracking enabled")
+
+   def disable(self):
+      self.enabled = False
+      self.reset()
+      self.logger.info("Lifecycle tracking disabled")
+
+   def reset(self):
+      with self._lock:
+         self._live = weakref.WeakSet()
+         self._created.clear()
+
+   def track(self, obj):
+      if not self.enabled:
+         return
+      with self._lock:
+         self._created[obj.__class__.__name__] += 1
+         self._live.add(obj)
+
+   def counters(self):
+      """
+      Return a dict mapping each tracked class name to its created, live and collected counts.
+      """
+      with self._lock:
+         live = Counter(obj.__class__.__name__ for obj in list(self._live))
+         created = dict(self._created)
+      return {
+         name: {'created': count, 'live': live[name], 'collected': count - live[name]}
+         for name, count in created.items()
+      }
+
+   def log_summary(self):
+      """
+      Log the counters of each tracked class, e.g. at shutdown. Does nothing while tracking
+      is disabled.
+      """
+      if not self.enabled:
+         return
+      for name, counts in sorted(self.counters().items()):
+         self.logger.info(f"{name}: created {counts['created']}, live {counts['live']}, collected {counts['collected']}")
@@ -1,7 +1,95 @@
 import logging
 import os
 import re
-from core.component import Component
+import hashlib
+from core.component import Component, intern_tags
+from core.lifecycle import LifecycleRegistry
+from utils.logger import TRACE
+
+# Keys of a serialized node, in the default and in the compact format
+SERIALIZED_KEYS = {'name': 'name', 'path': 'path', 'type': 'type', 'tags': 'tags', 'children': 'children'}
+COMPACT_KEYS = {'name': 'n', 'path': 'p', 'type': 't', 'tags': 'g', 'children': 'c'}
+
+# Matches valid file/folder names
+NAME_PATTERN = re.compile(r'^[^\\/:\*\?"<>\|]+')
+
+def validate_names(names):
+   """
+   Validate a batch of node names without logging, raising ValueError on the first invalid name.
+   """
+   match = NAME_PATTERN.match
+   for name in names:
+      # Reject empty names, names made of whitespace only and names starting with a reserved character
+      if not name or name.isspace() or not match(name):
+         raise ValueError(f"Invalid node name: {name}")
+
+def digest_contents(child_digests):
+   """
+   Return the digest of a folder's contents from the digests of its children, in order.
+   """
+   contents = hashlib.blake2b(digest_size=16)
+   for digest in child_digests:
+      contents.update(digest.encode('ascii'))
+   return contents.hexdigest()
+
+# Digest of the contents of a node without children
+EMPTY_DIGEST = digest_contents(())
+
+def digest_node(name, node_type, tags, contents_digest):
+   """
+   Return the Merkle digest of a node from its own fields and the digest of its contents.
+   Paths are not included, so identical subtrees in different places have equal digests.
+   """
+   digest = hashlib.blake2b(digest_size=16)
+   digest.update(name.encode('utf-8'))
+   digest.update(b'\0' + node_type.encode('utf-8') + b'\0')
+   digest.update('\x1f'.join(tags).encode('utf-8'))
+   digest.update(b'\0' + contents_digest.encode('ascii'))
+   return digest.hexdigest()
+
+def digest_serialized_children(children_data, keys, cache=None, include_tags=True):
+   """
+   Return the contents digest of serialized children, equal to the one of the built nodes.
+
+   cache maps the id of each children list already digested to its digest, so lists
+   shared by several nodes are digested once. It is only valid while the lists are alive.
+   With include_tags=False, tags are left out as in Node.shape_hash.
+   """
+   cache = {} if cache is None else cache
+   name_key, type_key, tags_key, children_key = keys['name'], keys['type'], keys['tags'], keys['children']
+   stack = [(children_data, False)]
+   while stack:
+      children, ready = stack.pop()
+      if id(children) in cache:
+         continue
+      if not ready:
+         stack.append((children, True))
+         for child_data in children:
+            grandchildren = child_data.get(children_key)
+            if grandchildren and id(grandchildren) not in cache:
+               stack.append((grandchildren, False))
+         continue
+      child_digests = []
+      for child_data in children:
+         grandchildren = child_data.get(children_key)
+         contents_digest = cache[id(grandchildren)] if grandchildren else EMPTY_DIGEST
+         tags = child_data.get(tags_key, ()) if include_tags else ()
+         child_digests.append(digest_node(child_data[name_key], child_data[type_key], tags, contents_digest))
+      cache[id(children)] = digest_contents(child_digests)
+   return cache[id(children_data)]
+
+def new_digest_caches():
+   """
+   Return the digest caches of a block of serialized data, for digest_serialized_children.
+
+   Lazily loaded nodes built from the same data share them in their pending state, so each
+   serialized children list is digested once, however often its nodes are rebuilt. The
+   caches are indexed by include_tags. The data is never modified and stays alive with
+   the nodes that hold it, so its ids stay valid.
+   """
+   return ({}, {})
+
+_registry = LifecycleRegistry()
 
 class Node(Component):
    """ 
@@ -9,26 +97,48 @@ class Node(Component):
    
    Attributes:
       name (str): The name of the node.
-      path (str): The path to the node.
+      path (str): The path to the node. Attached nodes resolve their relative path against
+         the path of the tree's root node.
+      relative_path (str): The path of the node relative to the tree's root node. Cached per
+         node and recomputed only for the subtree of a renamed, moved or re-parented node.
       type (str): The type of the node. Can be 'file' or 'folder'.
+      tags (tuple): The tags of the node, shared with every node that has the same tags.
       root (bool): Whether the node is the root node or not.
-      children (list): A list of children nodes.
+      parent (Node): The parent node, or None for a detached or root node.
+      children (iterable): The children nodes, in insertion order. Backed by a name index,
+         so get_child, add_child and remove_child run in constant time. Children of a lazily
+         deserialized node are built from their serialized data on first access.
+      structural_hash (str): Merkle digest of the name, type, tags and subtree of the node.
+         Computed on first use and cleared on the node and its ancestors by every edit, so
+         two subtrees are identical exactly when their hashes are equal.
+      shape_hash (str): The same digest without tags, cached and cleared the same way, to
+         compare trees whose tags are not meaningful, such as scanned directories.
       
    Pattern: Composite
    """
+
+   __slots__ = ('parent', '_children', '_relative_path', '_pending', '_hash', '_shape_hash', '__weakref__')
+
+   logger = logging.getLogger(__name__)
    
    def __init__(self, name, path, node_type, tags=None, root=False):
+      self.parent = None
+      self._children = {}  # Children indexed by name, in insertion order
+      self._relative_path = None
+      self._pending = None  # Serialized children not built yet, see deserialize
+      self._hash = None
+      self._shape_hash = None
       super().__init__(name, path, node_type, tags, root)
-      self.logger = logging.getLogger(__name__)
       self._validate_name(name)
       self._validate_path(path)
-      self.children = []  # Initialize an empty list for children
+      if _registry.enabled:
+         _registry.track(self)
       
-      self.logger.info(f"Created node: {self}")
+      self.logger.log(TRACE, "Created node: %s", self)
       
       
    def __repr__(self):
-      children_count = len(self.children)
+      children_count = len(self._pending[0]) if self._pending is not None else len(self._children)
       tags_str = ", ".join(self.tags)
       return (
          f"Node(\n"
@@ -41,122 +151,471 @@ class Node(Component):
          f")"
       )
 
-   def __del__(self):
-      self.logger.info(f"Deleted node: {self.name}")
-      
+   @property
+   def children(self):
+      if self._pending is not None:
+         self._materialize()
+      return self._children.values()
+
+   def iter_children(self):
+      """
+      Yield the children of the node for reading only.
+
+      Lazily loaded children are built for the caller but not kept by the node: each one
+      has this node as its parent, so its path and hash resolve, and its own children are
+      lazily loaded again. Walking a tree this way leaves shared contents shared. Use
+      children to get nodes that can be edited.
+      """
+      if self._pending is None:
+         yield from self._children.values()
+         return
+      children_data, keys, digests = self._pending
+      children_key = keys['children']
+      for child_node, child_data in zip(self._build_children(children_data, keys), children_data):
+         child_node.parent = self
+         grandchildren_data = child_data.get(children_key)
+         if grandchildren_data:
+            child_node._pending = (grandchildren_data, keys, digests)
+         yield child_node
+
+   def contents_key(self):
+      """
+      Return a key for the children of the node that is the same across read-only walks.
+
+      Children read by iter_children from serialized data are new nodes on every walk,
+      but the serialized list is always the same object, so it identifies them. Built
+      children are identified by the node itself.
+      """
+      return id(self._pending[0]) if self._pending is not None else self
+
+   def has_children(self):
+      """
+      Return whether the node has children, without building lazily loaded ones.
+      """
+      return bool(self._children) or self._pending is not None
+
+   def child_count(self):
+      """
+      Return the number of children, without building lazily loaded ones.
+      """
+      if self._pending is not None:
+         return len(self._pending[0])
+      return len(self._children)
+
+   def is_materialized(self):
+      """
+      Return whether the children of the node have been built.
+      """
+      return self._pending is None
+
+   def materialize_subtree(self):
+      """
+      Build every lazily loaded node of the subtree for good, so that the nodes returned
+      by any walk afterwards are the ones held by the tree: they can be edited, and
+      several threads can read the tree without building anything.
+      """
+      stack = [self]
+      while stack:
+         node = stack.pop()
+         stack.extend(node.children)
+
+   def count_nodes(self):
+      """
+      Return the number of nodes in the subtree, this node included. Lazily loaded
+      descendants are counted from their serialized data without being built.
+      """
+      count = 0
+      stack = [self]
+      while stack:
+         node = stack.pop()
+         count += 1
+         stack.extend(node._children.values())
+         if node._pending is not None:
+            children_data, keys, _ = node._pending
+            children_key = keys['children']
+            pending = list(children_data)
+            while pending:
+               child_data = pending.pop()
+               count += 1
+               pending.extend(child_data.get(children_key) or ())
+      return count
+
+   def get_child(self, name):
+      """
+      Return the child with the given name, or None if there is no such child.
+      """
+      if self._pending is not None:
+         self._materialize()
+      return self._children.get(name)
+
+   @property
+   def path(self):
+      # Only detached and root nodes store their path; attached nodes resolve it against the root
+      if self.parent is None:
+         return self._path
+      root = self.parent
+      while root.parent is not None:
+         root = root.parent
+      return os.path.join(root._path, self.relative_path)
+
+   @path.setter
+   def path(self, path):
+      # The path of an attached node is derived, so only detached and root nodes keep one.
+      # Relative paths do not depend on it, so changing the base path invalidates nothing.
+      self._path = path if self.parent is None else None
+
+   @property
+   def relative_path(self):
+      if self.parent is None:
+         return ''
+      if self._relative_path is not None:
+         return self._relative_path
+
+      # Walk up to the closest node with a known relative path, then cache on the way back down
+      chain = []
+      node = self
+      while node.parent is not None and node._relative_path is None:
+         chain.append(node)
+         node = node.parent
+      relative_path = '' if node.parent is None else node._relative_path
+      join = os.path.join
+      for node in reversed(chain):
+         relative_path = join(relative_path, node.name) if relative_path else node.name
+         node._relative_path = relative_path
+      return relative_path
+
+   @property
+   def tags(self):
+      return self._tags
+
+   @tags.setter
+   def tags(self, tags):
+      self._tags = intern_tags(tags)
+      self._invalidate_hashes()
+
+   @property
+   def structural_hash(self):
+      if self._hash is None:
+         self._compute_hashes()
+      return self._hash
+
+   @property
+   def shape_hash(self):
+      if self._shape_hash is None:
+         self._compute_hashes(include_tags=False)
+      return self._shape_hash
+
+   @property
+   def content_hash(self):
+      """
+      The digest of the children of the node, without the node's own name, type and tags.
+      """
+      return self.get_content_hash()
+
+   def get_content_hash(self, include_tags=True):
+      """
+      Return the content_hash of the node, or with include_tags=False the same digest made
+      from the shape_hash of the children.
+      """
+      if self._pending is not None:
+         children_data, keys, digests = self._pending
+         return digest_serialized_children(children_data, keys, digests[include_tags], include_tags)
+      if include_tags:
+         return digest_contents(child.structural_hash for child in self._children.values())
+      return digest_contents(child.shape_hash for child in self._children.values())
+
+   def _compute_hashes(self, include_tags=True):
+      # Post-order walk over the nodes without a cached hash. Lazily loaded children are
+      # digested from their serialized data, so computing a hash never builds nodes.
+      attribute = '_hash' if include_tags else '_shape_hash'
+      stack = [(self, False)]
+      while stack:
+         node, ready = stack.pop()
+         if not ready:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node._children.values() if getattr(child, attribute) is None)
+            continue
+         if node._pending is not None:
+            children_data, keys, digests = node._pending
+            contents_digest = digest_serialized_children(children_data, keys, digests[include_tags], include_tags)
+         else:
+            contents_digest = digest_contents(getattr(child, attribute) for child in node._children.values())
+         setattr(node, attribute, digest_node(node.name, node.type, node._tags if include_tags else (), contents_digest))
+
+   def _invalidate_hashes(self):
+      # The hash of every ancestor covers this node, so all of them are cleared
+      node = self
+      while node is not None:
+         node._hash = None
+         node._shape_hash = None
+         node = node.parent
+
+   def _invalidate_relative_paths(self):
+      # Only the cached part of the subtree needs clearing: a node is cached only if its parent is
+      stack = [self]
+      while stack:
+         node = stack.pop()
+         node._relative_path = None
+         stack.extend(child for child in node._children.values() if child._relative_path is not None)
+
+   def ancestors(self):
+      """
+      Yield the parent of the node, then its parent, up to the root node.
+      """
+      node = self.parent
+      while node is not None:
+         yield node
+         node = node.parent
+
+   def get_depth(self):
+      """
+      Return the number of ancestors of the node, 0 for a root or detached node.
+      """
+      return sum(1 for _ in self.ancestors())
+
    def set_root_status(self, status):
-      self.logger.info(f"Entering set_root_status with args: arg1={status}")
+      self.logger.log(TRACE, "Entering set_root_status with args: arg1=%s", status)
       self.root = status
-      self.logger.info(f"Exiting set_root_status with result: {status}")
+      self.logger.log(TRACE, "Exiting set_root_status with result: %s", status)
       
    def get_root_status(self):
-      self.logger.info(f"Entering get_root_status.")
-      self.logger.info(f"Exiting get_root_status with result: {self.root}")
+      self.logger.log(TRACE, "Entering get_root_status.")
+      self.logger.log(TRACE, "Exiting get_root_status with result: %s", self.root)
       return self.root
       
    def _validate_name(self, name):
-      self.logger.info(f"Entering _validate_name with args: arg1={name}")
+      self.logger.log(TRACE, "Entering _validate_name with args: arg1=%s", name)
       # Check if the name is empty or contains only whitespace characters
       if not name or name.isspace():
          raise ValueError(f"Invalid node name: {name}")
 
-      # Define a regular expression pattern to match valid file/folder names
-      pattern = r'^[^\\/:\*\?"<>\|]+'
-      if not re.match(pattern, name):
+      if not NAME_PATTERN.match(name):
          raise ValueError(f"Invalid node name: {name}")
-      self.logger.info(f"Exiting _validate_name.")
+      self.logger.log(TRACE, "Exiting _validate_name.")
 
    def _validate_path(self, path):
-      self.logger.info(f"Entering _validate_path with args: arg1={path}")
+      self.logger.log(TRACE, "Entering _validate_path with args: arg1=%s", path)
       # Check if the path is a valid absolute path
       if not path or (not os.path.isabs(path) and not path.startswith(".")):
          raise ValueError(f"Invalid node path: {path}")
-      self.logger.info(f"Exiting _validate_path.")
+      self.logger.log(TRACE, "Exiting _validate_path.")
 
    def add_child(self, child):
-      self.logger.info(f"Entering add_child with args: arg1={child}")
+      self.logger.log(TRACE, "Entering add_child with args: arg1=%s", child)
       if isinstance(child, Node):
-         if self.root:
-            # If the current node is the root node, skip the duplicate check
-            self.children.append(child)
-            child.parent = self  # Set the parent reference
-            child.path = os.path.join(self.path, child.name)  # Update the child's path
-            self.logger.info(f"Added root node: {child.name}")
-         else:
-            # Check for duplicate child node names within the same parent directory
-            if child.name in [c.name for c in self.children]:
-               raise ValueError(f"Duplicate child node name '{child.name}' in parent '{self.name}'")
-            self.children.append(child)
-            child.parent = self  # Set the parent reference
-            child.path = os.path.join(self.path, child.name)  # Update the child's path
-            self.logger.info(f"Added child node: {child.name} to parent: {self.name}")
+         if self._pending is not None:
+            self._materialize()
+         # Check for duplicate child node names within the same parent directory
+         if child.name in self._children:
+            raise ValueError(f"Duplicate child node name '{child.name}' in parent '{self.name}'")
+         self._check_not_ancestor(child)
+         if child.parent is not None:
+            # A node has a single parent, so detach it from its current one first
+            child.parent.remove_child(child)
+         self._children[child.name] = child
+         child.parent = self  # Set the parent reference, the child's path is now derived from it
+         child._path = None
+         child._invalidate_relative_paths()
+         self._invalidate_hashes()
+         self.logger.log(TRACE, "Added child node: %s to parent: %s", child.name, self.name)
       else:
          raise TypeError("Child must be an instance of Node")
-      self.logger.info(f"Exiting add_child.")
+      self.logger.log(TRACE, "Exiting add_child.")
+
+   def add_children(self, children):
+      """
+      Attach a batch of already validated, detached nodes as children of this node.
+
+      This is the bulk counterpart of add_child: nothing is logged per child.
+      """
+      if self._pending is not None:
+         self._materialize()
+      self._attach_children(children)
+      self._invalidate_hashes()
+
+   def _attach_children(self, children):
+      index = self._children
+      names = set()
+      for child in children:
+         if child.name in index or child.name in names:
+            raise ValueError(f"Duplicate child node name '{child.name}' in parent '{self.name}'")
+         if child.parent is not None or child is self:
+            raise ValueError(f"Node '{child.name}' is already attached")
+         names.add(child.name)
+      for child in children:
+         index[child.name] = child
+         child.parent = self
+         child._path = None
+         child._invalidate_relative_paths()
+
+   def _check_not_ancestor(self, child):
+      if child is self or any(ancestor is child for ancestor in self.ancestors()):
+         raise ValueError(f"Node '{child.name}' cannot be added to its own subtree")
 
    def remove_child(self, child):
-      self.logger.info(f"Entering remove_child with args: arg1={child}")
-      if child in self.children:
-         self.children.remove(child)
-         self.logger.info(f"Removed child node '{child.name}' from '{self.name}'")
+      self.logger.log(TRACE, "Entering remove_child with args: arg1=%s", child)
+      if self._children.get(child.name) is child:
+         # Keep the absolute path of the detached node
+         child._path = child.path
+         del self._children[child.name]
+         child.parent = None
+         child._invalidate_relative_paths()
+         self._invalidate_hashes()
+         self.logger.log(TRACE, "Removed child node '%s' from '%s'", child.name, self.name)
       else:
          self.logger.warning(f"Child node '{child.name}' not found in '{self.name}'")
-      self.logger.info(f"Exiting remove_child.")
+      self.logger.log(TRACE, "Exiting remove_child.")
+
+   def _set_name(self, new_name):
+      # Keep the parent's name index consistent, preserving the order of the siblings
+      parent = self.parent
+      if parent is not None and new_name != self.name:
+         if new_name in parent._children:
+            raise ValueError(f"Duplicate child node name '{new_name}' in parent '{parent.name}'")
+         parent._children = {
+            (new_name if child is self else name): child for name, child in parent._children.items()
+         }
+      self.name = new_name
+      self._invalidate_relative_paths()
+      self._invalidate_hashes()
 
    def rename(self, new_name):
-      self.logger.info(f"Entering rename with args: arg1={new_name}")
+      self.logger.log(TRACE, "Entering rename with args: arg1=%s", new_name)
       old_name = self.name
-      self.name = new_name
+      self._set_name(new_name)
       try:
-         self.logger.info(f"Renamed node from '{old_name}' to '{new_name}'")
+         self.logger.log(TRACE, "Renamed node from '%s' to '%s'", old_name, new_name)
       except AttributeError:
          pass
-      self.logger.info(f"Exiting rename.")
+      self.logger.log(TRACE, "Exiting rename.")
 
    def move(self, new_path):
-      self.logger.info(f"Entering move with args: arg1={new_path}")
+      self.logger.log(TRACE, "Entering move with args: arg1=%s", new_path)
       old_path = self.path
-      self.path = new_path
+      if self.parent is None:
+         self.path = new_path
+      else:
+         # An attached node's path follows its parent, so only its name can change
+         self._set_name(os.path.basename(new_path))
       try:
-         self.logger.info(f"Moved node from '{old_path}' to '{new_path}'")
+         self.logger.log(TRACE, "Moved node from '%s' to '%s'", old_path, new_path)
       except AttributeError:
          pass
-      self.logger.info(f"Exiting move.")
+      self.logger.log(TRACE, "Exiting move.")
       
    def insert_tags(self, new_tags):
+      tags = list(self.tags)
+
       # Add the default tag based on node type
-      if self.type == 'folder' and 'folder' not in self.tags:
-         self.tags.append('folder')
-         self.logger.info(f"Added default 'folder' tag to node '{self.name}'")
-      elif self.type == 'file' and 'file' not in self.tags:
-         self.tags.append('file')
-         self.logger.info(f"Added default 'file' tag to node '{self.name}'")
+      if self.type == 'folder' and 'folder' not in tags:
+         tags.append('folder')
+         self.logger.log(TRACE, "Added default 'folder' tag to node '%s'", self.name)
+      elif self.type == 'file' and 'file' not in tags:
+         tags.append('file')
+         self.logger.log(TRACE, "Added default 'file' tag to node '%s'", self.name)
 
       # Add the new tags
       for tag in new_tags:
-         if tag not in self.tags:
-            self.tags.append(tag)
-            self.logger.info(f"Added tag '{tag}' to node '{self.name}'")
+         if tag not in tags:
+            tags.append(tag)
+            self.logger.log(TRACE, "Added tag '%s' to node '%s'", tag, self.name)
+      self.tags = tags
       
    def serialize(self):
       serialized_node = {
          'name': self.name,
          'path': self.path,
          'type': self.type,
-         'tags': self.tags,
-         'children': [child.serialize() for child in self.children]
+         'tags': list(self.tags),
+         'children': [child.serialize() for child in self.iter_children()]
       }
       return serialized_node
 
    @classmethod
-   def deserialize(cls, serialized_data):
-      name = serialized_data['name']
-      path = serialized_data['path']
-      node_type = serialized_data['type']
-      tags = serialized_data.get('tags', [])
-      node = cls(name, path, node_type, tags)
-      children_data = serialized_data.get('children', [])
-      for child_data in children_data:
-         child_node = cls.deserialize(child_data)
-         node.add_child(child_node)
-      return node
\ No newline at end of file
+   def from_trusted(cls, name, path, node_type, tags=None, root=False):
+      """
+      Create a node from data that is already known to be valid.
+
+      Skips the per-node validation and logging done by __init__. Use validate_names to
+      check a batch of names first when they come from an untrusted source.
+      """
+      node = cls.__new__(cls)
+      node.parent = None
+      node.name = name
+      node._path = path
+      node.type = node_type
+      node.root = root
+      node._tags = intern_tags(tags or ())
+      node._children = {}
+      node._relative_path = None
+      node._pending = None
+      node._hash = None
+      node._shape_hash = None
+      if _registry.enabled:
+         _registry.track(node)
+      return node
+
+   @classmethod
+   def deserialize(cls, serialized_data, keys=SERIALIZED_KEYS, eager_depth=None, shared=()):
+      """
+      Build a node tree from serialized data, using the given key names (SERIALIZED_KEYS or
+      COMPACT_KEYS). Paths of non-root nodes are derived, so they may be left out.
+
+      With eager_depth, only that many levels below the root are built right away. Deeper
+      children keep their serialized data and are built one level at a time when accessed.
+      Children lists whose id is in shared are deferred the same way at any depth, so a
+      list referenced by many nodes is held once until an instance of it is accessed.
+      """
+      name_key, path_key, type_key, tags_key, children_key = keys['name'], keys['path'], keys['type'], keys['tags'], keys['children']
+      node = cls(serialized_data[name_key], serialized_data[path_key], serialized_data[type_key], serialized_data.get(tags_key, []))
+
+      # Build the subtree iteratively, one batch of siblings at a time
+      digests = new_digest_caches()
+      stack = [(node, serialized_data.get(children_key), 0)]
+      while stack:
+         parent_node, children_data, depth = stack.pop()
+         if not children_data:
+            continue
+         if (eager_depth is not None and depth >= eager_depth) or id(children_data) in shared:
+            parent_node._pending = (children_data, keys, digests)
+            continue
+         children = cls._build_children(children_data, keys)
+         parent_node._attach_children(children)
+         for child_node, child_data in zip(children, children_data):
+            stack.append((child_node, child_data.get(children_key), depth + 1))
+      return node
+
+   @classmethod
+   def _build_children(cls, children_data, keys):
+      name_key, path_key, type_key, tags_key = keys['name'], keys['path'], keys['type'], keys['tags']
+      validate_names([child_data[name_key] for child_data in children_data])
+      return [
+         cls.from_trusted(child_data[name_key], child_data.get(path_key), child_data[type_key], child_data.get(tags_key, ()))
+         for child_data in children_data
+      ]
+
+   def defer_children(self, children_data, keys=COMPACT_KEYS):
+      """
+      Replace the children of the node with serialized data, built again when accessed.
+
+      The data is only read, never modified, so the same list can back many nodes. Each
+      node builds its own children from it, and edits to them do not affect the others.
+      """
+      for child in self._children.values():
+         child.parent = None
+      self._children = {}
+      self._pending = (children_data, keys, new_digest_caches()) if children_data else None
+      self._invalidate_hashes()
+
+   def _materialize(self):
+      # Build one level of lazily loaded children, deferring their own children again.
+      # The structure does not change, so cached hashes stay valid.
+      children_data, keys, digests = self._pending
+      self._pending = None
+      children = self._build_children(children_data, keys)
+      self._attach_children(children)
+      children_key = keys['children']
+      for child_node, child_data in zip(children, children_data):
+         grandchildren_data = child_data.get(children_key)
+         if grandchildren_data:
+            child_node._pending = (grandchildren_data, keys, digests)
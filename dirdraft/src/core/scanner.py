@@ -0,0 +1,168 @@
+import os
+import fnmatch
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.logger import TRACE
+
+class ScanEntry:
+   """
+   A single directory entry found by the DirectoryScanner.
+
+   Attributes:
+      name (str): The name of the entry.
+      path (str): The full path of the entry.
+      is_dir (bool): Whether the entry is a directory (symlinks to directories included).
+      depth (int): The depth of the entry below the scanned directory, starting at 1.
+      descend (bool): Whether the scanner will scan the contents of this entry.
+      ancestors (frozenset): The (device, inode) keys of this directory and the directories
+         above it, when symlinks are followed. None otherwise.
+   """
+
+   def __init__(self, name, path, is_dir, depth, descend, ancestors=None):
+      self.name = name
+      self.path = path
+      self.is_dir = is_dir
+      self.depth = depth
+      self.descend = descend
+      self.ancestors = ancestors
+
+   def __repr__(self):
+      return f"ScanEntry(Name: {self.name}, Path: {self.path}, Dir: {self.is_dir}, Depth: {self.depth})"
+
+class DirectoryScanner:
+   """
+   Walks a directory tree with os.scandir, using the cached DirEntry type information
+   instead of one stat call per entry.
+
+   The walk uses an explicit stack, so deep trees do not hit the recursion limit. With
+   more than one worker, each depth level of subdirectories is scanned across a thread pool.
+
+   Attributes:
+      include (list): Glob patterns a file must match to be reported. Directories are
+         always traversed unless excluded. None reports every file.
+      exclude (list): Glob patterns for entries to skip. Excluded directories are not
+         scanned at all. Patterns are matched against the entry name and its path
+         relative to the scanned directory.
+      max_depth (int): The maximum depth of reported entries. None scans the whole tree.
+      follow_symlinks (bool): Whether to descend into symlinked directories. A directory
+         is not entered again below itself, which stops symlink loops, but a directory
+         reached through several paths is scanned under each of them.
+      max_workers (int): The number of threads used to scan subdirectories. None or 1
+         scans sequentially.
+   """
+
+   def __init__(self, include=None, exclude=None, max_depth=None, follow_symlinks=False, max_workers=None):
+      self.logger = logging.getLogger(__name__)
+      if max_depth is not None and max_depth < 0:
+         raise ValueError(f"Invalid max depth: {max_depth}")
+      if max_workers is not None and max_workers < 1:
+         raise ValueError(f"Invalid worker count: {max_workers}")
+      self.include = list(include or [])
+      self.exclude = list(exclude or [])
+      self.max_depth = max_depth
+      self.follow_symlinks = follow_symlinks
+      self.max_workers = max_workers
+
+   def scan(self, directory_path):
+      """
+      Scan a directory tree.
+
+      Yields (directory_path, entries) pairs, one per scanned directory, where entries is a
+      list of ScanEntry objects. A directory is always yielded after the directory containing it.
+      """
+      self.logger.log(TRACE, "Entering scan with args: arg1=%s", directory_path)
+      ancestors = None
+      if self.follow_symlinks:
+         key = self._directory_key(directory_path)
+         ancestors = frozenset([key]) if key is not None else frozenset()
+
+      if self.max_workers is None or self.max_workers == 1:
+         yield from self._scan_sequential(directory_path, ancestors)
+      else:
+         yield from self._scan_parallel(directory_path, ancestors)
+      self.logger.log(TRACE, "Exiting scan.")
+
+   def _scan_sequential(self, directory_path, ancestors):
+      stack = [(directory_path, '', 0, ancestors)]
+      while stack:
+         path, relative_path, depth, ancestors = stack.pop()
+         entries = self._scan_directory(path, relative_path, depth + 1, ancestors)
+         yield path, entries
+         for entry in reversed(entries):
+            if entry.descend:
+               stack.append((entry.path, self._join_relative(relative_path, entry.name), entry.depth, entry.ancestors))
+
+   def _scan_parallel(self, directory_path, ancestors):
+      with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+         level = [(directory_path, '', 0, ancestors)]
+         while level:
+            # Each directory carries its own ancestor keys, so the workers share no state
+            results = pool.map(lambda item: self._scan_directory(item[0], item[1], item[2] + 1, item[3]), level)
+            next_level = []
+            for (path, relative_path, depth, _), entries in zip(level, results):
+               yield path, entries
+               for entry in entries:
+                  if entry.descend:
+                     next_level.append((entry.path, self._join_relative(relative_path, entry.name), entry.depth, entry.ancestors))
+            level = next_level
+
+   def _scan_directory(self, path, relative_path, depth, ancestors):
+      entries = []
+      if self.max_depth is not None and depth > self.max_depth:
+         return entries
+      try:
+         with os.scandir(path) as iterator:
+            for dir_entry in iterator:
+               entry = self._make_entry(dir_entry, relative_path, depth, ancestors)
+               if entry is not None:
+                  entries.append(entry)
+      except OSError as e:
+         self.logger.warning(f"Error scanning directory {path}: {e}")
+      return entries
+
+   def _make_entry(self, dir_entry, relative_path, depth, ancestors):
+      name = dir_entry.name
+      entry_relative_path = self._join_relative(relative_path, name)
+      if self._matches(self.exclude, name, entry_relative_path):
+         return None
+
+      try:
+         is_dir = dir_entry.is_dir()
+      except OSError:
+         is_dir = False
+
+      entry_ancestors = None
+      if is_dir:
+         descend = self.max_depth is None or depth < self.max_depth
+         if descend and not self.follow_symlinks and dir_entry.is_symlink():
+            descend = False
+         elif descend and self.follow_symlinks:
+            # A symlink back to a directory above this one would loop forever. Other
+            # directories are scanned again under every path that reaches them.
+            key = self._directory_key(dir_entry.path)
+            if key is None or key in ancestors:
+               descend = False
+            else:
+               entry_ancestors = ancestors | {key}
+      else:
+         if self.include and not self._matches(self.include, name, entry_relative_path):
+            return None
+         descend = False
+      return ScanEntry(name, dir_entry.path, is_dir, depth, descend, entry_ancestors)
+
+   def _directory_key(self, path):
+      try:
+         stat_result = os.stat(path)
+      except OSError:
+         return None
+      return (stat_result.st_dev, stat_result.st_ino)
+
+   def _matches(self, patterns, name, relative_path):
+      for pattern in patterns:
+         if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern):
+            return True
+      return False
+
+   def _join_relative(self, relative_path, name):
+      return f"{relative_path}/{name}" if relative_path else name
@@ -0,0 +1,144 @@
+import os
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.executor import TemplateExecutor
+from utils.logger import TRACE
+
+class SyncPlan:
+   """
+   The differences between a template and an existing directory tree.
+
+   Attributes:
+      root_node (Node): The root node of the template tree.
+      base_dir (str): The directory the template is synced to.
+      missing (list): (node, path) pairs for nodes that do not exist on disk. Only the top
+         of each missing subtree is listed; its descendants are missing as well.
+      extra (list): (path, type) pairs for entries on disk that are not in the template.
+         Only the top of each extra subtree is listed.
+      conflicts (list): (node, path, actual_type) triples for entries whose type on disk
+         differs from the template. Their subtrees are left out of the plan.
+   """
+
+   def __init__(self, root_node, base_dir):
+      self.root_node = root_node
+      self.base_dir = base_dir
+      self.missing = []
+      self.extra = []
+      self.conflicts = []
+
+   def __repr__(self):
+      return f"SyncPlan(Base: {self.base_dir}, Missing: {self.count_missing()}, Extra: {len(self.extra)}, Conflicts: {len(self.conflicts)})"
+
+   def is_empty(self):
+      return not self.missing
+
+   def count_missing(self):
+      return sum(1 for _ in self.iter_missing())
+
+   def iter_missing(self):
+      """
+      Yield a (node, path) pair for every missing node, parents before children.
+      """
+      join = os.path.join
+      queue = deque(self.missing)
+      while queue:
+         node, path = queue.popleft()
+         yield node, path
+         queue.extend((child, join(path, child.name)) for child in node.iter_children())
+
+   def describe(self):
+      """
+      Return a human readable list of the changes the plan would make, and of what it leaves alone.
+      """
+      lines = [f"Create {node.type}: {path}" for node, path in self.iter_missing()]
+      for node, path, actual_type in self.conflicts:
+         lines.append(f"Conflict: {path} is a {actual_type}, template expects a {node.type}")
+      for path, actual_type in self.extra:
+         lines.append(f"Extra {actual_type}: {path}")
+      return lines
+
+class TemplateSync:
+   """
+   Brings a directory tree in line with a template without touching what already matches.
+
+   plan() lists each template folder that exists on disk exactly once with os.scandir and
+   compares it with the template, so no per-node exists check is needed. apply() then only
+   creates the missing entries. Extra entries and type conflicts are reported, never modified.
+
+   Attributes:
+      max_workers (int): The number of threads used to scan folders and create entries.
+   """
+
+   def __init__(self, max_workers=None, file_operations=None):
+      self.logger = logging.getLogger(__name__)
+      self.max_workers = max_workers
+      self.executor = TemplateExecutor(max_workers, file_operations)
+
+   def plan(self, root_node, base_dir, progress=None):
+      self.logger.log(TRACE, "Entering plan with args: arg1=%s, arg2=%s", root_node.name, base_dir)
+      if root_node.parent is not None:
+         raise ValueError("Only the root node of a tree can be synced")
+      plan = SyncPlan(root_node, base_dir)
+
+      if not os.path.isdir(base_dir):
+         if os.path.lexists(base_dir):
+            plan.conflicts.append((root_node, base_dir, 'file'))
+         else:
+            plan.missing.append((root_node, base_dir))
+         self.logger.log(TRACE, "Exiting plan with result: %s", plan)
+         return plan
+
+      join = os.path.join
+      if progress is not None:
+         progress.start(None, "folders")
+      with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+         level = [(root_node, base_dir)]
+         while level:
+            next_level = []
+            listings = pool.map(self._list_directory, [path for _, path in level])
+            for (node, path), listing in zip(level, listings):
+               for child in node.iter_children():
+                  child_path = join(path, child.name)
+                  actual_type = listing.pop(child.name, None)
+                  if actual_type is None:
+                     plan.missing.append((child, child_path))
+                  elif actual_type != child.type:
+                     plan.conflicts.append((child, child_path, actual_type))
+                  elif child.type == 'folder':
+                     next_level.append((child, child_path))
+               for name, actual_type in listing.items():
+                  plan.extra.append((join(path, name), actual_type))
+               if progress is not None:
+                  progress.advance()
+            level = next_level
+
+      self.logger.log(TRACE, "Exiting plan with result: %s", plan)
+      return plan
+
+   def apply(self, plan, progress=None):
+      """
+      Create the missing entries of a plan, reporting each created node to progress, if given.
+
+      Returns:
+         ExecutionReport: The per-node results for the created entries.
+      """
+      self.logger.log(TRACE, "Entering apply with args: arg1=%s", plan)
+      report = self.executor.create([node for node, _ in plan.missing], plan.base_dir, progress)
+      self.logger.log(TRACE, "Exiting apply with result: %s", report)
+      return report
+
+   def _list_directory(self, path):
+      listing = {}
+      try:
+         with os.scandir(path) as iterator:
+            for entry in iterator:
+               try:
+                  is_dir = entry.is_dir()
+               except OSError:
+                  is_dir = False
+               listing[entry.name] = 'folder' if is_dir else 'file'
+      except OSError as e:
+         self.logger.warning(f"Error scanning directory {path}: {e}")
+      return listing
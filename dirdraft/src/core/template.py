@@ -1,9 +1,16 @@
 import os
 import logging
 
-from core.node import Node
+from core.node import Node, validate_names
+from core.executor import TemplateExecutor
+from core.lifecycle import LifecycleRegistry
+from core.scanner import DirectoryScanner
+from core.sync import TemplateSync
+from core.traversal import topological_sort
+from core.dedup import share_subtrees
+from core.template_diff import diff
 from utils.file_operations import FileOperations
-from collections import defaultdict
+from utils.logger import TRACE
 
 class Template:
    """ 
@@ -33,19 +40,17 @@ class Template:
       self.name = name
       self.root_node = root_node
 
+      LifecycleRegistry().track(self)
       self.logger.info(f"Created template: {self.name}")
       
    def __repr__(self):
       return self._recursive_repr(self.root_node, 0)
 
-   def __del__(self):
-      self.logger.info(f"Deleted template: {self.name}")
-
    def _recursive_repr(self, node, indent_level):
       indent = '  ' * indent_level
       node_repr = f"{indent}{repr(node)}\n"
 
-      for child in node.children:
+      for child in node.iter_children():
          node_repr += self._recursive_repr(child, indent_level + 1)
 
       return node_repr
@@ -58,110 +63,157 @@ class Template:
 
    def get_structure(self):
       print(self)
+
+   def diff(self, other, compare_tags=True):
+      """
+      Return the TemplateDiff from this template to another template or node tree.
+      """
+      return diff(self, other, compare_tags)
+
+   def detect_drift(self, directory_path, max_workers=None):
+      """
+      Compare the template with a directory tree, ignoring tags.
+
+      Returns:
+         TemplateDiff: Template nodes missing on disk are listed as removed, entries on
+            disk that are not in the template as added.
+      """
+      self.logger.log(TRACE, "Entering detect_drift with args: arg1=%s", directory_path)
+      scanned = Template(None, self.name)
+      scanned.build_from_directory(directory_path, max_workers=max_workers)
+      result = diff(self, scanned, compare_tags=False)
+      self.logger.log(TRACE, "Exiting detect_drift with result: %s", result)
+      return result
+
+   def deduplicate(self, min_nodes=2):
+      """
+      Share repeated folder contents so that memory scales with the unique structure.
+
+      Folders with identical contents release their child nodes and defer to one shared
+      copy of the data. Saving, executing and syncing read the shared data without
+      building nodes. A folder only builds its own nodes again when its children are
+      accessed through Node.children, so edits stay local to it. Returns the number of
+      nodes released.
+      """
+      self.logger.log(TRACE, "Entering deduplicate with args: arg1=%s", min_nodes)
+      released = share_subtrees(self.root_node, min_nodes)
+      self.logger.log(TRACE, "Exiting deduplicate with result: %s", released)
+      return released
       
-   def execute(self, base_dir):
-      # Update the root node path with the provided base directory
+   def execute(self, base_dir, max_workers=None, progress=None):
+      """
+      Create the directory structure of the template under the given base directory.
+
+      Folders are created level by level and files are created once all folders exist,
+      using up to max_workers threads. The created nodes are reported to progress, if given.
+
+      Returns:
+         ExecutionReport: The per-node results of the execution.
+      """
+      # Point the root node at the base directory. Child paths are relative to it, so
+      # nothing else in the tree needs updating.
       self.root_node.path = base_dir
 
-      # Recursively update the paths of all child nodes
-      self._update_node_paths(self.root_node)
+      # Create the directory structure and files, parents before children
+      executor = TemplateExecutor(max_workers, self.file_operations)
+      return executor.execute(self.root_node, base_dir, progress)
 
-      # Perform topological sort on the nodes
-      sorted_nodes = self.topological_sort(self.root_node)
+   def plan_sync(self, base_dir, max_workers=None, progress=None):
+      """
+      Compare the template with the directory tree under base_dir without modifying anything.
 
-      # Recursively create the directory structure and files
-      for node in sorted_nodes:
-         self._create_structure(node)
-      
-   def _update_node_paths(self, node):
-      self.logger.info(f"Entering _update_node_paths with args: arg1={node}")
-      # Update the node's path based on its parent's path
-      if node.parent:
-         node.path = os.path.join(node.parent.path, node.name)
-
-      # Recursively update the paths of child nodes
-      for child in node.children:
-         self._update_node_paths(child)
-      self.logger.info(f"Exiting _update_node_paths.")
-         
-   def topological_sort(self, root_node):
+      Returns:
+         SyncPlan: The missing, extra and conflicting entries.
       """
-      Perform a topological sort on the nodes of the template.
+      return TemplateSync(max_workers, self.file_operations).plan(self.root_node, base_dir, progress)
+
+   def sync(self, base_dir, dry_run=False, max_workers=None, progress=None):
       """
-      in_degree = defaultdict(int)
-      graph = defaultdict(list)
-      sorted_nodes = []
+      Create only the entries of the template that are missing under base_dir.
 
-      # Calculate the in-degree of each node
-      def calculate_in_degree(node):
-         for child in node.children:
-               in_degree[child] += 1
-               graph[node].append(child)
-               calculate_in_degree(child)
-
-      calculate_in_degree(root_node)
-
-      # Perform topological sort
-      queue = [node for node in in_degree if in_degree[node] == 0]
-      while queue:
-         node = queue.pop(0)
-         sorted_nodes.append(node)
-         for neighbor in graph[node]:
-               in_degree[neighbor] -= 1
-               if in_degree[neighbor] == 0:
-                  queue.append(neighbor)
-
-      return sorted_nodes
+      Existing files are never truncated, and extra or conflicting entries are left alone.
+      With dry_run, the plan is computed but nothing is written.
+
+      Returns:
+         tuple: The SyncPlan and the ExecutionReport of the applied changes, or None for a dry run.
+      """
+      sync = TemplateSync(max_workers, self.file_operations)
+      plan = sync.plan(self.root_node, base_dir, progress)
+      if dry_run:
+         return plan, None
+      self.root_node.path = base_dir
+      return plan, sync.apply(plan, progress)
       
-   def _create_structure(self, node):
-      self.logger.info(f"Entering _create_structure with args: arg1={node}")
-      node_path = node.path
+   def topological_sort(self, root_node):
+      """
+      Perform a topological sort on the nodes of the template.
 
-      if node.type == 'folder':
-         self.file_operations.create_directory(node_path)
-      else:
-         # Create the file
-         self.file_operations.create_file(node_path)
-      self.logger.info(f"Exiting _create_structure.")
+      Returns the nodes in breadth-first order, parents before children, root node included.
+      Lazily loaded and shared subtrees are built, so the nodes can be edited.
+      """
+      return topological_sort(root_node)
 
-   def build_from_directory(self, directory_path):
+   def build_from_directory(self, directory_path, include=None, exclude=None, max_depth=None, follow_symlinks=False, max_workers=None, progress=None):
+      """
+      Build the template structure from an existing directory.
+
+      Args:
+         directory_path (str): The directory to scan.
+         include (list): Glob patterns a file must match to be imported.
+         exclude (list): Glob patterns for files and folders to skip, e.g. ['node_modules', '.git'].
+            Excluded folders are not scanned at all.
+         max_depth (int): The maximum depth of imported nodes. None imports the whole tree.
+         follow_symlinks (bool): Whether to descend into symlinked folders.
+         max_workers (int): The number of threads used to scan subdirectories.
+         progress (Progress): Receives the number of imported entries, and can cancel the scan.
+      """
       if self.root_node is None:
          # Create the root node
          root_name = os.path.basename(directory_path)
          self.root_node = Node(root_name, directory_path, 'folder', tags=["generated"])
          self.logger.info(f"No root node specified. Creating a root node with name: {self.root_node.name}")
 
-      # Recursively build the template structure
-      self._build_nodes(directory_path, self.root_node)
-
-   def _build_nodes(self, directory_path, parent_node):
-      # Iterate over the contents of the directory
-      for item in os.listdir(directory_path):
-         item_path = os.path.join(directory_path, item)
-
-         # Create a Node instance for the current item
-         if os.path.isdir(item_path):
-            node_type = 'folder'
-         else:
-            node_type = 'file'
-         node = Node(item, item_path, node_type, tags=["generated"])
-
-         # Add the node to the parent node
-         parent_node.add_child(node)
-         self.logger.info(f"Added node '{node.name}' to '{parent_node.name}'")
-
-         # If the current item is a directory, recursively build its children
-         if node_type == 'folder':
-            self._build_nodes(item_path, node)
+      scanner = DirectoryScanner(include, exclude, max_depth, follow_symlinks, max_workers)
+      self._build_nodes(directory_path, self.root_node, scanner, progress)
+
+   def _build_nodes(self, directory_path, parent_node, scanner, progress=None):
+      # Map each scanned directory to the node its entries are added to
+      parent_nodes = {directory_path: parent_node}
+      node_count = 0
+      if progress is not None:
+         progress.start(None, "entries")
+
+      for scanned_path, entries in scanner.scan(directory_path):
+         parent_node = parent_nodes.pop(scanned_path)
+         if not entries:
+            continue
+
+         # Build the whole batch of siblings without per-node validation and logging
+         validate_names([entry.name for entry in entries])
+         nodes = [Node.from_trusted(entry.name, entry.path, 'folder' if entry.is_dir else 'file', ["generated"]) for entry in entries]
+         parent_node.add_children(nodes)
+         node_count += len(nodes)
+         if progress is not None:
+            progress.advance(len(nodes))
+
+         for entry, node in zip(entries, nodes):
+            if entry.descend:
+               parent_nodes[entry.path] = node
+
+      self.logger.info(f"Added {node_count} nodes from '{directory_path}' to '{self.root_node.name}'")
                
    def get_root_node(self):
-      self.logger.info(f"Entering get_root_node")
-      self.logger.info(f"Exiting get_root_node with result: {self.root_node}")
+      self.logger.log(TRACE, "Entering get_root_node")
+      self.logger.log(TRACE, "Exiting get_root_node with result: %s", self.root_node)
       return self.root_node
 
    def add_node(self, parent_node, new_node):
-      self.logger.info(f"Entering add_node with args: arg1={parent_node}, arg2={new_node}")
+      self.logger.log(TRACE, "Entering add_node with args: arg1=%s, arg2=%s", parent_node, new_node)
       # Add a new node to the template
+      if new_node is self.root_node:
+         # The root node is already part of the template and cannot be its own child
+         self.logger.info(f"Node '{new_node.name}' is already the root node")
+         return
       if parent_node is None:
          # If no parent node is specified, set the new node as the root node
          # if the template doesn't have a root node yet
@@ -169,6 +221,7 @@ class Template:
             new_node.set_root_status(True)
             self.root_node = new_node
             self.logger.info(f"Set '{new_node.name}' as the root node")
+            return
          else:
             # Otherwise, add the new node as a child of the root node
             parent_node = self.root_node
@@ -182,24 +235,26 @@ class Template:
 
       parent_node.add_child(new_node)
       self.logger.info(f"Added node '{new_node.name}' to '{parent_node.name}'")
-      self.logger.info(f"Exiting add_node.")
+      self.logger.log(TRACE, "Exiting add_node.")
 
    def find_parent_node(self, node):
-      self.logger.info(f"Entering find_parent_node with args: arg1={node}")
-      # Helper function to find the parent node of a given node
-      def traverse(current_node):
-         if current_node.children:
-            for child in current_node.children:
-               if child == node:
-                  return current_node
-               else:
-                  parent = traverse(child)
-                  if parent:
-                     return parent
-         self.logger.info(f"Exiting find_parent_node with result: None")
-         return None
-
-      return traverse(self.root_node)
+      self.logger.log(TRACE, "Entering find_parent_node with args: arg1=%s", node)
+      # Nodes keep a reference to their parent, so no search is needed
+      parent = node.parent
+      self.logger.log(TRACE, "Exiting find_parent_node with result: %s", parent.name if parent else None)
+      return parent
+
+   def remove_node(self, node):
+      self.logger.log(TRACE, "Entering remove_node with args: arg1=%s", node)
+      if node is self.root_node:
+         raise ValueError("Cannot remove the root node of a template")
+      parent = node.parent
+      if parent is None:
+         self.logger.warning(f"Node '{node.name}' is not attached to the template")
+      else:
+         parent.remove_child(node)
+         self.logger.info(f"Removed node '{node.name}' from '{parent.name}'")
+      self.logger.log(TRACE, "Exiting remove_node.")
 
    def traverse(self, callback):
       # Traverse the template and call the callback function for each node
@@ -211,8 +266,8 @@ class Template:
       traverse_nodes(self.root_node)
 
    def set_name(self, name):
-      self.logger.info(f"Entering set_name with args: arg1={name}")
+      self.logger.log(TRACE, "Entering set_name with args: arg1=%s", name)
       old_name = self.name
       self.name = name
       self.logger.info(f"Renamed template from '{old_name}' to '{name}'")
-      self.logger.info(f"Exiting set_name.")
\ No newline at end of file
+      self.logger.log(TRACE, "Exiting set_name.")
\ No newline at end of file
@@ -0,0 +1,123 @@
+import logging
+from operator import attrgetter
+
+from utils.logger import TRACE
+
+class TemplateDiff:
+   """
+   The differences between two node trees, a and b.
+
+   Attributes:
+      added (list): Nodes of b that have no counterpart in a. Only the top of each added
+         subtree is listed.
+      removed (list): Nodes of a that have no counterpart in b, again as subtree tops.
+      renamed (list): (node_a, node_b) pairs of sibling folders with different names but
+         the same tags and the same, non-empty, contents.
+      retyped (list): (node_a, node_b) pairs of matching nodes whose type changed.
+      retagged (list): (node_a, node_b) pairs of matching nodes whose tags changed.
+   """
+
+   def __init__(self):
+      self.added = []
+      self.removed = []
+      self.renamed = []
+      self.retyped = []
+      self.retagged = []
+
+   def __repr__(self):
+      return f"TemplateDiff(Added: {len(self.added)}, Removed: {len(self.removed)}, Renamed: {len(self.renamed)}, Retyped: {len(self.retyped)}, Retagged: {len(self.retagged)})"
+
+   def is_empty(self):
+      return not (self.added or self.removed or self.renamed or self.retyped or self.retagged)
+
+   def describe(self):
+      """
+      Return a human readable list of the differences, with paths relative to the root nodes.
+      """
+      lines = [f"Added {node.type}: {node.relative_path}" for node in self.added]
+      lines.extend(f"Removed {node.type}: {node.relative_path}" for node in self.removed)
+      lines.extend(f"Renamed: {node_a.relative_path} -> {node_b.relative_path}" for node_a, node_b in self.renamed)
+      lines.extend(f"Retyped: {node_b.relative_path} ({node_a.type} -> {node_b.type})" for node_a, node_b in self.retyped)
+      lines.extend(
+         f"Retagged: {node_b.relative_path} ({', '.join(node_a.tags) or '-'} -> {', '.join(node_b.tags) or '-'})"
+         for node_a, node_b in self.retagged
+      )
+      return lines
+
+def diff(a, b, compare_tags=True):
+   """
+   Compare two templates, or two node trees, and return a TemplateDiff.
+
+   The root nodes are always compared with each other, whatever their names. Below them,
+   nodes are matched by name among their siblings. Matching subtrees with equal
+   structural hashes are skipped without being visited, so the cost follows the size of
+   the changes, not of the trees, and lazily loaded subtrees are read without being
+   built. Unmatched sibling folders with the same tags and the same non-empty contents
+   are reported as renamed; files carry no contents to match, so they are only ever
+   removed or added. With compare_tags=False, tag changes are ignored and subtrees are
+   compared by their shape_hash instead, e.g. to compare a template with a tree scanned
+   by Template.build_from_directory.
+   """
+   logger = logging.getLogger(__name__)
+   root_a = getattr(a, 'root_node', a)
+   root_b = getattr(b, 'root_node', b)
+   logger.log(TRACE, "Entering diff with args: arg1=%s, arg2=%s, arg3=%s", root_a.name, root_b.name, compare_tags)
+   result = TemplateDiff()
+
+   subtree_hash = attrgetter('structural_hash' if compare_tags else 'shape_hash')
+
+   def rename_key(node):
+      # Only folders with contents can be recognized under another name
+      if node.type != 'folder' or not node.has_children():
+         return None
+      return (node.tags if compare_tags else None, node.get_content_hash(compare_tags))
+
+   stack = [(root_a, root_b)]
+   while stack:
+      node_a, node_b = stack.pop()
+      if node_a.type != node_b.type:
+         result.retyped.append((node_a, node_b))
+      if compare_tags and node_a.tags != node_b.tags:
+         result.retagged.append((node_a, node_b))
+      if node_a.get_content_hash(compare_tags) == node_b.get_content_hash(compare_tags):
+         continue
+
+      # Read the children without building lazily loaded ones, so shared contents stay shared
+      children_b = {child_b.name: child_b for child_b in node_b.iter_children()}
+      pairs = []
+      removed = []
+      for child_a in node_a.iter_children():
+         child_b = children_b.pop(child_a.name, None)
+         if child_b is None:
+            removed.append(child_a)
+         elif subtree_hash(child_a) != subtree_hash(child_b):
+            pairs.append((child_a, child_b))
+      added = list(children_b.values())
+
+      # Pair up removed and added folders that only differ by name
+      if removed and added:
+         candidates = {}
+         for child_b in added:
+            key = rename_key(child_b)
+            if key is not None:
+               candidates.setdefault(key, []).append(child_b)
+         unmatched = []
+         renamed = set()
+         for child_a in removed:
+            key = rename_key(child_a)
+            matches = candidates.get(key) if key is not None else None
+            if matches:
+               child_b = matches.pop(0)
+               result.renamed.append((child_a, child_b))
+               renamed.add(child_b)
+            else:
+               unmatched.append(child_a)
+         removed = unmatched
+         added = [child_b for child_b in added if child_b not in renamed]
+
+      result.removed.extend(removed)
+      result.added.extend(added)
+      stack.extend(reversed(pairs))
+
+   logger.log(TRACE, "Exiting diff with result: %s", result)
+   return result
@@ -0,0 +1,47 @@
+from collections import deque
+
+def iter_nodes(root_node):
+   """
+   Yield every node of a tree in breadth-first order, starting with the root node.
+
+   A node tree is already a DAG, so a plain breadth-first walk is a valid topological
+   order: every parent is yielded before any of its children. The walk is iterative
+   and linear in the number of nodes. Children are read with Node.iter_children, so
+   lazily loaded and shared contents are not built for good.
+
+   The walk is a read-only view: nodes below an unbuilt folder are built for the walk
+   only, and edits to them are lost. Use topological_sort, or call
+   Node.materialize_subtree first, to get nodes that can be edited.
+   """
+   queue = deque([root_node])
+   while queue:
+      node = queue.popleft()
+      yield node
+      queue.extend(node.iter_children())
+
+def iter_levels(*root_nodes):
+   """
+   Yield the nodes of one or more trees grouped by depth level.
+
+   The first batch holds the given root nodes, the second batch holds their children,
+   and so on. Every node in a batch has its parent in the previous batch, so consumers
+   can process a whole batch at once once the previous one is done. Like iter_nodes,
+   this is a read-only view of the tree.
+   """
+   level = list(root_nodes)
+   while level:
+      yield level
+      next_level = []
+      for node in level:
+         next_level.extend(node.iter_children())
+      level = next_level
+
+def topological_sort(root_node):
+   """
+   Return the nodes of a tree as a list, parents before children, root node included.
+
+   Lazily loaded subtrees are built first, so the nodes are the ones held by the tree
+   and edits to them are kept.
+   """
+   root_node.materialize_subtree()
+   return list(iter_nodes(root_node))
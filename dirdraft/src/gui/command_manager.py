@@ -2,11 +2,13 @@ import logging
 from utils.singleton import Singleton
 
 from gui.ui_commands import AddNodeCommand, RemoveNodeCommand, MoveNodeCommand, RenameNodeCommand
-from PyQt5.QtWidgets import QTreeWidgetItem
 
 class CommandManager(metaclass=Singleton):
    """ 
    Singleton class to manage commands. It maintains a stack of commands that can be undone and redone.
+
+   After a command has changed the template, the tree widget is told which nodes were
+   added, removed, changed or moved, so that it only updates the affected rows.
    """
    
    def __init__(self, tree_widget, template_design_page):
@@ -31,28 +33,29 @@ class CommandManager(metaclass=Singleton):
          template.add_node(command.parent_node, command.new_node)
          if command.parent_node is None:
                self.logger.info(f"Added node '{command.new_node.name}' to root")
-               self.template_design_page.summary_text.append(f"Added node '{command.new_node.name}' to root")
+               self.template_design_page.summary_log.log(f"Added node '{command.new_node.name}' to root", "nodes added")
          else:
                self.logger.info(f"Added node '{command.new_node.name}' to '{command.parent_node.name}'")
-               self.template_design_page.summary_text.append(f"Added node '{command.new_node.name}' to '{command.parent_node.name}'")
-         self.update_tree_widget_item(command)
+               self.template_design_page.summary_log.log(f"Added node '{command.new_node.name}' to '{command.parent_node.name}'", "nodes added")
+         self.tree_widget.node_added(command.parent_node, command.new_node)
       elif isinstance(command, RemoveNodeCommand):
          template.remove_node(command.node)
          self.logger.info(f"Removed node '{command.node.name}'")
-         self.template_design_page.summary_text.append(f"Removed node '{command.node.name}'")
-         self.update_tree_widget_item(command)
+         self.template_design_page.summary_log.log(f"Removed node '{command.node.name}'", "nodes removed")
+         self.tree_widget.node_removed(command.parent_node, command.node)
       elif isinstance(command, RenameNodeCommand):
          command.node.rename(command.new_name)
          self.logger.info(f"Renamed node from '{command.node.name}' to '{command.new_name}'")
-         self.template_design_page.summary_text.append(f"Renamed node from '{command.node.name}' to '{command.new_name}'")
-         self.update_tree_widget_item(command)
+         self.template_design_page.summary_log.log(f"Renamed node from '{command.node.name}' to '{command.new_name}'", "nodes renamed")
+         self.tree_widget.node_changed(command.node)
       elif isinstance(command, MoveNodeCommand):
-         old_parent_node = self.template.find_parent_node(command.node)
+         old_parent_node = template.find_parent_node(command.node)
          old_parent_node.remove_child(command.node)
          command.new_parent_node.add_child(command.node)
          self.logger.info(f"Moved node '{command.node.name}' from '{old_parent_node.name}' to '{command.new_parent_node.name}'")
-         self.template_design_page.summary_text.append(f"Moved node '{command.node.name}' from '{old_parent_node.name}' to '{command.new_parent_node.name}'")
-         self.update_tree_widget_item(command)
+         self.template_design_page.summary_log.log(f"Moved node '{command.node.name}' from '{old_parent_node.name}' to '{command.new_parent_node.name}'", "nodes moved")
+         self.tree_widget.node_moved(command.node, old_parent_node, command.new_parent_node)
+      self.template_design_page.refresh_unsaved_changes()
 
    def undo(self):
       if self.command_stack:
@@ -65,11 +68,15 @@ class CommandManager(metaclass=Singleton):
    def undo_command(self, command):
       template = self.template_design_page.template
       if isinstance(command, AddNodeCommand):
+         parent_node = command.new_node.parent
          template.remove_node(command.new_node)
+         self.tree_widget.node_removed(parent_node, command.new_node)
          self.logger.info(f"Undid adding node '{command.new_node.name}'")
       elif isinstance(command, RemoveNodeCommand):
          template.add_node(command.parent_node, command.node)
+         self.tree_widget.node_added(command.parent_node, command.node)
          self.logger.info(f"Undid removing node '{command.node.name}'")
+      self.template_design_page.refresh_unsaved_changes()
 
    def redo(self):
       if self.command_stack:
@@ -77,61 +84,3 @@ class CommandManager(metaclass=Singleton):
          self.execute_command(command)
       else:
          self.logger.info("Command stack is empty. Nothing to redo.")
-
-   def update_tree_widget(self, command):
-      # Update the QTreeWidget based on the command
-      if isinstance(command, AddNodeCommand):
-         self.update_add_node(command.parent_node, command.new_node)
-      elif isinstance(command, RemoveNodeCommand):
-         self.update_remove_node(command.node)
-      elif isinstance(command, MoveNodeCommand):
-         self.update_move_node(command.node, command.new_parent_node)
-         
-   def update_tree_widget_item(self, command):
-      if isinstance(command, AddNodeCommand):
-         parent_item = self.tree_widget.find_item_by_node(command.parent_node)
-         new_item = self.tree_widget.find_or_create_item(command.new_node, parent_item)
-      elif isinstance(command, RemoveNodeCommand):
-         item = self.tree_widget.find_item_by_node(command.node)
-         if item:
-            parent = item.parent()
-            if parent:
-               parent.removeChild(item)
-            else:
-               self.tree_widget.takeTopLevelItem(self.tree_widget.indexOfTopLevelItem(item))
-      elif isinstance(command, RenameNodeCommand):
-         item = self.tree_widget.find_item_by_node(command.node)
-         if item:
-            item.setText(0, command.new_name)
-      elif isinstance(command, MoveNodeCommand):
-         node = command.node
-         new_parent_item = self.tree_widget.find_item_by_node(command.new_parent_node)
-         item = self.tree_widget.find_item_by_node(node)
-         if item and new_parent_item:
-            old_parent = item.parent()
-            if old_parent:
-               old_parent.removeChild(item)
-            new_parent_item.addChild(item)
-
-   def update_add_node(self, parent_node, new_node):
-      parent_item = self.tree_widget.find_item_by_node(parent_node)
-      if parent_item:
-         new_item = self.tree_widget.create_item(new_node, parent_item)
-
-   def update_remove_node(self, node):
-      item = self.tree_widget.find_item_by_node(node)
-      if item:
-         parent = item.parent()
-         if parent:
-            parent.removeChild(item)
-         else:
-            self.tree_widget.takeTopLevelItem(self.tree_widget.indexOfTopLevelItem(item))
-
-   def update_move_node(self, node, new_parent_node):
-      item = self.tree_widget.find_item_by_node(node)
-      new_parent_item = self.tree_widget.find_item_by_node(new_parent_node)
-      if item and new_parent_item:
-         old_parent = item.parent()
-         if old_parent:
-            old_parent.removeChild(item)
-         new_parent_item.addChild(item)
\ No newline at end of file
@@ -1,5 +1,4 @@
 from PyQt5.QtWidgets import QMainWindow, QPushButton, QVBoxLayout, QWidget, QStackedWidget
-from gui.template_design_page import TemplateDesignPage
 
 import logging
 
@@ -27,12 +26,10 @@ class MainWindow(QMainWindow):
       self.stacked_widget = QStackedWidget()
       layout.addWidget(self.stacked_widget)
 
-      # Create an instance of TemplateDesignPage
-      self.template_design_page = TemplateDesignPage(self)
+      # The TemplateDesignPage and the modules behind it are only loaded when it is first shown
+      self.template_design_page = None
 
-      # Add the template design page to the stacked widget
       self.stacked_widget.addWidget(self.get_started_button)
-      self.stacked_widget.addWidget(self.template_design_page)
       
       # Hide the TemplateDesignPage widget on boot
       #self.template_design_page.hide()
@@ -42,5 +39,9 @@ class MainWindow(QMainWindow):
       # Show the TemplateDesignPage
       # TODO: adjust logic here so that user can back out of template design page
       self.logger.info("Showing Template Design Page")
+      if self.template_design_page is None:
+         from gui.template_design_page import TemplateDesignPage
+         self.template_design_page = TemplateDesignPage(self)
+         self.stacked_widget.addWidget(self.template_design_page)
       self.stacked_widget.setCurrentWidget(self.template_design_page)
       self.template_design_page.prompt_directory_selection()
\ No newline at end of file
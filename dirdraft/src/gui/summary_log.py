@@ -0,0 +1,156 @@
+from collections import Counter, deque
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QLabel, QPushButton, QFileDialog
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QTextCursor
+
+import logging
+from utils.logger import TRACE
+
+class SummaryLog(QWidget):
+   """
+   Summary panel of the TemplateDesignPage, showing what the last operations did.
+
+   Appending a line to a QTextEdit lays the document out again, so logging one message per
+   node made the panel the bottleneck when executing a large template. Messages are
+   buffered instead and flushed every FLUSH_INTERVAL_MS milliseconds in a single insert.
+   Within a flush, at most COALESCE_LIMIT messages of a category are shown, the others are
+   replaced by one line saying how many were left out.
+
+   Every message is kept in a ring buffer of the most recent max_entries messages, which
+   export writes to a file, and counted per category for the totals shown under the panel.
+   Messages must be logged from the GUI thread.
+
+   Attributes:
+      entries (deque): The most recent messages.
+      dropped_entries (int): The number of messages pushed out of the ring buffer.
+      counters (Counter): The number of messages per category, such as 'nodes added'.
+   """
+
+   FLUSH_INTERVAL_MS = 100
+   COALESCE_LIMIT = 50
+   MAX_ENTRIES = 100000
+   # Lines kept in the panel itself, older lines are removed from the top
+   MAX_PANEL_LINES = 5000
+
+   def __init__(self, parent=None, max_entries=MAX_ENTRIES):
+      super().__init__(parent)
+      self.logger = logging.getLogger(__name__)
+      self.entries = deque(maxlen=max_entries)
+      self.dropped_entries = 0
+      self.counters = Counter()
+      self._pending = []  # (message, category) pairs not shown yet
+
+      layout = QVBoxLayout(self)
+      layout.setContentsMargins(0, 0, 0, 0)
+      self.text_edit = QTextEdit()
+      self.text_edit.setReadOnly(True)
+      self.text_edit.document().setMaximumBlockCount(self.MAX_PANEL_LINES)
+      layout.addWidget(self.text_edit)
+
+      footer_layout = QHBoxLayout()
+      layout.addLayout(footer_layout)
+      self.counters_label = QLabel()
+      self.counters_label.setWordWrap(True)
+      self.export_button = QPushButton("Export Log")
+      footer_layout.addWidget(self.counters_label, 1)
+      footer_layout.addWidget(self.export_button)
+      self.export_button.clicked.connect(self.export_with_dialog)
+
+      self.flush_timer = QTimer(self)
+      self.flush_timer.setSingleShot(True)
+      self.flush_timer.setInterval(self.FLUSH_INTERVAL_MS)
+      self.flush_timer.timeout.connect(self.flush)
+
+   def log(self, message, category=None):
+      """
+      Queue a message for the panel, counting it under category, if given.
+      """
+      if len(self.entries) == self.entries.maxlen:
+         self.dropped_entries += 1
+      self.entries.append(message)
+      if category is not None:
+         self.counters[category] += 1
+      self._pending.append((message, category))
+      if not self.flush_timer.isActive():
+         self.flush_timer.start()
+
+   def add_count(self, category, count):
+      """
+      Add to the total of a category without logging a message for each unit.
+      """
+      self.counters[category] += count
+      if not self.flush_timer.isActive():
+         self.flush_timer.start()
+
+   def flush(self):
+      """
+      Show the queued messages and the totals now.
+      """
+      self.flush_timer.stop()
+      if self._pending:
+         lines = []
+         shown = Counter()
+         left_out = Counter()
+         for message, category in self._pending:
+            if category is not None and shown[category] >= self.COALESCE_LIMIT:
+               left_out[category] += 1
+               continue
+            shown[category] += 1
+            lines.append(message)
+         for category, count in left_out.items():
+            lines.append(f"... and {count:,} more {category}")
+         self.logger.log(TRACE, "Flushing %s summary messages as %s lines", len(self._pending), len(lines))
+         self._pending = []
+
+         cursor = QTextCursor(self.text_edit.document())
+         cursor.movePosition(QTextCursor.End)
+         if not self.text_edit.document().isEmpty():
+            cursor.insertBlock()
+         cursor.insertText("\n".join(lines))
+         self.text_edit.verticalScrollBar().setValue(self.text_edit.verticalScrollBar().maximum())
+      self.counters_label.setText(self.format_counters())
+
+   def format_counters(self):
+      return ", ".join(f"{count:,} {category}" for category, count in self.counters.items())
+
+   def clear(self):
+      self.logger.log(TRACE, "Entering clear")
+      self.flush_timer.stop()
+      self._pending = []
+      self.entries.clear()
+      self.dropped_entries = 0
+      self.counters.clear()
+      self.text_edit.clear()
+      self.counters_label.clear()
+
+   def to_plain_text(self):
+      """
+      Return the text shown in the panel, including the queued messages.
+      """
+      self.flush()
+      return self.text_edit.toPlainText()
+
+   def export(self, file_path):
+      """
+      Write the totals and every message in the ring buffer to a file.
+      """
+      self.logger.log(TRACE, "Entering export with args: arg1=%s", file_path)
+      with open(file_path, 'w', encoding='utf-8') as file:
+         for category, count in self.counters.items():
+            file.write(f"{count:,} {category}\n")
+         if self.counters:
+            file.write("\n")
+         if self.dropped_entries:
+            file.write(f"({self.dropped_entries:,} earlier messages were dropped)\n")
+         for message in self.entries:
+            file.write(f"{message}\n")
+      self.logger.info(f"Exported {len(self.entries)} summary messages to {file_path}")
+
+   def export_with_dialog(self):
+      file_path, _ = QFileDialog.getSaveFileName(self, "Export Log", "summary.log", "Log Files (*.log *.txt)")
+      if file_path:
+         try:
+            self.export(file_path)
+         except OSError as e:
+            self.logger.error(f"Error exporting the summary log to {file_path}: {e}")
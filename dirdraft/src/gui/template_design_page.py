@@ -1,19 +1,22 @@
 import os
-import shutil
 import logging
 
-from PyQt5.QtWidgets import QLabel, QCheckBox, QListWidget, QListWidgetItem, QAbstractItemView, QDialogButtonBox, QDialog, QMessageBox, QUndoCommand, QUndoStack, QWidget, QVBoxLayout, QTreeWidget, QTreeWidgetItem, QInputDialog, QLineEdit, QFileDialog, QMenu, QPushButton, QHBoxLayout, QTextEdit
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QLabel, QCheckBox, QListWidget, QListWidgetItem, QAbstractItemView, QDialogButtonBox, QDialog, QMessageBox, QUndoCommand, QUndoStack, QWidget, QVBoxLayout, QInputDialog, QLineEdit, QFileDialog, QMenu, QPushButton, QHBoxLayout, QProgressBar
+from PyQt5.QtCore import Qt, QThreadPool
 from PyQt5.QtGui import QDrag, QColor
-from collections import defaultdict
 
 from core.node import Node
 from core.template import Template
+from core.sync import TemplateSync
 from gui.command_manager import CommandManager
 from gui.ui_commands import AddNodeCommand, RemoveNodeCommand, RenameNodeCommand, DeleteFileCommand, MoveNodeCommand
-from gui.custom_tree_widget import CustomTreeWidget, CustomTreeWidgetItem
+from gui.template_tree_view import TemplateTreeView
+from gui.workers import Worker
+from gui.summary_log import SummaryLog
 from utils.template_utils import TemplateManager
+from utils.binary_format import BINARY_EXTENSION
 from utils.styles import FOLDER_STYLE, FILE_STYLE, GENERATED_STYLE, TAG_STYLES
+from utils.logger import TRACE
 
 PREDEFINED_TAGS = [
    "image", "text", "video", "audio", "document", "code",
@@ -55,20 +58,31 @@ class TemplateDesignPage(QWidget):
       button_layout.addWidget(self.stylized_checkbox)
       button_layout.addWidget(self.unsaved_changes_indicator)
 
-      # Create a QTreeWidget to display the template structure
-      self.tree_widget = CustomTreeWidget(self)
+      # Create a tree view to display the template structure, rows are fetched as they are shown
+      self.tree_widget = TemplateTreeView(self)
       self.tree_widget.setContextMenuPolicy(Qt.CustomContextMenu)
       self.tree_widget.customContextMenuRequested.connect(self.show_context_menu)
       main_layout.addWidget(self.tree_widget)
 
-      # Create a QTextEdit to display the execution summary
-      self.summary_text = QTextEdit()
-      self.summary_text.setReadOnly(True)
-      main_layout.addWidget(self.summary_text)
+      # Progress of the operation running in the background, hidden while idle
+      progress_layout = QHBoxLayout()
+      main_layout.addLayout(progress_layout)
+      self.progress_label = QLabel()
+      self.progress_bar = QProgressBar()
+      self.progress_bar.setRange(0, 1000)
+      self.progress_bar.setTextVisible(False)
+      self.cancel_button = QPushButton("Cancel")
+      progress_layout.addWidget(self.progress_label)
+      progress_layout.addWidget(self.progress_bar)
+      progress_layout.addWidget(self.cancel_button)
+      self.set_progress_visible(False)
+
+      # Create a panel to display the execution summary, messages are shown in batches
+      self.summary_log = SummaryLog(self)
+      main_layout.addWidget(self.summary_log)
 
       # Set up signals and slots
-      self.tree_widget.itemDoubleClicked.connect(self.on_item_double_clicked)
-      self.tree_widget.itemExpanded.connect(self.load_children)
+      self.tree_widget.doubleClicked.connect(self.on_item_double_clicked)
       self.new_template_button.clicked.connect(self.create_new_template)
       self.load_template_button.clicked.connect(self.load_templates)
       self.save_template_button.clicked.connect(self.save_current_template)
@@ -76,28 +90,36 @@ class TemplateDesignPage(QWidget):
       self.undo_button.clicked.connect(self.undo_action)
       self.redo_button.clicked.connect(self.redo_action)
       self.stylized_checkbox.stateChanged.connect(self.toggle_display_mode)
+      self.cancel_button.clicked.connect(self.cancel_background_task)
 
       # Initialization
       self.parent_dir = None
       self.template = None
       self.observer = CommandManager(self.tree_widget, self)
       self.template_manager = TemplateManager()
-      self.current_template_index = None
+      self.current_template_key = None
       self.undo_stack = QUndoStack()
-      self.tree_widget.model().dataChanged.connect(self.track_changes)
+      self.tree_widget.tree_model.nodes_edited.connect(self.track_changes)
       self.deleted_nodes = []
       self.unsaved_changes = False
+      self.saved_state = None
       self.stylized_checkbox.setChecked(False)
+
+      # Loading, saving and executing run on the thread pool, one operation at a time
+      self.thread_pool = QThreadPool.globalInstance()
+      self.worker = None
+      self.worker_description = None
+      self.worker_callback = None
       
       self.logger.info("Template design page initialized")
       
-   def track_changes(self, top_left, bottom_right, roles):
-      self.logger.info(f"Entering track_changes with args: {top_left}, {bottom_right}, {roles}")
-      # Create a QUndoCommand to track the changes made to the QTreeWidget
+   def track_changes(self):
+      self.logger.log(TRACE, "Entering track_changes")
+      # Create a QUndoCommand to track the changes made to the template tree
       command = QUndoCommand()
-      command.setText(f"Edit item at ({top_left.row()}, {top_left.column()})")
+      command.setText("Edit template")
       self.undo_stack.push(command)
-      self.logger.info(f"Exiting track_changes with result: {command}")
+      self.logger.log(TRACE, "Exiting track_changes with result: %s", command)
 
    def prompt_directory_selection(self):
       # Prompt the user to select a directory
@@ -107,37 +129,40 @@ class TemplateDesignPage(QWidget):
          # Check if there are any existing templates
          templates_dir = os.path.join(self.parent_dir, "templates")
          if os.path.exists(templates_dir):
-            json_files = [f for f in os.listdir(templates_dir) if f.endswith(".json")]
-            if json_files:
-               # If there are existing templates, prompt the user to load one or create a new one
-               message_box = QMessageBox(self)
-               message_box.setWindowTitle("Template Selection")
-               message_box.setText("What would you like to do?")
-               load_button = message_box.addButton("Load Existing Template", QMessageBox.ActionRole)
-               new_button = message_box.addButton("Create New Template", QMessageBox.ActionRole)
-               message_box.exec_()
-
-               if message_box.clickedButton() == load_button:
-                  self.load_templates()
-               elif message_box.clickedButton() == new_button:
-                  self.create_new_template()
-            else:
-               # If there are no existing templates, prompt the user to create a new one
-               self.create_new_template()
+            # Refreshing the catalog reads new and changed templates, so it runs in the background
+            self.run_in_background("Indexing templates", self.template_manager.get_catalog, templates_dir,
+                                   on_finished=self.prompt_template_choice)
          else:
             # If the templates directory doesn't exist, create it and prompt the user to create a new template
             os.makedirs(templates_dir, exist_ok=True)
             self.create_new_template()
                
+   def prompt_template_choice(self, catalog):
+      if catalog.entries():
+         # If there are existing templates, prompt the user to load one or create a new one
+         message_box = QMessageBox(self)
+         message_box.setWindowTitle("Template Selection")
+         message_box.setText("What would you like to do?")
+         load_button = message_box.addButton("Load Existing Template", QMessageBox.ActionRole)
+         new_button = message_box.addButton("Create New Template", QMessageBox.ActionRole)
+         message_box.exec_()
+
+         if message_box.clickedButton() == load_button:
+            self.select_template(catalog)
+         elif message_box.clickedButton() == new_button:
+            self.create_new_template()
+      else:
+         # If there are no existing templates, prompt the user to create a new one
+         self.create_new_template()
+
    def create_new_template(self):
       template_name, ok = QInputDialog.getText(self, "New Template", "Enter template name:")
       if ok and template_name:
          # Create a new template with a root node
          new_template = Template(None, template_name)
 
-         self.template_manager.add_template(new_template)
-         self.current_template_index = len(self.template_manager.templates) - 1
-         self.template = self.template_manager.get_template(self.current_template_index)
+         self.current_template_key = self.template_manager.add_template(new_template)
+         self.template = new_template
          
          # Push the AddNodeCommand for the root node
          add_root_node_command = AddNodeCommand(new_template, None, self.template.root_node, self.tree_widget)
@@ -151,28 +176,26 @@ class TemplateDesignPage(QWidget):
          # TODO: Have window title displayed somewhere else
       
    def toggle_display_mode(self):
+      # Only the rows on screen are repainted, the tree is not rebuilt
       self.tree_widget.set_styling_mode(self.stylized_checkbox.isChecked())
-      self.tree_widget.clear()
-      self.tree_widget.populate_tree_widget(self.template.root_node)
 
-   def on_item_double_clicked(self, item, column):
-      # Handle double-clicking on an item
-      node = item.data(0, Qt.UserRole)
+   def on_item_double_clicked(self, index):
+      # Handle double-clicking on a row
+      node = index.data(Qt.UserRole)
       self.logger.debug(f"Double-clicked on {node}")
       
    def refresh_tree_widget(self):
-      self.tree_widget.clear()
-      self.tree_widget.populate_tree_widget(self.template.root_node)
+      self.tree_widget.set_root_node(self.template.root_node)
 
    def show_context_menu(self, position):
-      # Get the item at the right-click position
-      item = self.tree_widget.itemAt(position)
+      # Get the node at the right-click position
+      node = self.tree_widget.node_at(position)
 
       menu = QMenu(self)
       add_directory_action = menu.addAction("Add Directory")
       add_file_action = menu.addAction("Add File")
 
-      if item:
+      if node:
          # If an item is selected, add the "Rename" and "Delete" actions
          rename_action = menu.addAction("Rename")
          delete_action = menu.addAction("Delete")
@@ -180,28 +203,26 @@ class TemplateDesignPage(QWidget):
       action = menu.exec_(self.tree_widget.mapToGlobal(position))
 
       if action == add_directory_action:
-         parent_node = self.template.root_node if item is None else item.data(0, Qt.UserRole)
+         parent_node = self.template.root_node if node is None else node
          self.add_directory(parent_node)
       elif action == add_file_action:
-         parent_node = self.template.root_node if item is None else item.data(0, Qt.UserRole)
+         parent_node = self.template.root_node if node is None else node
          self.add_file(parent_node)
-      elif item and action == rename_action:
-         # Handle renaming the item
-         node = item.data(0, Qt.UserRole)
-         self.rename_node(item, node)
-      elif item and action == delete_action:
-         # Handle deleting the item
-         node = item.data(0, Qt.UserRole)
-         self.delete_node(item, node)
+      elif node and action == rename_action:
+         # Handle renaming the node
+         self.rename_node(node)
+      elif node and action == delete_action:
+         # Handle deleting the node
+         self.delete_node(node)
 
    def add_directory(self, parent_node):
-      self.logger.info(f"Entering add_directory with args: {parent_node}")
+      self.logger.log(TRACE, "Entering add_directory with args: %s", parent_node)
       while True:
          # Add a new directory to the template structure
          directory_name, ok = QInputDialog.getText(self, "Add Directory", "Enter directory name:")
 
          if not ok:
-            self.logger.info("Exiting add_directory with result: user canceled")
+            self.logger.log(TRACE, "Exiting add_directory with result: user canceled")
             return  # User canceled the input dialog
 
          new_node, error_message = self.create_new_node(parent_node, 'folder', directory_name)
@@ -212,16 +233,16 @@ class TemplateDesignPage(QWidget):
          # Create a new node in the template and update the tree widget
          command = AddNodeCommand(self.template, parent_node, new_node, self.tree_widget)
          self.observer.push_command(command)
-         self.logger.info(f"Exiting add_directory with result: {command}")
+         self.logger.log(TRACE, "Exiting add_directory with result: %s", command)
          break  # Exit the loop if the name is valid
 
    def add_file(self, parent_node):
-      self.logger.info(f"Entering add_file with args: {parent_node}")
+      self.logger.log(TRACE, "Entering add_file with args: %s", parent_node)
       while True:
          file_name, ok = QInputDialog.getText(self, "Add File", "Enter file name:")
 
          if not ok:
-            self.logger.info("Exiting add_file with result: user canceled")
+            self.logger.log(TRACE, "Exiting add_file with result: user canceled")
             return  # User canceled the input dialog
 
          new_node, error_message = self.create_new_node(parent_node, 'file', file_name)
@@ -232,11 +253,11 @@ class TemplateDesignPage(QWidget):
          # Create a new node in the template and update the tree widget
          command = AddNodeCommand(self.template, parent_node, new_node, self.tree_widget)
          self.observer.push_command(command)
-         self.logger.info(f"Exiting add_file with result: {command}")
+         self.logger.log(TRACE, "Exiting add_file with result: %s", command)
          break  # Exit the loop if the name is valid
             
    def create_new_node(self, parent_node, node_type, node_name):
-      self.logger.info(f"Entering create_new_node with args: {parent_node}, {node_type}, {node_name}")
+      self.logger.log(TRACE, "Entering create_new_node with args: %s, %s, %s", parent_node, node_type, node_name)
       # Create a new node
       new_node_path = os.path.join(parent_node.path, node_name)
       new_node = Node(node_name, new_node_path, node_type, tags=[node_type])
@@ -244,23 +265,21 @@ class TemplateDesignPage(QWidget):
       # Show the tag selection dialog
       selected_tags = self.show_tag_selection_dialog()
       if selected_tags is not None:
-         new_node.tags.extend(selected_tags)
+         new_node.insert_tags(selected_tags)
       else:
          # User canceled the tag selection dialog
-         self.logger.info("Exiting create_new_node with result: user canceled")
+         self.logger.log(TRACE, "Exiting create_new_node with result: user canceled")
          return None, "Tag selection canceled"
 
-      # Add the new node to the template
-      try:
-         self.template.add_node(parent_node, new_node)
-      except Exception as e:
-         return None, str(e)
+      # The node is added to the template by the AddNodeCommand, only check its name here
+      if parent_node.get_child(node_name) is not None:
+         return None, f"Duplicate child node name '{node_name}' in parent '{parent_node.name}'"
 
-      self.logger.info(f"Exiting create_new_node with result: {new_node}")
+      self.logger.log(TRACE, "Exiting create_new_node with result: %s", new_node)
       return new_node, None
          
-   def rename_node(self, item, node):
-      self.logger.info(f"Entering rename_node with args: {item}, {node}")
+   def rename_node(self, node):
+      self.logger.log(TRACE, "Entering rename_node with args: %s", node)
       # Rename the node
       new_name, ok = QInputDialog.getText(self, "Rename", "Enter new name:", text=node.name)
       if ok and new_name:
@@ -272,75 +291,54 @@ class TemplateDesignPage(QWidget):
 
             command = RenameNodeCommand(self.template, node, new_name, self.tree_widget)
             self.observer.push_command(command)
-            self.logger.info(f"Exiting rename_node with result: {command}")
+            self.logger.log(TRACE, "Exiting rename_node with result: %s", command)
 
-   def delete_node(self, item, node):
-      self.logger.info(f"Entering delete_node with args: {item}, {node}")
+   def delete_node(self, node):
+      self.logger.log(TRACE, "Entering delete_node with args: %s", node)
       # Delete the node if the file already exists, otherwise remove from deleted_nodes queue
       if os.path.exists(node.path):
          self.deleted_nodes.append(node)
-      parent = item.parent()
-      if parent:
-         parent.removeChild(item)
-      else:
-         self.tree_widget.takeTopLevelItem(self.tree_widget.indexOfTopLevelItem(item))
+      # The row is removed by the CommandManager once the node left the template
       command = RemoveNodeCommand(self.template, node, self.tree_widget)
       self.observer.push_command(command)
-      self.logger.info(f"Exiting delete_node with result: {command}")
-      
-   def load_children(self, item):
-      # Get the node associated with the expanded item
-      node = item.data(0, Qt.UserRole)
-
-      # Clear the existing children of the expanded item
-      item.takeChildren()
-
-      # If the node has no children, return
-      if not node.children:
-         return
-
-      # Create child items for the expanded item
-      for child_node in node.children:
-         existing_item = self.tree_widget.find_item_by_node(child_node)
-         if existing_item:
-               item.addChild(existing_item)
-         else:
-               child_item = self.tree_widget.find_or_create_item(child_node, item)
+      self.logger.log(TRACE, "Exiting delete_node with result: %s", command)
       
    def load_templates(self):
       templates_dir = os.path.join(self.parent_dir, "templates")
       if os.path.exists(templates_dir):
-         json_files = [f for f in os.listdir(templates_dir) if f.endswith(".json")]
-         file_dialog = QFileDialog(self)
-         file_dialog.setNameFilter("JSON Files (*.json)")
-         file_dialog.setFileMode(QFileDialog.ExistingFile)
-         file_dialog.setDirectory(templates_dir)
-         if file_dialog.exec_():
-            selected_files = file_dialog.selectedFiles()
-            if selected_files:
-                  file_path = selected_files[0]
-                  try:
-                     template = self.template_manager.load_template(file_path)
-                     self.template_manager.add_template(template)
-                     self.current_template_index = len(self.template_manager.templates) - 1
-                     self.template = self.template_manager.get_template(self.current_template_index)
-                     self.set_unsaved_changes(False)
-                     self.tree_widget.clear()
-                     self.tree_widget.populate_tree_widget(self.template.root_node)
-                     self.logger.info(f"Loaded template from {file_path}")
-
-                     # Update the header label with the template name
-                     #self.tree_widget.setHeaderLabels([f"Template Structure: {self.template.name}"])
-                  except Exception as e:
-                     self.logger.error(f"Error loading template from {file_path}: {e}")
+         # The catalog index lists the templates without parsing them once it is refreshed
+         self.run_in_background("Indexing templates", self.template_manager.get_catalog, templates_dir,
+                                on_finished=self.select_template)
       else:
          self.logger.error(f"Templates directory not found: {templates_dir}")
 
-   def save_current_template(self):
-      if self.current_template_index is not None:
-         template = self.template_manager.templates[self.current_template_index]
-         template.name = self.template.name
-         template.root_node = self.template.root_node
+   def select_template(self, catalog):
+      file_path = self.show_template_selection_dialog(catalog)
+      if file_path:
+         # Reopening an unchanged template reuses the one cached by the manager
+         self.run_in_background("Loading template", self.template_manager.load_template, file_path, eager_depth=2,
+                                on_finished=lambda template: self.show_loaded_template(file_path, template))
+
+   def show_loaded_template(self, file_path, template):
+      if template is None:
+         self.summary_log.log(f"Could not load template from {file_path}")
+         return
+      self.current_template_key = os.path.abspath(file_path)
+      self.template = template
+      self.mark_saved()
+      self.tree_widget.set_root_node(self.template.root_node)
+      self.logger.info(f"Loaded template from {file_path}")
+
+      # Update the header label with the template name
+      #self.tree_widget.setHeaderLabels([f"Template Structure: {self.template.name}"])
+
+   def save_current_template(self, then=None):
+      """
+      Save the template in the background, then call then, if given, on the GUI thread.
+      then is also called when the user keeps the existing file.
+      """
+      if self.current_template_key is not None:
+         template = self.template
 
          templates_dir = os.path.join(self.parent_dir, "templates")
          file_path = os.path.join(templates_dir, f"{template.name}.json")
@@ -348,137 +346,198 @@ class TemplateDesignPage(QWidget):
          if os.path.exists(file_path):
             overwrite_confirmation = QMessageBox.question(self, "Overwrite Template", f"A template with the name '{template.name}' already exists. Do you want to overwrite it?", QMessageBox.Yes | QMessageBox.No)
             if overwrite_confirmation == QMessageBox.No:
+               if then is not None:
+                  then()
                return
                
-         self.template_manager.save_template(template, file_path)
-         self.set_unsaved_changes(False)
-         #self.update_window_title()
+         self.run_in_background("Saving template", self.template_manager.save_template, template, file_path,
+                                on_finished=lambda key: self.template_saved(key, then))
       else:
          self.logger.error("No template loaded")
          
+   def template_saved(self, key, then=None):
+      self.current_template_key = key
+      self.mark_saved()
+      #self.update_window_title()
+      if then is not None:
+         then()
+
    def rename_template(self):
-      if self.current_template_index is not None:
-         current_template = self.template_manager.templates[self.current_template_index]
-         new_name, ok = QInputDialog.getText(self, "Rename Template", "Enter new template name:", text=current_template.name)
+      if self.current_template_key is not None:
+         new_name, ok = QInputDialog.getText(self, "Rename Template", "Enter new template name:", text=self.template.name)
          if ok and new_name:
-            current_template.name = new_name
             self.template.name = new_name
             #self.tree_widget.setHeaderLabels([f"Template Structure: {new_name}"])
-            self.set_unsaved_changes(True)
+            self.refresh_unsaved_changes()
             #self.update_window_title()
       else:
          self.logger.error("No template loaded")
 
    def execute_template(self):
-      self.logger.info("Entering execute_template")
-      # Save the current template before executing
-      self.save_current_template()
+      self.logger.log(TRACE, "Entering execute_template")
+      # Save the current template before executing, and carry on once it is saved
+      self.save_current_template(then=self.select_base_directory)
 
+   def select_base_directory(self):
       # Clear the summary text
-      self.summary_text.clear()
+      self.summary_log.clear()
 
       # Prompt the user for the base directory
       base_dir = QFileDialog.getExistingDirectory(self, "Select Base Directory")
 
       if base_dir:
-         # Execute the template with the provided base directory
-         self.template.execute(base_dir)
-
-         # Clear the existing tree widget items
-         self.tree_widget.clear()
-
-         # Populate the tree widget with the updated directory structure
-         self.tree_widget.populate_tree_widget(self.template.root_node)
+         self.sync_directory_structure(base_dir)
       else:
          self.logger.warning("No base directory selected. Template execution canceled.")
 
-   def create_node(self, node, parent_dir):
-      self.logger.info(f"Entering create_node with args: {node}, {parent_dir}")
-      node_path = os.path.join(parent_dir, node.name)
-      old_node_path = None
+   def sync_directory_structure(self, base_dir):
+      self.logger.log(TRACE, "Entering sync_directory_structure with args: %s", base_dir)
+      # Compare the template with the base directory before touching the disk
+      self.run_in_background("Comparing with base directory", self.template.plan_sync, base_dir,
+                             on_finished=lambda plan: self.confirm_sync(base_dir, plan))
 
-      if node.type == 'folder':
-         # If the node is a directory
-         if os.path.exists(node_path):
-            # If the directory already exists, get the old path
-            old_node_path = node_path
-         else:
-            # If the directory doesn't exist, create it
-            os.makedirs(node_path, exist_ok=True)
-            self.summary_text.append(f"Created directory: {node_path}")
-
-         # Recursively create the directory structure for the child nodes
-         for child_node in node.children:
-            self.create_node(child_node, node_path)
-
-         if old_node_path and old_node_path != node_path:
-            # If the directory was renamed or moved, update the summary
-            self.summary_text.append(f"Renamed/moved directory: {old_node_path} -> {node_path}")
-            node.move(node_path)
-            node.rename(os.path.basename(node_path))
+   def confirm_sync(self, base_dir, plan):
+      self.logger.log(TRACE, "Entering confirm_sync with args: %s, %s", base_dir, plan)
+      for line in plan.describe():
+         self.summary_log.log(line, "planned changes")
+
+      if plan.is_empty():
+         self.summary_log.log(f"Nothing to create in {base_dir}")
+         self.logger.log(TRACE, "Exiting confirm_sync with result: nothing to create")
+         return
+
+      confirmation = QMessageBox.question(self, "Execute Template", f"Create {plan.count_missing()} missing entries in '{base_dir}'?", QMessageBox.Yes | QMessageBox.No)
+      if confirmation == QMessageBox.No:
+         self.logger.log(TRACE, "Exiting confirm_sync with result: user canceled")
+         return
+
+      # Only create the missing entries, existing files are left untouched
+      self.template.root_node.path = base_dir
+      self.run_in_background("Creating entries", TemplateSync().apply, plan, on_finished=self.show_sync_report)
+      self.logger.log(TRACE, "Exiting confirm_sync")
+
+   def show_sync_report(self, report):
+      for result in report.failed:
+         self.summary_log.log(f"Failed to create {result.node.type}: {result.path}", "entries failed")
+      self.summary_log.add_count("entries created", len(report.created))
+      self.summary_log.log(f"Created {len(report.created)} entries, {len(report.failed)} failed, {len(report.skipped)} skipped")
+
+      # The rows read their paths from the nodes, so a repaint shows the new base directory
+      self.tree_widget.viewport().update()
+      self.logger.log(TRACE, "Exiting show_sync_report with result: %s", report)
+
+   def run_in_background(self, description, fn, *args, on_finished=None, **kwargs):
+      """
+      Run fn(*args, progress=progress, **kwargs) on the thread pool, showing its progress.
+
+      The template and the tree are locked while it runs. on_finished is called with the
+      result on the GUI thread; failures and cancellations are reported in the summary.
+
+      Returns:
+         bool: False if another operation is still running.
+      """
+      self.logger.log(TRACE, "Entering run_in_background with args: %s", description)
+      if self.worker is not None:
+         self.logger.warning(f"Cannot start '{description}' while '{self.worker_description}' is running")
+         return False
+      self.worker = Worker(fn, *args, **kwargs)
+      self.worker_description = description
+      self.worker_callback = on_finished
+      # The signals are emitted from the pool thread and queued to the slots on the GUI thread
+      self.worker.signals.progress.connect(self.show_progress)
+      self.worker.signals.finished.connect(self.on_worker_finished)
+      self.worker.signals.failed.connect(self.on_worker_failed)
+      self.worker.signals.cancelled.connect(self.on_worker_cancelled)
+      self.set_busy(True)
+      self.progress_bar.reset()
+      self.progress_label.setText(f"{description}...")
+      self.thread_pool.start(self.worker)
+      self.logger.log(TRACE, "Exiting run_in_background with result: %s", self.worker)
+      return True
+
+   def cancel_background_task(self):
+      if self.worker is not None:
+         self.worker.cancel()
+         self.cancel_button.setEnabled(False)
+         self.progress_label.setText(f"Cancelling {self.worker_description.lower()}...")
+
+   def show_progress(self, done, total, bytes_done, eta, unit):
+      if self.worker is None or self.worker.token.is_cancelled():
+         return
+      if total:
+         self.progress_bar.setRange(0, 1000)
+         self.progress_bar.setValue(int(1000 * min(done, total) / total))
+         text = f"{self.worker_description}: {done:,} of {total:,} {unit}"
       else:
-         # If the node is a file
-         file_dir = os.path.dirname(node_path)
-         if not os.path.exists(file_dir):
-            # If the parent directory doesn't exist, create it
-            os.makedirs(file_dir, exist_ok=True)
-            self.summary_text.append(f"Created directory: {file_dir}")
-
-         # If the file doesn't exist, create it
-         if not os.path.exists(node_path):
-            with open(node_path, 'w') as f:
-               pass
-            self.summary_text.append(f"Created file: {node_path}")
-      self.logger.info(f"Exiting create_node.") # TODO: improve the logging here
-
-   def create_directory_structure(self, parent_node, parent_dir):
-      # Iterate over the children of the parent node
-      for child_node in parent_node.children:
-         child_path = os.path.join(parent_dir, child_node.name)
-         old_child_path = None
-
-         if child_node.type == 'folder':
-            # If the child node is a directory
-            if os.path.exists(child_path):
-               # If the directory already exists, get the old path
-               old_child_path = child_path
-            else:
-               # If the directory doesn't exist, create it
-               os.makedirs(child_path, exist_ok=True)
-               self.summary_text.append(f"Created directory: {child_path}")
-
-            # Recursively create the directory structure for the child node
-            self.create_directory_structure(child_node, child_path)
-
-            if old_child_path and old_child_path != child_path:
-               # If the directory was renamed or moved, update the summary
-               self.summary_text.append(f"Renamed/moved directory: {old_child_path} -> {child_path}")
-               child_node.move(child_path)
-               child_node.rename(os.path.basename(child_path))
-         else:
-            # If the child node is a file
-            file_dir = os.path.dirname(child_path)
-            if not os.path.exists(file_dir):
-               # If the parent directory doesn't exist, create it
-               os.makedirs(file_dir, exist_ok=True)
-               self.summary_text.append(f"Created directory: {file_dir}")
-
-            # If the file doesn't exist, create it
-            if not os.path.exists(child_path):
-               with open(child_path, 'w') as f:
-                  pass
-               self.summary_text.append(f"Created file: {child_path}")
+         # A busy indicator while the amount of work is unknown
+         self.progress_bar.setRange(0, 0)
+         text = f"{self.worker_description}: {done:,} {unit}"
+      if bytes_done and unit != "bytes":
+         text += f", {bytes_done / (1 << 20):.1f} MB"
+      if eta is not None:
+         text += f", about {eta:.0f} s left"
+      self.progress_label.setText(text)
+
+   def on_worker_finished(self, result):
+      callback = self.worker_callback
+      self.end_background_task()
+      if callback is not None:
+         callback(result)
+
+   def on_worker_failed(self, message):
+      self.summary_log.log(f"{self.worker_description} failed: {message}")
+      self.end_background_task()
+
+   def on_worker_cancelled(self):
+      self.summary_log.log(f"{self.worker_description} cancelled")
+      self.end_background_task()
+
+   def end_background_task(self):
+      self.worker = None
+      self.worker_description = None
+      self.worker_callback = None
+      self.set_busy(False)
+
+   def set_busy(self, busy):
+      # The worker reads the template, so it must not be edited until the operation ends
+      for widget in (self.execute_button, self.undo_button, self.redo_button, self.new_template_button,
+                     self.load_template_button, self.save_template_button, self.tree_widget):
+         widget.setEnabled(not busy)
+      # Fetching rows builds lazily loaded children, which the worker may be walking
+      self.tree_widget.tree_model.set_locked(busy)
+      self.cancel_button.setEnabled(busy)
+      self.set_progress_visible(busy)
+
+   def set_progress_visible(self, visible):
+      self.progress_label.setVisible(visible)
+      self.progress_bar.setVisible(visible)
+      self.cancel_button.setVisible(visible)
                   
    def set_unsaved_changes(self, unsaved_changes):
-      self.logger.info(f"Entering set_unsaved_changes with args: {unsaved_changes}")
+      self.logger.log(TRACE, "Entering set_unsaved_changes with args: %s", unsaved_changes)
       self.unsaved_changes = unsaved_changes
       if self.unsaved_changes:
          self.unsaved_changes_indicator.setText("* Unsaved Changes")
       else:
          self.unsaved_changes_indicator.setText("")
       
-      self.logger.info(f"Exiting set_unsaved_changes with result: {self.unsaved_changes}")
+      self.logger.log(TRACE, "Exiting set_unsaved_changes with result: %s", self.unsaved_changes)
       
+   def mark_saved(self):
+      # Remember the saved structure, so edits that are undone by hand do not count as changes
+      self.saved_state = (self.template.name, self.template.root_node.structural_hash)
+      self.set_unsaved_changes(False)
+
+   def refresh_unsaved_changes(self):
+      """
+      Compare the template with its last saved state. Only the hashes of edited nodes and
+      their ancestors are recomputed, so this is cheap after every edit.
+      """
+      if self.template is None:
+         return
+      current_state = (self.template.name, self.template.root_node.structural_hash)
+      self.set_unsaved_changes(current_state != self.saved_state)
+
    def update_window_title(self):
       title = "Template Structure: " + self.template.name
       if self.unsaved_changes:
@@ -487,7 +546,7 @@ class TemplateDesignPage(QWidget):
 
    # Undo the action, push QUndoCommand to the undo stack
    def undo_action(self):
-      self.logger.info(f"Entering undo_action")
+      self.logger.log(TRACE, "Entering undo_action")
       if self.undo_stack.canUndo():
          self.undo_stack.undo()
          self.observer.undo()
@@ -495,7 +554,7 @@ class TemplateDesignPage(QWidget):
          self.redo_button.setEnabled(self.undo_stack.canRedo())
 
    def redo_action(self):
-      self.logger.info(f"Entering redo_action")
+      self.logger.log(TRACE, "Entering redo_action")
       if self.undo_stack.canRedo():
          self.undo_stack.redo()
          self.observer.redo()
@@ -531,84 +590,72 @@ class TemplateDesignPage(QWidget):
          return selected_tags
       else:
          return None
-class TreeWidgetCommand(QUndoCommand):
-   def __init__(self, tree_widget, top_left, bottom_right, roles):
-      super().__init__()
-      self.tree_widget = tree_widget
-      self.top_left = top_left
-      self.bottom_right = bottom_right
-      self.roles = roles
-      self.old_data = {}
-      self.new_data = {}
-      self.old_paths = {}
-      self.new_paths = {}
-
-      # Store the old data and paths
-      for row in range(top_left.row(), bottom_right.row() + 1):
-         for column in range(top_left.column(), bottom_right.column() + 1):
-            index = self.tree_widget.model().index(row, column)
-            self.old_data[(row, column)] = self.tree_widget.model().data(index, self.roles[0])
-            item = self.tree_widget.itemFromIndex(index)
-            if item:
-               parent_dir = self.tree_widget.parent().parent_dir
-               old_path = os.path.join(parent_dir, item.text(0))
-               self.old_paths[(row, column)] = old_path
-
-   def undo(self):
-      # Restore the old data and paths
-      for (row, column), data in self.old_data.items():
-         index = self.tree_widget.model().index(row, column)
-         self.new_data[(row, column)] = self.tree_widget.model().data(index, self.roles[0])
-         self.tree_widget.model().setData(index, data, self.roles[0])
-         item = self.tree_widget.itemFromIndex(index)
-         if item:
-            parent_dir = self.tree_widget.parent().parent_dir
-            new_path = os.path.join(parent_dir, item.text(0))
-            self.new_paths[(row, column)] = new_path
-            if (row, column) in self.old_paths:
-               old_path = self.old_paths[(row, column)]
-               if old_path != new_path:
-                  shutil.move(new_path, old_path)
-
-   def redo(self):
-      # Restore the new data and paths
-      for (row, column), data in self.new_data.items():
-         index = self.tree_widget.model().index(row, column)
-         self.tree_widget.model().setData(index, data, self.roles[0])
-         item = self.tree_widget.itemFromIndex(index)
-         if item:
-            parent_dir = self.tree_widget.parent().parent_dir
-            new_path = os.path.join(parent_dir, item.text(0))
-            if (row, column) in self.old_paths:
-               old_path = self.old_paths[(row, column)]
-               if old_path != new_path:
-                  shutil.move(old_path, new_path)
-                     
-def topological_sort(root_node):
-   """
-   Perform a topological sort on the nodes of the template.
-   """
-   in_degree = defaultdict(int)
-   graph = defaultdict(list)
-   sorted_nodes = []
-
-   # Calculate the in-degree of each node
-   def calculate_in_degree(node):
-      for child in node.children:
-         in_degree[child] += 1
-         graph[node].append(child)
-         calculate_in_degree(child)
-
-   calculate_in_degree(root_node)
-
-   # Perform topological sort
-   queue = [node for node in in_degree if in_degree[node] == 0]
-   while queue:
-      node = queue.pop(0)
-      sorted_nodes.append(node)
-      for neighbor in graph[node]:
-         in_degree[neighbor] -= 1
-         if in_degree[neighbor] == 0:
-               queue.append(neighbor)
-
-   return sorted_nodes
\ No newline at end of file
+
+   def show_template_selection_dialog(self, catalog):
+      """
+      Let the user pick a template from the catalog, with search and a preview of each template.
+
+      Returns:
+         str: The path of the selected template, or None if the dialog was cancelled.
+      """
+      dialog = QDialog(self)
+      dialog.setWindowTitle("Load Template")
+      dialog_layout = QVBoxLayout(dialog)
+
+      search_edit = QLineEdit()
+      search_edit.setPlaceholderText("Search by name, or #tag")
+      dialog_layout.addWidget(search_edit)
+
+      template_list = QListWidget()
+      dialog_layout.addWidget(template_list)
+
+      preview_label = QLabel()
+      preview_label.setWordWrap(True)
+      dialog_layout.addWidget(preview_label)
+
+      def fill_list(text):
+         words = text.split()
+         tags = [word[1:] for word in words if word.startswith("#") and len(word) > 1]
+         query = " ".join(word for word in words if not word.startswith("#"))
+         template_list.clear()
+         for entry in catalog.search(query, tags):
+            item = QListWidgetItem(f"{entry.name} ({entry.node_count} nodes)")
+            item.setData(Qt.UserRole, entry.file_name)
+            template_list.addItem(item)
+
+      def show_preview(current, previous):
+         entry = catalog.get(current.data(Qt.UserRole)) if current is not None else None
+         if entry is None:
+            preview_label.clear()
+            return
+         tags = ", ".join(f"{tag} ({count})" for tag, count in sorted(entry.tag_counts.items()))
+         children = ", ".join(f"{name}/" if node_type == 'folder' else name for name, node_type in entry.preview)
+         preview_label.setText(f"File: {entry.file_name}\nNodes: {entry.node_count}\nTags: {tags or '-'}\nContents: {children or '-'}")
+
+      search_edit.textChanged.connect(fill_list)
+      template_list.currentItemChanged.connect(show_preview)
+      template_list.itemDoubleClicked.connect(dialog.accept)
+      fill_list("")
+
+      # Templates outside the catalog can still be opened by browsing for the file
+      browsed_files = []
+      def browse():
+         file_path, _ = QFileDialog.getOpenFileName(dialog, "Load Template", catalog.templates_dir, f"Template Files (*.json *{BINARY_EXTENSION})")
+         if file_path:
+            browsed_files.append(file_path)
+            dialog.accept()
+
+      button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+      browse_button = button_box.addButton("Browse...", QDialogButtonBox.ActionRole)
+      browse_button.clicked.connect(browse)
+      button_box.accepted.connect(dialog.accept)
+      button_box.rejected.connect(dialog.reject)
+      dialog_layout.addWidget(button_box)
+
+      if dialog.exec_() != QDialog.Accepted:
+         return None
+      if browsed_files:
+         return browsed_files[-1]
+      if template_list.currentItem() is not None:
+         return catalog.path_of(catalog.get(template_list.currentItem().data(Qt.UserRole)))
+      return None
@@ -0,0 +1,302 @@
+from itertools import islice
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+
+from utils.styles import NAME_COLUMN, TYPE_COLUMN, TAGS_COLUMN, PATH_COLUMN
+from utils.html_delegate import render_text, render_tags
+
+import logging
+from utils.logger import TRACE
+
+HEADER_LABELS = ["Name", "Type", "Tags", "Path"]
+
+class FetchedNode:
+   """
+   Entry of a fetched node in the node index of a TemplateTreeModel.
+
+   Attributes:
+      parent_node (Node): The parent of the node in the model, None for the root node.
+      row (int): The row of the node under its parent.
+      rows (list): The fetched children of the node, None until they are first fetched.
+   """
+   __slots__ = ('parent_node', 'row', 'rows')
+
+   def __init__(self, parent_node, row):
+      self.parent_node = parent_node
+      self.row = row
+      self.rows = None
+
+class TemplateTreeModel(QAbstractItemModel):
+   """
+   Item model over the node tree of a template, shown by a TemplateTreeView.
+
+   No item objects are created: every index points straight at its node. The children
+   of a folder are only fetched when the view asks for them, FETCH_BATCH_SIZE rows at a
+   time, so opening a template with hundreds of thousands of nodes only touches the rows
+   on screen, and lazily loaded subtrees stay unbuilt until they are expanded.
+
+   Every fetched node has an entry in a node index, holding its parent, its row and its
+   fetched children, so finding the index of a node, its parent or its rows never walks
+   the tree. The index replaces both a search through the items of a QTreeWidget and a
+   separate record of which folders were populated. A node without an entry has not been
+   fetched yet.
+
+   The node tree is edited first and the model is told afterwards through node_added,
+   node_removed, node_changed and node_moved, which update the index and emit the
+   matching row and data signals. Until then the model still answers from its index, so
+   views never see a half applied edit.
+
+   Attributes:
+      root_node (Node): The root node of the tree, shown as the single top level row.
+      stylized (bool): Whether the rows are rendered as HTML styled by their tags.
+      locked (bool): Whether a background operation is reading the node tree. Fetching
+         builds lazily loaded children, so no rows are fetched while it is set.
+   """
+
+   FETCH_BATCH_SIZE = 500
+
+   # Emitted after the model was told about an edit of the node tree
+   nodes_edited = pyqtSignal()
+
+   def __init__(self, parent=None):
+      super().__init__(parent)
+      self.logger = logging.getLogger(__name__)
+      self.root_node = None
+      self.stylized = False
+      self.locked = False
+      self._top_rows = []  # The root node, once set
+      # FetchedNode entry of every fetched node. The model indexes point to the nodes, so
+      # the entries hold them strongly and are dropped as soon as their node leaves the
+      # model, see _forget.
+      self._nodes = {}
+      # Set while rows are inserted or removed. The node tree is already edited by then,
+      # so views must not fetch from it until the model has caught up.
+      self._editing = False
+
+   def set_root_node(self, root_node):
+      self.logger.log(TRACE, "Entering set_root_node with args: arg1=%s", root_node)
+      self.beginResetModel()
+      self.root_node = root_node
+      self._top_rows = [root_node] if root_node is not None else []
+      self._nodes = {root_node: FetchedNode(None, 0)} if root_node is not None else {}
+      self.endResetModel()
+      self.logger.log(TRACE, "Exiting set_root_node.")
+
+   def set_locked(self, locked):
+      """
+      Stop or resume fetching rows, e.g. while a worker walks the node tree.
+      """
+      self.logger.log(TRACE, "Entering set_locked with args: arg1=%s", locked)
+      self.locked = locked
+
+   def set_stylized(self, enabled):
+      """
+      Switch between plain and styled text, repainting the fetched rows only.
+      """
+      self.stylized = enabled
+      for rows in [self._top_rows] + [entry.rows for entry in self._nodes.values()]:
+         if rows:
+            self.dataChanged.emit(self.createIndex(0, NAME_COLUMN, rows[0]), self.createIndex(len(rows) - 1, PATH_COLUMN, rows[-1]))
+
+   def node_from_index(self, index):
+      """
+      Return the node of an index, or None for an invalid index.
+      """
+      return index.internalPointer() if index.isValid() else None
+
+   def index_of(self, node, column=NAME_COLUMN):
+      """
+      Return the index of a node, or an invalid index if its row has not been fetched.
+      """
+      entry = self._nodes.get(node)
+      if entry is None:
+         return QModelIndex()
+      return self.createIndex(entry.row, column, node)
+
+   def is_fetched(self, node):
+      return node in self._nodes
+
+   def fetched_rows(self, node):
+      """
+      Return the fetched children of a node, None if none were fetched, or the top level rows for None.
+      """
+      if node is None:
+         return self._top_rows
+      entry = self._nodes.get(node)
+      return entry.rows if entry is not None else None
+
+   # QAbstractItemModel interface
+
+   def index(self, row, column, parent=QModelIndex()):
+      rows = self.fetched_rows(self.node_from_index(parent))
+      if rows is None or not 0 <= row < len(rows) or not 0 <= column < len(HEADER_LABELS):
+         return QModelIndex()
+      return self.createIndex(row, column, rows[row])
+
+   def parent(self, index):
+      entry = self._nodes.get(self.node_from_index(index))
+      if entry is None or entry.parent_node is None:
+         return QModelIndex()
+      return self.index_of(entry.parent_node)
+
+   def rowCount(self, parent=QModelIndex()):
+      if parent.column() > 0:
+         return 0
+      return len(self.fetched_rows(self.node_from_index(parent)) or ())
+
+   def columnCount(self, parent=QModelIndex()):
+      return len(HEADER_LABELS)
+
+   def hasChildren(self, parent=QModelIndex()):
+      if parent.column() > 0:
+         return False
+      node = self.node_from_index(parent)
+      if node is None:
+         return bool(self._top_rows)
+      # Answered without building lazily loaded children, so the expand indicator is free
+      return node.type == 'folder' and node.has_children()
+
+   def canFetchMore(self, parent):
+      node = self.node_from_index(parent)
+      if node is None or parent.column() > 0 or self._editing or self.locked:
+         return False
+      return len(self.fetched_rows(node) or ()) < node.child_count()
+
+   def fetchMore(self, parent):
+      node = self.node_from_index(parent)
+      if node is None or parent.column() > 0 or self._editing or self.locked:
+         return
+      entry = self._nodes[node]
+      if entry.rows is None:
+         entry.rows = []
+      rows = entry.rows
+      start = len(rows)
+      # Iterating the children builds them if they were loaded lazily
+      batch = list(islice(node.children, start, start + self.FETCH_BATCH_SIZE))
+      if not batch:
+         return
+      # Views may ask for more rows again while they are being inserted
+      self._editing = True
+      self.beginInsertRows(parent, start, start + len(batch) - 1)
+      for row, child in enumerate(batch, start):
+         self._nodes[child] = FetchedNode(node, row)
+      rows.extend(batch)
+      self.endInsertRows()
+      self._editing = False
+      self.logger.log(TRACE, "Fetched %s rows of '%s'", len(batch), node.name)
+
+   def data(self, index, role=Qt.DisplayRole):
+      node = self.node_from_index(index)
+      if node is None:
+         return None
+      if role == Qt.DisplayRole:
+         return self.display_text(node, index.column())
+      if role == Qt.UserRole:
+         return node
+      return None
+
+   def headerData(self, section, orientation, role=Qt.DisplayRole):
+      if orientation == Qt.Horizontal and role == Qt.DisplayRole and 0 <= section < len(HEADER_LABELS):
+         return HEADER_LABELS[section]
+      return None
+
+   def flags(self, index):
+      if not index.isValid():
+         return Qt.NoItemFlags
+      return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+   def display_text(self, node, column):
+      if column == NAME_COLUMN:
+         return render_text(node.name, node.tags, self.stylized)
+      if column == TYPE_COLUMN:
+         return render_text(node.type, node.tags, self.stylized)
+      if column == TAGS_COLUMN:
+         return render_tags(node.tags, self.stylized)
+      return render_text(node.path, node.tags, self.stylized)
+
+   # Notifications about edits of the node tree
+
+   def node_added(self, parent_node, node):
+      """
+      Show a node that was added to parent_node. A node without a parent becomes the root.
+      """
+      self.logger.log(TRACE, "Entering node_added with args: arg1=%s, arg2=%s", parent_node, node)
+      if parent_node is None:
+         self.set_root_node(node)
+      elif parent_node in self._nodes:
+         parent_entry = self._nodes[parent_node]
+         if parent_entry.rows is None:
+            parent_entry.rows = []
+         rows = parent_entry.rows
+         parent_index = self.index_of(parent_node)
+         # Children are kept in insertion order, so the new node is the last child. When
+         # the rows before it are not all fetched yet, fetchMore picks it up later.
+         if len(rows) == parent_node.child_count() - 1:
+            row = len(rows)
+            self._editing = True
+            self.beginInsertRows(parent_index, row, row)
+            rows.append(node)
+            self._nodes[node] = FetchedNode(parent_node, row)
+            self.endInsertRows()
+            self._editing = False
+         else:
+            self.dataChanged.emit(parent_index, parent_index)
+      self.nodes_edited.emit()
+      self.logger.log(TRACE, "Exiting node_added.")
+
+   def node_removed(self, parent_node, node):
+      """
+      Drop the row of a node that was removed from parent_node, along with its fetched descendants.
+
+      The row is looked up in the index, so it is also dropped when parent_node is out of
+      date, e.g. for a node that was moved after the removal was recorded.
+      """
+      self.logger.log(TRACE, "Entering node_removed with args: arg1=%s, arg2=%s", parent_node, node)
+      entry = self._nodes.get(node)
+      if entry is not None and (entry.parent_node is parent_node or node.parent is not entry.parent_node):
+         parent_node = entry.parent_node
+         row = entry.row
+         rows = self.fetched_rows(parent_node)
+         self._editing = True
+         self.beginRemoveRows(self.index_of(parent_node), row, row)
+         del rows[row]
+         self._forget(node)
+         for next_row in range(row, len(rows)):
+            self._nodes[rows[next_row]].row = next_row
+         self.endRemoveRows()
+         self._editing = False
+      self.nodes_edited.emit()
+      self.logger.log(TRACE, "Exiting node_removed.")
+
+   def node_changed(self, node):
+      """
+      Repaint the row of a renamed or retagged node, and the paths of its fetched descendants.
+      """
+      self.logger.log(TRACE, "Entering node_changed with args: arg1=%s", node)
+      index = self.index_of(node)
+      if index.isValid():
+         self.dataChanged.emit(index, self.index_of(node, PATH_COLUMN))
+         stack = [node]
+         while stack:
+            rows = self.fetched_rows(stack.pop())
+            if rows:
+               self.dataChanged.emit(self.createIndex(0, PATH_COLUMN, rows[0]), self.createIndex(len(rows) - 1, PATH_COLUMN, rows[-1]))
+               stack.extend(rows)
+      self.nodes_edited.emit()
+      self.logger.log(TRACE, "Exiting node_changed.")
+
+   def node_moved(self, node, old_parent_node, new_parent_node):
+      """
+      Move the row of a node that was moved from old_parent_node to new_parent_node.
+      """
+      self.node_removed(old_parent_node, node)
+      self.node_added(new_parent_node, node)
+
+   def _forget(self, node):
+      # Drop the fetched rows of a subtree that left the model
+      stack = [node]
+      while stack:
+         current = stack.pop()
+         entry = self._nodes.pop(current, None)
+         if entry is not None and entry.rows:
+            stack.extend(entry.rows)
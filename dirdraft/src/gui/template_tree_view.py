@@ -0,0 +1,67 @@
+from PyQt5.QtWidgets import QTreeView, QAbstractItemView
+
+from utils.html_delegate import HTMLDelegate
+from gui.template_tree_model import TemplateTreeModel
+
+import logging
+from utils.logger import TRACE
+
+class TemplateTreeView(QTreeView):
+   """
+   Tree view of a template, backed by a TemplateTreeModel.
+
+   Replaces a QTreeWidget holding an item per node: rows are fetched as folders are
+   expanded and scrolled, and edits reported by the CommandManager through node_added,
+   node_removed, node_changed and node_moved only update the affected rows.
+
+   Attributes:
+      tree_model (TemplateTreeModel): The model shown by the view.
+      stylized_display (bool): Whether rows are styled by their tags.
+   """
+
+   def __init__(self, parent=None):
+      super().__init__(parent)
+      self.logger = logging.getLogger(__name__)
+      self.tree_model = TemplateTreeModel(self)
+      self.setModel(self.tree_model)
+      self.setItemDelegate(HTMLDelegate(self))
+      self.setSelectionMode(QAbstractItemView.SingleSelection)
+      # Every row has the same height, so the view does not measure rows to lay them out
+      self.setUniformRowHeights(True)
+      self.stylized_display = False
+      self.logger.info("Created TemplateTreeView")
+
+   def set_root_node(self, root_node):
+      """
+      Show the tree of root_node, with the root expanded.
+      """
+      self.logger.log(TRACE, "Entering set_root_node with args: arg1=%s", root_node)
+      self.tree_model.set_root_node(root_node)
+      if root_node is not None:
+         self.expand(self.tree_model.index_of(root_node))
+      self.logger.log(TRACE, "Exiting set_root_node.")
+
+   def set_styling_mode(self, enabled):
+      self.logger.log(TRACE, "Entering set_styling_mode with arg: arg1=%s", enabled)
+      self.stylized_display = enabled
+      self.itemDelegate().rich_text = enabled
+      self.tree_model.set_stylized(enabled)
+      self.logger.log(TRACE, "Exiting set_styling_mode with result: %s", self.stylized_display)
+
+   def node_at(self, position):
+      """
+      Return the node shown at a position in the viewport, or None.
+      """
+      return self.tree_model.node_from_index(self.indexAt(position))
+
+   def node_added(self, parent_node, node):
+      self.tree_model.node_added(parent_node, node)
+
+   def node_removed(self, parent_node, node):
+      self.tree_model.node_removed(parent_node, node)
+
+   def node_changed(self, node):
+      self.tree_model.node_changed(node)
+
+   def node_moved(self, node, old_parent_node, new_parent_node):
+      self.tree_model.node_moved(node, old_parent_node, new_parent_node)
@@ -88,17 +88,17 @@ class DeleteFileCommand(QUndoCommand):
          if self.node.type == 'file':
                with open(path, 'w') as f:
                   pass
-               self.template_design_page.summary_text.append(f"Restored file: {path}")
+               self.template_design_page.summary_log.log(f"Restored file: {path}", "files restored")
          elif self.node.type == 'folder':
                os.makedirs(path)
-               self.template_design_page.summary_text.append(f"Restored directory: {path}")
+               self.template_design_page.summary_log.log(f"Restored directory: {path}", "directories restored")
 
    def redo(self):
       path = os.path.join(self.template_design_page.parent_dir, self.node.path)
       if os.path.exists(path):
          if self.node.type == 'file':
                os.remove(path)
-               self.template_design_page.summary_text.append(f"Deleted file: {path}")
+               self.template_design_page.summary_log.log(f"Deleted file: {path}", "files deleted")
          elif self.node.type == 'folder':
                shutil.rmtree(path, ignore_errors=True)
-               self.template_design_page.summary_text.append(f"Deleted directory: {path}")
\ No newline at end of file
+               self.template_design_page.summary_log.log(f"Deleted directory: {path}", "directories deleted")
\ No newline at end of file
@@ -0,0 +1,70 @@
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from utils.progress import Progress, CancellationToken, OperationCancelled
+
+import logging
+from utils.logger import TRACE
+
+class WorkerSignals(QObject):
+   """
+   Signals of a Worker. A QRunnable is not a QObject, so it cannot emit signals itself.
+
+   The signals are emitted from the pool thread and delivered to slots of GUI objects
+   through queued connections, so the slots run on the GUI thread.
+   """
+
+   # Done, total (None if unknown), bytes done, estimated seconds left (None if unknown), unit.
+   # Counts are passed as objects, so they are not truncated to 32 bits.
+   progress = pyqtSignal(object, object, object, object, str)
+   # The result of the operation
+   finished = pyqtSignal(object)
+   # The error message of a failed operation
+   failed = pyqtSignal(str)
+   cancelled = pyqtSignal()
+
+class Worker(QRunnable):
+   """
+   Runs a long operation, such as loading, saving or executing a template, on a QThreadPool.
+
+   The operation is called as fn(*args, progress=progress, **kwargs). It reports its work
+   to the Progress, which is forwarded as progress signals at most every interval seconds,
+   and stops by raising OperationCancelled once cancel has been called.
+
+   Attributes:
+      signals (WorkerSignals): The signals reporting the progress and the outcome.
+      token (CancellationToken): The token set by cancel.
+      progress (Progress): The progress passed to the operation.
+   """
+
+   def __init__(self, fn, *args, **kwargs):
+      super().__init__()
+      self.logger = logging.getLogger(__name__)
+      self.fn = fn
+      self.args = args
+      self.kwargs = kwargs
+      self.signals = WorkerSignals()
+      self.token = CancellationToken()
+      self.progress = Progress(self._emit_progress, self.token)
+
+   def run(self):
+      self.logger.log(TRACE, "Entering run with args: arg1=%s", getattr(self.fn, '__qualname__', self.fn))
+      try:
+         result = self.fn(*self.args, progress=self.progress, **self.kwargs)
+      except OperationCancelled:
+         self.logger.info("Background operation cancelled")
+         self.signals.cancelled.emit()
+      except Exception as e:
+         self.logger.exception(f"Background operation failed: {e}")
+         self.signals.failed.emit(str(e))
+      else:
+         self.signals.finished.emit(result)
+         self.logger.log(TRACE, "Exiting run with result: %s", result)
+
+   def cancel(self):
+      """
+      Ask the operation to stop. It stops the next time it reports progress.
+      """
+      self.token.cancel()
+
+   def _emit_progress(self, progress):
+      self.signals.progress.emit(progress.done, progress.total, progress.bytes_done, progress.eta, progress.unit)
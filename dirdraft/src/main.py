@@ -3,6 +3,7 @@ import logging
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QIcon, QImage, QPixmap
 from gui.main_window import MainWindow
+from core.lifecycle import LifecycleRegistry
 from utils.logger import setup_logger
 
 def main(directory):
@@ -17,7 +18,10 @@ def main(directory):
    
    main_window = MainWindow()
    main_window.show()
-   sys.exit(app.exec_())
+   exit_code = app.exec_()
+   # Report how many nodes and templates were created and released, if tracking is enabled
+   LifecycleRegistry().log_summary()
+   sys.exit(exit_code)
 
 if __name__ == "__main__":
    main("")
@@ -0,0 +1,199 @@
+import mmap
+import logging
+
+from core.node import Node, validate_names
+from core.template import Template
+from utils.template_writer import TemplateWriter
+from utils.logger import TRACE
+
+# File signature and version of the binary template format
+MAGIC = b"DDTB"
+VERSION = 1
+BINARY_EXTENSION = ".ddt"
+
+def is_binary_template(file_path):
+   """
+   Return whether a file starts with the binary template signature.
+   """
+   with open(file_path, 'rb') as file:
+      return file.read(len(MAGIC)) == MAGIC
+
+def encode_varint(value, buffer):
+   """
+   Append an unsigned LEB128 integer to a bytearray.
+   """
+   while value >= 0x80:
+      buffer.append((value & 0x7F) | 0x80)
+      value >>= 7
+   buffer.append(value)
+
+def encode_string(text, buffer):
+   data = text.encode('utf-8')
+   encode_varint(len(data), buffer)
+   buffer += data
+
+class BinaryTemplateWriter(TemplateWriter):
+   """
+   Writes templates in the compact binary format.
+
+   Layout, all integers unsigned LEB128 varints and all strings a varint byte length
+   followed by UTF-8:
+
+      MAGIC, version byte
+      node count, template name, root node path
+      string table: count, strings (every node type and tag, each stored once)
+      nodes in preorder: name, type index, tag count, tag indices, child count
+
+   Paths of non-root nodes are derived from the parent chain and not stored. The header
+   needs the node count and string table, so the node block is encoded in memory first;
+   it takes a few bytes per node. Saving is atomic, as with TemplateWriter.
+   """
+
+   MODE = 'wb'
+
+   def iter_chunks(self, template, progress=None):
+      root_node = template.root_node
+      strings = {}
+      nodes = bytearray()
+      node_count = 0
+
+      stack = [root_node]
+      while stack:
+         node = stack.pop()
+         node_count += 1
+         if progress is not None:
+            progress.advance()
+         encode_string(node.name, nodes)
+         encode_varint(strings.setdefault(node.type, len(strings)), nodes)
+         encode_varint(len(node.tags), nodes)
+         for tag in node.tags:
+            encode_varint(strings.setdefault(tag, len(strings)), nodes)
+         children = list(node.iter_children())
+         encode_varint(len(children), nodes)
+         stack.extend(reversed(children))
+
+      header = bytearray(MAGIC)
+      header.append(VERSION)
+      encode_varint(node_count, header)
+      encode_string(template.name, header)
+      encode_string(root_node.path, header)
+      encode_varint(len(strings), header)
+      for text in strings:
+         encode_string(text, header)
+      yield bytes(header)
+      yield bytes(nodes)
+
+class BinaryTemplateReader:
+   """
+   Loads templates written by BinaryTemplateWriter.
+
+   The file is memory mapped and decoded in a single pass. The counts stored in the file
+   size the storage up front: the node count from the header bounds the decoding and
+   sizes the progress, and each parent's child count preallocates the list its children
+   are decoded into, which is then attached in one batch, as Node.deserialize does.
+   """
+
+   def __init__(self):
+      self.logger = logging.getLogger(__name__)
+
+   def load(self, file_path, progress=None):
+      self.logger.log(TRACE, "Entering load with args: arg1=%s", file_path)
+      with open(file_path, 'rb') as file:
+         with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            template = self.decode(data, progress)
+      self.logger.log(TRACE, "Exiting load with result: %s", template.name)
+      return template
+
+   def decode(self, data, progress=None):
+      """
+      Build a template from a bytes-like object holding a binary template, reporting each
+      decoded node to progress, if given.
+      """
+      if data[:len(MAGIC)] != MAGIC:
+         raise ValueError("Not a binary template")
+      position = len(MAGIC)
+      if data[position] != VERSION:
+         raise ValueError(f"Unsupported binary template version: {data[position]}")
+      position += 1
+
+      def read_varint():
+         nonlocal position
+         result = shift = 0
+         while True:
+            byte = data[position]
+            position += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+               return result
+            shift += 7
+
+      def read_string():
+         nonlocal position
+         length = read_varint()
+         start = position
+         position += length
+         return data[start:position].decode('utf-8')
+
+      node_count = read_varint()
+      # Every node takes at least four bytes, so a larger count means a damaged header
+      if node_count * 4 > len(data):
+         raise ValueError(f"Binary template header says {node_count} nodes, more than the file can hold")
+      template_name = read_string()
+      root_path = read_string()
+      strings = [read_string() for _ in range(read_varint())]
+      if progress is not None:
+         progress.start(node_count, "nodes")
+
+      def read_node():
+         nonlocal position
+         name = read_string()
+         # Type and tag indices almost always fit in a single byte
+         index = data[position]
+         if index < 0x80:
+            position += 1
+         else:
+            index = read_varint()
+         node_type = strings[index]
+         tag_count = data[position]
+         if tag_count == 0:
+            position += 1
+            tags = ()
+         else:
+            tags = tuple([strings[read_varint()] for _ in range(read_varint())])
+         child_count = data[position]
+         if child_count < 0x80:
+            position += 1
+         else:
+            child_count = read_varint()
+         return name, node_type, tags, child_count
+
+      name, node_type, tags, child_count = read_node()
+      root_node = Node(name, root_path, node_type, tags)
+      decoded = 1
+
+      # Each stack entry is a parent, its preallocated children and the number read so far
+      stack = [[root_node, [None] * child_count, 0]] if child_count else []
+      from_trusted = Node.from_trusted
+      while stack:
+         entry = stack[-1]
+         children = entry[1]
+         if entry[2] == len(children):
+            stack.pop()
+            validate_names([child.name for child in children])
+            entry[0].add_children(children)
+            continue
+         if decoded == node_count:
+            raise ValueError(f"Binary template holds more nodes than the {node_count} its header says")
+         name, node_type, tags, child_count = read_node()
+         child = from_trusted(name, None, node_type, tags)
+         children[entry[2]] = child
+         entry[2] += 1
+         decoded += 1
+         if progress is not None:
+            progress.advance()
+         if child_count:
+            stack.append([child, [None] * child_count, 0])
+
+      if decoded != node_count:
+         raise ValueError(f"Binary template holds {decoded} nodes, header says {node_count}")
+      return Template(root_node, template_name)
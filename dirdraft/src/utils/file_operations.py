@@ -9,17 +9,22 @@ class FileOperations:
    def create_directory(self, path):
       try:
          os.makedirs(path, exist_ok=True)
-         self.logger.info(f"Created directory: {path}")
+         self.logger.debug("Created directory: %s", path)
+         return True
       except Exception as e:
          self.logger.error(f"Error creating directory {path}: {e}")
+         return False
 
    def create_file(self, path):
       try:
-         with open(path, 'w') as f:
+         # Append mode creates the file without truncating an existing one
+         with open(path, 'a') as f:
                pass
-         self.logger.info(f"Created file: {path}")
+         self.logger.debug("Created file: %s", path)
+         return True
       except Exception as e:
          self.logger.error(f"Error creating file {path}: {e}")
+         return False
 
    def delete_file(self, path):
       try:
@@ -1,17 +1,110 @@
 from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem, QStyle, QApplication
 from PyQt5.QtGui import QTextDocument, QPalette, QAbstractTextDocumentLayout, QBrush
 from PyQt5.QtCore import Qt
+from collections import OrderedDict
+import html
+from functools import lru_cache
+
+from utils.styles import TAG_STYLES, TAG_PRECEDENCE, NO_STYLE
+
+def get_tag_style(tags):
+   """
+   Return the style of the tag with the highest precedence, or None if no tag is styled.
+   """
+   for tag in TAG_PRECEDENCE:
+      if tag in tags:
+         return TAG_STYLES[tag]
+   return None
+
+def get_styled_text(text, style):
+   """
+   Escape text as HTML and wrap it in a span with the given style, if there is one.
+   """
+   text = html.escape(text)
+   if style:
+      return f"<span style='{style}'>{text}</span>"
+   return text
+
+def get_tags_html(tags):
+   """
+   Return the tags as a comma separated list, each tag in its own style.
+   """
+   return ", ".join(get_styled_text(tag, TAG_STYLES.get(tag)) for tag in tags)
+
+# Number of rendered texts and laid out documents kept in the render caches
+RENDER_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_text(text, tags, stylized):
+   """
+   Return the text shown for a name, type or path of a node with the given tags. Styled
+   text is HTML, with the text itself escaped, so names are never read as markup.
+
+   Tags are the interned tuples held by nodes, so results are cached per (text, tags,
+   mode). An edited node has a new text or new tags, so it never hits a stale entry.
+   """
+   if not stylized:
+      return text
+   return get_styled_text(text, get_tag_style(tags) or NO_STYLE)
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_tags(tags, stylized):
+   """
+   Return the text shown for the tags of a node.
+   """
+   return get_tags_html(tags) if stylized else ", ".join(tags)
 
 class HTMLDelegate(QStyledItemDelegate):
+   """
+   Paints item text that contains HTML markup.
+
+   Laid out documents are cached by their HTML, which is fully determined by the text,
+   tags and styling mode of the row, so repainting a row while scrolling does not parse
+   or lay out anything. Text without markup is painted by the base class.
+
+   Attributes:
+      cache_size (int): The number of documents kept, least recently used are dropped first.
+      rich_text (bool): Whether item texts are HTML, as rendered in the stylized mode.
+         Plain texts are painted as they are, even if they contain a '<'.
+   """
+
+   def __init__(self, parent=None, cache_size=RENDER_CACHE_SIZE):
+      super().__init__(parent)
+      self.cache_size = cache_size
+      self.rich_text = False
+      self._documents = OrderedDict()
+
+   def document(self, html):
+      """
+      Return the laid out document of an HTML text, from the cache when possible.
+      """
+      documents = self._documents
+      doc = documents.get(html)
+      if doc is not None:
+         documents.move_to_end(html)
+         return doc
+      doc = QTextDocument()
+      doc.setDocumentMargin(2)  # Add a small margin around the text
+      doc.setHtml(html)
+      documents[html] = doc
+      if len(documents) > self.cache_size:
+         documents.popitem(last=False)
+      return doc
+
+   def clear_cache(self):
+      self._documents.clear()
+
    def paint(self, painter, option, index):
       options = QStyleOptionViewItem(option)
       self.initStyleOption(options, index)
 
+      if not self.rich_text or "<" not in options.text:
+         super().paint(painter, option, index)
+         return
+
       style = options.widget.style() if options.widget else QApplication.style()
 
-      doc = QTextDocument()
-      doc.setHtml(options.text)
-      doc.setDocumentMargin(2)  # Add a small margin around the text
+      doc = self.document(options.text)
 
       options.text = ""
       style.drawControl(QStyle.CE_ItemViewItem, options, painter)
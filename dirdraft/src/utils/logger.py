@@ -1,25 +1,125 @@
+import os
+import queue
+import atexit
 import logging
+import itertools
+from logging.handlers import QueueHandler, QueueListener
 
-def setup_logger():
-   # Configure the root logger
-   logger = logging.getLogger()
-   logger.setLevel(logging.INFO)
+# Level of the per-call "Entering"/"Exiting" and per-node records, below DEBUG
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+_listener = None
+
+class SamplingFilter(logging.Filter):
+   """
+   Lets through one in every `interval` records at or below `max_level`.
+
+   Records above max_level always pass, so sampling trace output never hides warnings.
+
+   Attributes:
+      interval (int): Keep one record in this many.
+      max_level (int): The highest level that is sampled.
+   """
+
+   def __init__(self, interval, max_level=TRACE):
+      super().__init__()
+      self.interval = max(1, int(interval))
+      self.max_level = max_level
+      self._counter = itertools.count()
+
+   def filter(self, record):
+      if record.levelno > self.max_level:
+         return True
+      return next(self._counter) % self.interval == 0
 
-   # Create a file handler
-   file_handler = logging.FileHandler("dirdraft.log")
-   file_handler.setLevel(logging.INFO)
+def parse_level(level):
+   """
+   Return the numeric logging level for a level name such as 'TRACE' or 'info', or a number.
+   """
+   if isinstance(level, int):
+      return level
+   if level.strip().isdigit():
+      return int(level)
+   value = logging.getLevelName(level.strip().upper())
+   if not isinstance(value, int):
+      raise ValueError(f"Unknown logging level: {level}")
+   return value
 
-   # Create a console handler
-   console_handler = logging.StreamHandler()
-   console_handler.setLevel(logging.INFO)
+def setup_logger(level=None, log_file="dirdraft.log", console=True, sample_interval=None):
+   """
+   Configure the root logger to hand records to a background thread.
+
+   Records are put on a queue by a QueueHandler and written to the log file and the
+   console by a QueueListener thread, so callers never wait for I/O. Messages use lazy
+   %-style arguments and are only formatted for records that pass the level check.
+
+   Args:
+      level: The root level, as a name or number. Defaults to the DIRDRAFT_LOG_LEVEL
+         environment variable, or INFO. Use TRACE to include entry/exit records.
+      log_file (str): The log file, opened on the first record. None disables it.
+      console (bool): Whether to also log to the console.
+      sample_interval (int): Keep one TRACE record in this many. Defaults to the
+         DIRDRAFT_LOG_SAMPLE environment variable, or every record.
+
+   Returns:
+      tuple: The file handler and console handler, None for those that are disabled.
+   """
+   global _listener
+   level = parse_level(level if level is not None else os.environ.get("DIRDRAFT_LOG_LEVEL", "INFO"))
+   if sample_interval is None:
+      sample_interval = int(os.environ.get("DIRDRAFT_LOG_SAMPLE", "1"))
+
+   shutdown_logger()
+
+   formatter = logging.Formatter(LOG_FORMAT)
+   file_handler = None
+   console_handler = None
+   handlers = []
+   if log_file:
+      # The log file is only opened when the first record is written
+      file_handler = logging.FileHandler(log_file, delay=True)
+      handlers.append(file_handler)
+   if console:
+      console_handler = logging.StreamHandler()
+      handlers.append(console_handler)
+   # Levels are checked by the loggers before a record is queued, so the handlers take
+   # every record they receive. Changing the level never drops records already queued.
+   for handler in handlers:
+      handler.setFormatter(formatter)
+
+   log_queue = queue.SimpleQueue()
+   queue_handler = QueueHandler(log_queue)
+   if sample_interval > 1:
+      queue_handler.addFilter(SamplingFilter(sample_interval))
+
+   # Configure the root logger
+   logger = logging.getLogger()
+   logger.setLevel(level)
+   for handler in [handler for handler in logger.handlers if isinstance(handler, QueueHandler)]:
+      logger.removeHandler(handler)
+   logger.addHandler(queue_handler)
 
-   # Create a formatter and add it to the handlers
-   formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
-   file_handler.setFormatter(formatter)
-   console_handler.setFormatter(formatter)
+   _listener = QueueListener(log_queue, *handlers)
+   _listener.start()
+   return file_handler, console_handler
 
-   # Add the handlers to the root logger
-   logger.addHandler(file_handler)
-   logger.addHandler(console_handler)
+def set_level(level):
+   """
+   Change the level of the root logger, e.g. to turn tracing on or off at runtime.
+   """
+   logging.getLogger().setLevel(parse_level(level))
 
-   return file_handler, console_handler
\ No newline at end of file
+@atexit.register
+def shutdown_logger():
+   """
+   Stop the background logging thread after writing the queued records.
+   """
+   global _listener
+   if _listener is not None:
+      _listener.stop()
+      for handler in _listener.handlers:
+         handler.close()
+      _listener = None
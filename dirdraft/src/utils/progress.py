@@ -0,0 +1,112 @@
+import time
+import threading
+
+class OperationCancelled(Exception):
+   """
+   Raised inside a long running operation once its cancellation token is set.
+   """
+
+class CancellationToken:
+   """
+   A flag shared between the thread asking for a cancellation and the thread doing the work.
+
+   Cancellation is cooperative: the operation checks the token as it reports progress and
+   stops by raising OperationCancelled.
+   """
+
+   def __init__(self):
+      self._event = threading.Event()
+
+   def cancel(self):
+      self._event.set()
+
+   def is_cancelled(self):
+      return self._event.is_set()
+
+   def raise_if_cancelled(self):
+      if self._event.is_set():
+         raise OperationCancelled()
+
+class Progress:
+   """
+   Tracks the progress of a long running operation, such as loading, saving, scanning or
+   executing a template.
+
+   The operation calls start with the amount of work, when it is known, and advance as
+   work gets done. advance only adds to the counters and reads the clock; every interval
+   seconds it also checks the cancellation token and calls the callback, so it is cheap
+   enough to call once per node. An operation with several phases calls start again for
+   each phase.
+
+   Attributes:
+      done (int): The units of work done in the current phase.
+      total (int): The units of work in the current phase, or None if unknown.
+      unit (str): What is counted, e.g. 'nodes', 'bytes' or 'folders'.
+      bytes_done (int): The bytes read or written in the current phase.
+      callback (callable): Called with the Progress at most once per interval.
+      token (CancellationToken): The token checked for a cancellation.
+      interval (float): The minimum number of seconds between callbacks.
+   """
+
+   def __init__(self, callback=None, token=None, interval=0.1):
+      self.callback = callback
+      self.token = token or CancellationToken()
+      self.interval = interval
+      self.start()
+
+   def __repr__(self):
+      return f"Progress(Done: {self.done}, Total: {self.total}, Unit: {self.unit}, Bytes: {self.bytes_done})"
+
+   def start(self, total=None, unit="nodes"):
+      """
+      Begin a phase of the operation with the given amount of work.
+      """
+      self.token.raise_if_cancelled()
+      self.done = 0
+      self.total = total
+      self.unit = unit
+      self.bytes_done = 0
+      self.started_at = time.monotonic()
+      self._next_report = self.started_at
+      self.report()
+
+   def advance(self, count=1, nbytes=0):
+      """
+      Add to the work done. Raises OperationCancelled if the operation was cancelled.
+      """
+      self.done += count
+      self.bytes_done += nbytes
+      if time.monotonic() >= self._next_report:
+         self.report()
+
+   def report(self):
+      """
+      Check for a cancellation and call the callback, whatever the time since the last call.
+      """
+      self.token.raise_if_cancelled()
+      self._next_report = time.monotonic() + self.interval
+      if self.callback is not None:
+         self.callback(self)
+
+   @property
+   def elapsed(self):
+      return time.monotonic() - self.started_at
+
+   @property
+   def fraction(self):
+      """
+      The part of the current phase that is done, between 0 and 1, or None if the total is unknown.
+      """
+      if not self.total:
+         return None
+      return min(1.0, self.done / self.total)
+
+   @property
+   def eta(self):
+      """
+      The estimated seconds until the current phase is done, or None if it cannot be estimated yet.
+      """
+      if not self.total or not self.done:
+         return None
+      rate = self.done / max(self.elapsed, 1e-9)
+      return max(0.0, (self.total - self.done) / rate)
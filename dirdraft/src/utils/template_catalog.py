@@ -0,0 +1,254 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from collections import Counter
+
+from core.traversal import iter_nodes
+from utils.template_loader import TemplateLoader
+from utils.template_writer import get_target_mode
+from utils.binary_format import BINARY_EXTENSION
+from utils.logger import TRACE
+
+INDEX_FILE_NAME = ".dirdraft_index.json"
+INDEX_VERSION = 1
+TEMPLATE_EXTENSIONS = (".json", BINARY_EXTENSION)
+
+class CatalogEntry:
+   """
+   Summary of one template file, kept in the catalog index.
+
+   Attributes:
+      file_name (str): The name of the template file in the templates directory.
+      name (str): The name of the template.
+      node_count (int): The number of nodes in the template, root node included.
+      tag_counts (dict): The number of nodes carrying each tag.
+      mtime (int): The modification time of the file in nanoseconds when it was indexed.
+      size (int): The size of the file in bytes when it was indexed.
+      content_hash (str): The SHA-256 digest of the file contents.
+      preview (list): [name, type] pairs for the first children of the root node.
+   """
+
+   FIELDS = ('file_name', 'name', 'node_count', 'tag_counts', 'mtime', 'size', 'content_hash', 'preview')
+
+   def __init__(self, file_name, name, node_count, tag_counts, mtime, size, content_hash, preview):
+      self.file_name = file_name
+      self.name = name
+      self.node_count = node_count
+      self.tag_counts = tag_counts
+      self.mtime = mtime
+      self.size = size
+      self.content_hash = content_hash
+      self.preview = preview
+
+   def __repr__(self):
+      return f"CatalogEntry(File: {self.file_name}, Name: {self.name}, Nodes: {self.node_count})"
+
+   def to_dict(self):
+      return {field: getattr(self, field) for field in self.FIELDS}
+
+   @classmethod
+   def from_dict(cls, data):
+      return cls(*(data[field] for field in cls.FIELDS))
+
+   def matches(self, query=None, tags=None):
+      """
+      Return whether the name or file name contains query and the template uses all the given tags.
+      """
+      if query:
+         query = query.lower()
+         if query not in self.name.lower() and query not in self.file_name.lower():
+            return False
+      if tags:
+         return all(tag in self.tag_counts for tag in tags)
+      return True
+
+class CatalogFailure:
+   """
+   A template file that could not be read, kept in the catalog index so that it is only
+   read again once it changes.
+
+   Attributes:
+      file_name (str): The name of the template file in the templates directory.
+      mtime (int): The modification time of the file in nanoseconds when it was read.
+      size (int): The size of the file in bytes when it was read.
+      error (str): Why the file could not be read.
+   """
+
+   FIELDS = ('file_name', 'mtime', 'size', 'error')
+
+   def __init__(self, file_name, mtime, size, error):
+      self.file_name = file_name
+      self.mtime = mtime
+      self.size = size
+      self.error = error
+
+   def __repr__(self):
+      return f"CatalogFailure(File: {self.file_name}, Error: {self.error})"
+
+   def to_dict(self):
+      return {field: getattr(self, field) for field in self.FIELDS}
+
+   @classmethod
+   def from_dict(cls, data):
+      return cls(*(data[field] for field in cls.FIELDS))
+
+class TemplateCatalog:
+   """
+   Index of the templates in a templates directory, stored next to them.
+
+   The catalog lets templates be listed, searched and previewed without loading them.
+   refresh() lists the directory once and only re-reads files whose modification time or
+   size changed since they were indexed, so refreshing a large shared directory is cheap.
+   Files that cannot be read are recorded as failures in the same way, so a broken
+   template is not read again on every refresh.
+
+   Attributes:
+      templates_dir (str): The directory holding the template files.
+      index_path (str): The path of the index file.
+   """
+
+   PREVIEW_SIZE = 20
+
+   def __init__(self, templates_dir):
+      self.logger = logging.getLogger(__name__)
+      self.templates_dir = templates_dir
+      self.index_path = os.path.join(templates_dir, INDEX_FILE_NAME)
+      self._entries, self._failures = self._read_index()
+
+   def entries(self):
+      """
+      Return the catalog entries sorted by template name.
+      """
+      return sorted(self._entries.values(), key=lambda entry: (entry.name.lower(), entry.file_name))
+
+   def get(self, file_name):
+      return self._entries.get(file_name)
+
+   def failures(self):
+      """
+      Return the template files that could not be read, sorted by file name.
+      """
+      return sorted(self._failures.values(), key=lambda failure: failure.file_name)
+
+   def search(self, query=None, tags=None):
+      return [entry for entry in self.entries() if entry.matches(query, tags)]
+
+   def path_of(self, entry):
+      return os.path.join(self.templates_dir, entry.file_name)
+
+   def refresh(self, progress=None):
+      """
+      Bring the index in line with the templates directory and save it if anything changed.
+      Each template that has to be indexed again is reported to progress, if given.
+
+      Returns:
+         int: The number of entries and failures that were added, updated or removed.
+      """
+      self.logger.log(TRACE, "Entering refresh with args: arg1=%s", self.templates_dir)
+      current = {}
+      try:
+         with os.scandir(self.templates_dir) as iterator:
+            for entry in iterator:
+               # Dotfiles, such as the index itself, are never templates
+               if entry.name.startswith('.') or not entry.name.endswith(TEMPLATE_EXTENSIONS):
+                  continue
+               if entry.is_file():
+                  stat = entry.stat()
+                  current[entry.name] = (stat.st_mtime_ns, stat.st_size)
+      except OSError as e:
+         self.logger.warning(f"Error scanning templates directory {self.templates_dir}: {e}")
+
+      changes = 0
+      for records in (self._entries, self._failures):
+         for file_name in [name for name in records if name not in current]:
+            del records[file_name]
+            changes += 1
+
+      stale = []
+      for file_name, (mtime, size) in current.items():
+         entry = self._entries.get(file_name) or self._failures.get(file_name)
+         if entry is None or entry.mtime != mtime or entry.size != size:
+            stale.append((file_name, mtime, size))
+      if progress is not None:
+         progress.start(len(stale), "templates")
+
+      try:
+         for file_name, mtime, size in stale:
+            if progress is not None:
+               progress.advance(1, size)
+            try:
+               new_entry = self._index_file(file_name, mtime, size)
+            except Exception as e:
+               self.logger.warning(f"Skipping template {os.path.join(self.templates_dir, file_name)}: {e}")
+               self._entries.pop(file_name, None)
+               self._failures[file_name] = CatalogFailure(file_name, mtime, size, str(e))
+               changes += 1
+               continue
+            self._failures.pop(file_name, None)
+            self._entries[file_name] = new_entry
+            changes += 1
+      finally:
+         # A cancelled refresh still saves the entries it updated
+         if changes:
+            self._write_index()
+      self.logger.log(TRACE, "Exiting refresh with result: %s", changes)
+      return changes
+
+   def _index_file(self, file_name, mtime, size):
+      # Errors are left to refresh, which records them as failures
+      file_path = os.path.join(self.templates_dir, file_name)
+      digest = hashlib.sha256()
+      with open(file_path, 'rb') as file:
+         for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+      template = TemplateLoader().load(file_path)
+
+      node_count = 0
+      tag_counts = Counter()
+      for node in iter_nodes(template.root_node):
+         node_count += 1
+         tag_counts.update(node.tags)
+      preview = []
+      for child in template.root_node.iter_children():
+         if len(preview) == self.PREVIEW_SIZE:
+            break
+         preview.append([child.name, child.type])
+      return CatalogEntry(file_name, template.name, node_count, dict(tag_counts), mtime, size, digest.hexdigest(), preview)
+
+   def _read_index(self):
+      # Returns the entries and the failures, both by file name
+      try:
+         with open(self.index_path, 'r') as file:
+            data = json.load(file)
+         if data.get('version') != INDEX_VERSION:
+            return {}, {}
+         entries = {name: CatalogEntry.from_dict(entry) for name, entry in data['entries'].items()}
+         # Indexes written before failures were recorded have none
+         failures = {name: CatalogFailure.from_dict(failure) for name, failure in data.get('failures', {}).items()}
+         return entries, failures
+      except FileNotFoundError:
+         return {}, {}
+      except (OSError, ValueError, KeyError, TypeError) as e:
+         self.logger.warning(f"Ignoring unreadable template index {self.index_path}: {e}")
+         return {}, {}
+
+   def _write_index(self):
+      data = {
+         'version': INDEX_VERSION,
+         'entries': {name: entry.to_dict() for name, entry in self._entries.items()},
+         'failures': {name: failure.to_dict() for name, failure in self._failures.items()},
+      }
+      try:
+         fd, temp_path = tempfile.mkstemp(dir=self.templates_dir, prefix=f"{INDEX_FILE_NAME}.", suffix=".tmp")
+         try:
+            with open(fd, 'w') as file:
+               json.dump(data, file)
+            os.chmod(temp_path, get_target_mode(self.index_path))
+            os.replace(temp_path, self.index_path)
+         except BaseException:
+            os.unlink(temp_path)
+            raise
+      except OSError as e:
+         self.logger.warning(f"Could not save template index {self.index_path}: {e}")
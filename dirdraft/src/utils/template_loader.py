@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import logging
+from json.decoder import scanstring
+
+from core.node import Node, SERIALIZED_KEYS, COMPACT_KEYS
+from core.template import Template
+from utils.template_writer import COMPACT_FORMAT
+from utils.binary_format import BinaryTemplateReader, is_binary_template
+from utils.logger import TRACE
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?')
+CONSTANTS = {'true': True, 'false': False, 'null': None}
+
+def parse_json(text):
+   """
+   Parse a JSON document with an explicit stack instead of recursion.
+
+   json.loads recurses once per nesting level and fails on templates a few hundred
+   folders deep. This parser has no depth limit and is used as a fallback for them.
+   """
+   skip = WHITESPACE.match
+   match_number = NUMBER.match
+   # Each stack entry is a container being filled and, for objects, the pending key
+   stack = []
+   result = None
+   index = skip(text, 0).end()
+   expecting_value = True
+   while True:
+      if expecting_value:
+         char = text[index:index + 1]
+         if char == '{' or char == '[':
+            container = {} if char == '{' else []
+            index = skip(text, index + 1).end()
+            closing = '}' if char == '{' else ']'
+            if text[index:index + 1] == closing:
+               value = container
+               index += 1
+            else:
+               stack.append([container, None])
+               if char == '{':
+                  index = _parse_key(text, index, stack[-1], skip)
+               continue
+         elif char == '"':
+            value, index = scanstring(text, index + 1)
+         else:
+            for literal, constant in CONSTANTS.items():
+               if text.startswith(literal, index):
+                  value = constant
+                  index += len(literal)
+                  break
+            else:
+               number = match_number(text, index)
+               if number is None:
+                  raise json.JSONDecodeError("Expecting value", text, index)
+               literal = number.group()
+               value = float(literal) if '.' in literal or 'e' in literal or 'E' in literal else int(literal)
+               index = number.end()
+         expecting_value = False
+
+      # Store the finished value in its container, closing containers as they end
+      if not stack:
+         result = value
+         break
+      container, key = stack[-1]
+      if key is None:
+         container.append(value)
+      else:
+         container[key] = value
+      index = skip(text, index).end()
+      char = text[index:index + 1]
+      if char == ',':
+         index = skip(text, index + 1).end()
+         if key is not None:
+            index = _parse_key(text, index, stack[-1], skip)
+         expecting_value = True
+      elif char == (']' if key is None else '}'):
+         stack.pop()
+         value = container
+         index += 1
+      else:
+         raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
+
+   index = skip(text, index).end()
+   if index != len(text):
+      raise json.JSONDecodeError("Extra data", text, index)
+   return result
+
+def resolve_subtree_refs(root_data, subtrees, keys):
+   """
+   Replace {"ref": digest} children with the shared lists from the subtrees table.
+
+   Every reference to a digest is replaced with the same list object, so repeated
+   contents are held once in memory. The table entries are resolved as well.
+   """
+   children_key = keys['children']
+   stack = [root_data]
+   for children in subtrees.values():
+      stack.extend(children)
+   while stack:
+      data = stack.pop()
+      children = data.get(children_key)
+      if isinstance(children, dict):
+         data[children_key] = subtrees[children['ref']]
+      elif children:
+         stack.extend(children)
+
+def _parse_key(text, index, entry, skip):
+   if text[index:index + 1] != '"':
+      raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, index)
+   key, index = scanstring(text, index + 1)
+   index = skip(text, index).end()
+   if text[index:index + 1] != ':':
+      raise json.JSONDecodeError("Expecting ':' delimiter", text, index)
+   entry[1] = key
+   return skip(text, index + 1).end()
+
+class TemplateLoader:
+   """
+   Loads templates saved by TemplateWriter, building the node tree lazily.
+
+   The whole file is read and parsed before anything is returned, so the parsed data of
+   every node is in memory. Only turning it into Node objects is deferred: the first
+   eager_depth levels below the root are built when the file is loaded, and deeper
+   subtrees are built one level at a time when their parent's children are first
+   accessed, e.g. when a folder is expanded in the tree view. Files are parsed by
+   json.loads, or by parse_json when they are nested too deeply for it, so templates
+   of any depth can be read back. Both the indented and the
+   compact format are supported. Binary templates are recognized by their signature and
+   always built in full, as decoding them is cheap.
+
+   Templates saved with shared subtrees keep each shared contents as one parsed list.
+   Folders holding it are left unbuilt at any depth, and build their own nodes from it
+   when accessed.
+
+   Attributes:
+      eager_depth (int): The number of levels built on load, or None to build the whole tree.
+   """
+
+   READ_CHUNK_SIZE = 1 << 20
+
+   def __init__(self, eager_depth=None):
+      self.logger = logging.getLogger(__name__)
+      self.eager_depth = eager_depth
+
+   def load(self, file_path, progress=None):
+      """
+      Load a template. Progress, if given, receives the bytes read from a JSON template or
+      the nodes decoded from a binary one, and can cancel the load.
+      """
+      self.logger.log(TRACE, "Entering load with args: arg1=%s", file_path)
+      if is_binary_template(file_path):
+         template = BinaryTemplateReader().load(file_path, progress)
+         self.logger.log(TRACE, "Exiting load with result: %s", template.name)
+         return template
+      template_data = self.read(file_path, progress)
+      keys = COMPACT_KEYS if template_data.get('format') == COMPACT_FORMAT else SERIALIZED_KEYS
+      shared = ()
+      subtrees = template_data.get('subtrees')
+      if subtrees:
+         resolve_subtree_refs(template_data['root_node'], subtrees, keys)
+         shared = {id(children) for children in subtrees.values()}
+      root_node = Node.deserialize(template_data['root_node'], keys, self.eager_depth, shared)
+      template = Template(root_node, template_data['name'])
+      self.logger.log(TRACE, "Exiting load with result: %s", template.name)
+      return template
+
+   def read(self, file_path, progress=None):
+      """
+      Return the parsed contents of a template file.
+      """
+      with open(file_path, 'r') as file:
+         if progress is None:
+            text = file.read()
+         else:
+            # Templates are saved as ASCII JSON, so characters and bytes are the same
+            progress.start(os.fstat(file.fileno()).st_size, "bytes")
+            chunks = []
+            for chunk in iter(lambda: file.read(self.READ_CHUNK_SIZE), ''):
+               chunks.append(chunk)
+               progress.advance(len(chunk), len(chunk))
+            text = ''.join(chunks)
+            progress.report()
+      try:
+         return json.loads(text)
+      except RecursionError:
+         # json.loads recurses once per nesting level, about two per folder level
+         self.logger.info(f"Template {file_path} is too deeply nested for json, parsing it iteratively")
+         return parse_json(text)
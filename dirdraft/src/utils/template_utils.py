@@ -1,50 +1,225 @@
 import os
-import json
 import logging
+from collections import OrderedDict
 from utils.singleton import Singleton
 
-from core.node import Node
-from core.template import Template
+from utils.template_writer import TemplateWriter
+from utils.binary_format import BinaryTemplateWriter
+from utils.template_catalog import TemplateCatalog
+from utils.template_loader import TemplateLoader
+from utils.progress import OperationCancelled
+
+class CachedTemplate:
+   """
+   A template held by the TemplateManager cache.
+
+   Attributes:
+      template (Template): The cached template.
+      file_path (str): The file the template was loaded from or saved to, or None.
+      mtime (int): The modification time of the file in nanoseconds when it was read or written.
+      size (int): The size of the file in bytes when it was read or written.
+      saved_state (tuple): The name and structural hash of the template when it was read
+         or written, or None if it has no file.
+      node_count (int): The number of nodes in the template, see update_node_count.
+   """
+
+   def __init__(self, template, file_path=None, mtime=None, size=None):
+      self.template = template
+      self.file_path = file_path
+      self.mtime = mtime
+      self.size = size
+      self.saved_state = self.get_state() if file_path is not None else None
+      self._counted_state = None
+      self.node_count = 0
+      self.update_node_count()
+
+   def __repr__(self):
+      return f"CachedTemplate(Name: {self.template.name}, File: {self.file_path}, Nodes: {self.node_count})"
+
+   def get_state(self):
+      """
+      Return the name and structural hash of the template. After an edit, only the hashes
+      of the edited nodes and their ancestors are recomputed, so this is cheap.
+      """
+      root_node = self.template.root_node
+      return (self.template.name, root_node.structural_hash if root_node is not None else None)
+
+   def is_current(self, stat):
+      """
+      Return whether the template still matches its file: the file is unchanged on disk
+      and the template has not been edited since it was read or written.
+      """
+      if self.mtime != stat.st_mtime_ns or self.size != stat.st_size:
+         return False
+      return self.saved_state is not None and self.get_state() == self.saved_state
+
+   def update_node_count(self):
+      """
+      Count the nodes again if the template was edited since they were last counted.
+      """
+      state = self.get_state()
+      if state != self._counted_state:
+         root_node = self.template.root_node
+         self.node_count = root_node.count_nodes() if root_node is not None else 0
+         self._counted_state = state
+      return self.node_count
 
 class TemplateManager(metaclass=Singleton):
    """
-   Singleton class to manage templates. It can store up to 10 templates.
+   Singleton class to manage templates, kept in a least recently used cache.
+
+   Templates are keyed by the absolute path of their file, or by their name while they
+   have not been saved. Loading a file returns the cached template without reading it
+   only if the file is unchanged on disk, judged by its modification time and size, and
+   the template has not been edited since it was read or written, judged by its
+   structural hash. When the cached templates hold more than max_nodes nodes, the least
+   recently used ones are evicted; the most recently used template is always kept. Node
+   counts are refreshed before evicting, so edits are accounted for.
+
+   Template files on disk are listed, searched and previewed through a TemplateCatalog per
+   templates directory, so they do not have to be loaded first.
+
+   Attributes:
+      templates (OrderedDict): Maps keys to CachedTemplate entries, least recently used first.
+      max_nodes (int): The node budget of the cache.
    """
-   
-   def __init__(self):
-      self.templates = []
+
+   DEFAULT_MAX_NODES = 2000000
+
+   def __init__(self, max_nodes=DEFAULT_MAX_NODES):
+      self.templates = OrderedDict()
+      self.catalogs = {}
+      self.max_nodes = max_nodes
       self.logger = logging.getLogger(__name__)
 
-   def add_template(self, template):
-      if len(self.templates) < 10:
-         self.templates.append(template)
+   def __len__(self):
+      return len(self.templates)
 
-   def remove_template(self, index):
-      if 0 <= index < len(self.templates):
-         del self.templates[index]
+   def __contains__(self, key):
+      return self._resolve_key(key) is not None
 
-   def get_template(self, index):
-      if 0 <= index < len(self.templates):
-         return self.templates[index]
-      return None
+   def set_budget(self, max_nodes):
+      self.max_nodes = max_nodes
+      self._evict()
+
+   def cached_node_count(self):
+      return sum(entry.update_node_count() for entry in self.templates.values())
 
-   def save_template(self, template, file_path):
-      template_data = {
-         'name': template.name,
-         'root_node': template.root_node.serialize()
-      }
-      with open(file_path, 'w') as file:
-         json.dump(template_data, file, indent=4)
+   def add_template(self, template, key=None):
+      """
+      Cache a template under the given key, or under its name, and return the key.
+      """
+      key = key or template.name
+      self._discard(template)
+      self.templates[key] = CachedTemplate(template)
+      self._evict()
+      return key
+
+   def remove_template(self, key):
+      key = self._resolve_key(key)
+      if key is not None:
+         del self.templates[key]
+
+   def get_template(self, key):
+      """
+      Return the template cached under a key, file path or template name, or None.
+      """
+      key = self._resolve_key(key)
+      if key is None:
+         return None
+      self.templates.move_to_end(key)
+      return self.templates[key].template
+
+   def get_catalog(self, templates_dir, refresh=True, progress=None):
+      """
+      Return the catalog of a templates directory, refreshed from the files on disk by default.
+      Refreshing reads every new or changed template, so the GUI runs it in the background.
+      """
+      templates_dir = os.path.abspath(templates_dir)
+      catalog = self.catalogs.get(templates_dir)
+      if catalog is None:
+         catalog = self.catalogs[templates_dir] = TemplateCatalog(templates_dir)
+      if refresh:
+         catalog.refresh(progress)
+      return catalog
+
+   def list_templates(self, templates_dir):
+      return self.get_catalog(templates_dir).entries()
+
+   def search_templates(self, templates_dir, query=None, tags=None):
+      return self.get_catalog(templates_dir).search(query, tags)
+
+   def preview_template(self, templates_dir, file_name):
+      return self.get_catalog(templates_dir, refresh=False).get(file_name)
+
+   def save_template(self, template, file_path, compact=False, binary=False, dedup=False, progress=None):
+      """
+      Save a template and cache it under its file path. Returns the new key.
+      """
+      # Stream the nodes to a temporary file and atomically replace the target
+      writer = BinaryTemplateWriter() if binary else TemplateWriter(compact, dedup)
+      writer.write(template, file_path, progress)
       self.logger.info(f"Saved template '{template.name}' to file '{file_path}'")
 
-   def load_template(self, file_path):
+      key = os.path.abspath(file_path)
+      stat = os.stat(key)
+      self._discard(template)
+      self.templates[key] = CachedTemplate(template, key, stat.st_mtime_ns, stat.st_size)
+      self._evict()
+      return key
+
+   def load_template(self, file_path, eager_depth=None, reload=False, progress=None):
+      """
+      Return the template stored in a file, reusing the cached one while neither the file
+      nor the template has changed.
+
+      A cached template with unsaved edits is replaced by the one read from the file, so
+      the result always matches the file. Pass reload=True to read the file in any case.
+      A cancelled load raises OperationCancelled, other errors are logged and return None.
+      """
+      key = os.path.abspath(file_path)
       try:
-         with open(file_path, 'r') as file:
-               template_data = json.load(file)
-         root_node = Node.deserialize(template_data['root_node'])
-         template = Template(root_node, template_data['name'])
+         stat = os.stat(key)
+         entry = self.templates.get(key)
+         if entry is not None and not reload and entry.is_current(stat):
+            self.templates.move_to_end(key)
+            self.logger.info(f"Reused cached template '{entry.template.name}' for file '{file_path}'")
+            return entry.template
+
+         # With eager_depth, deeper subtrees are only built when they are first accessed
+         template = TemplateLoader(eager_depth).load(file_path, progress)
          self.logger.info(f"Loaded template '{template.name}' from file '{file_path}'")
-         return template
+      except OperationCancelled:
+         raise
       except Exception as e:
          self.logger.error(f"Error loading template from {file_path}: {e}")
-         return None
\ No newline at end of file
+         return None
+
+      self.templates.pop(key, None)
+      self.templates[key] = CachedTemplate(template, key, stat.st_mtime_ns, stat.st_size)
+      self._evict()
+      return template
+
+   def _resolve_key(self, key):
+      if key in self.templates:
+         return key
+      if isinstance(key, str):
+         path = os.path.abspath(key)
+         if path in self.templates:
+            return path
+      for cached_key, entry in reversed(self.templates.items()):
+         if entry.template.name == key:
+            return cached_key
+      return None
+
+   def _discard(self, template):
+      # A template is cached under one key only, e.g. its name until it is first saved
+      for key in [key for key, entry in self.templates.items() if entry.template is template]:
+         del self.templates[key]
+
+   def _evict(self):
+      total = self.cached_node_count()
+      while total > self.max_nodes and len(self.templates) > 1:
+         key, entry = self.templates.popitem(last=False)
+         total -= entry.node_count
+         self.logger.info(f"Evicted template '{entry.template.name}' ({entry.node_count} nodes) from the cache")
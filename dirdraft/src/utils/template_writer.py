@@ -0,0 +1,206 @@
+import os
+import json
+import stat
+import logging
+import tempfile
+
+from core.node import SERIALIZED_KEYS, COMPACT_KEYS
+from core.dedup import find_shared_contents
+from utils.logger import TRACE
+
+# Marks templates saved in compact mode
+COMPACT_FORMAT = "dirdraft-compact-1"
+
+# Umask assumed where the process umask cannot be read
+DEFAULT_UMASK = 0o022
+
+def get_umask():
+   """
+   Return the current umask of the process without changing it.
+
+   os.umask can only read the umask by setting it, which races with other threads
+   creating files, so it is read from /proc/self/status instead. Where that is not
+   available, DEFAULT_UMASK is returned.
+   """
+   try:
+      with open('/proc/self/status') as status:
+         for line in status:
+            if line.startswith('Umask:'):
+               return int(line.split()[1], 8)
+   except (OSError, ValueError, IndexError):
+      pass
+   return DEFAULT_UMASK
+
+def get_target_mode(file_path):
+   """
+   Return the permission bits for a file replacing file_path: those of the existing file,
+   or the default for a new file under the umask.
+
+   Temporary files are created owner-only, so they get these bits before being renamed
+   over the target.
+   """
+   try:
+      return stat.S_IMODE(os.stat(file_path).st_mode)
+   except FileNotFoundError:
+      return 0o666 & ~get_umask()
+
+class TemplateWriter:
+   """
+   Streams a template to a JSON file while walking the node tree.
+
+   The nested dict built by Node.serialize is never materialized: each node is written
+   as soon as it is reached, using an explicit stack instead of recursion. The default
+   output is identical to json.dump(template_data, file, indent=4). Compact mode drops
+   the indentation, uses short keys and leaves out the derived paths of non-root nodes.
+
+   With dedup, folder contents that occur more than once are written a single time to a
+   "subtrees" table keyed by their digest, and every occurrence is written as
+   {"ref": digest}. Dedup implies the compact format, since shared contents have no
+   single path.
+
+   Files are written to a temporary file in the same directory and renamed over the
+   target, so a crash mid-save never leaves a truncated template behind.
+
+   Attributes:
+      compact (bool): Whether to write the compact format.
+      dedup (bool): Whether to share repeated folder contents.
+   """
+
+   BUFFER_SIZE = 1 << 20
+   MODE = 'w'
+
+   def __init__(self, compact=False, dedup=False):
+      self.logger = logging.getLogger(__name__)
+      self.compact = compact or dedup
+      self.dedup = dedup
+
+   def write(self, template, file_path, progress=None):
+      """
+      Save a template to a file. The written nodes and bytes are reported to progress, if
+      given; if the save is cancelled, the target file is left untouched.
+      """
+      self.logger.log(TRACE, "Entering write with args: arg1=%s, arg2=%s", template.name, file_path)
+      directory = os.path.dirname(os.path.abspath(file_path))
+      if progress is not None:
+         progress.start(template.root_node.count_nodes(), "nodes")
+      fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+      try:
+         with open(fd, self.MODE, buffering=self.BUFFER_SIZE) as file:
+            for chunk in self.iter_chunks(template, progress):
+               file.write(chunk)
+               if progress is not None:
+                  # JSON output is ASCII, so characters and bytes are the same
+                  progress.advance(0, len(chunk))
+            file.flush()
+            os.fsync(file.fileno())
+         os.chmod(temp_path, get_target_mode(file_path))
+         os.replace(temp_path, file_path)
+      except BaseException:
+         os.unlink(temp_path)
+         raise
+      self.logger.log(TRACE, "Exiting write.")
+
+   def iter_chunks(self, template, progress=None):
+      """
+      Yield the serialized template as a sequence of strings, reporting each node to progress.
+      """
+      dumps = json.dumps
+      if self.compact:
+         shared = find_shared_contents(template.root_node) if self.dedup else {}
+         yield f'{{"format":{dumps(COMPACT_FORMAT)},"name":{dumps(template.name)}'
+         if shared:
+            yield from self._iter_subtrees(shared, progress)
+         yield ',"root_node":'
+         yield from self._iter_compact_nodes(template.root_node, shared, progress=progress)
+         yield '}'
+      else:
+         yield f'{{\n    "name": {dumps(template.name)},\n    "root_node": '
+         yield from self._iter_indented_nodes(template.root_node, progress)
+         yield '\n}'
+
+   def _iter_indented_nodes(self, root_node, progress=None):
+      dumps = json.dumps
+      keys = SERIALIZED_KEYS
+      # The stack holds either text to emit or a (node, indent level) pair to expand
+      stack = [(root_node, 1)]
+      while stack:
+         item = stack.pop()
+         if isinstance(item, str):
+            yield item
+            continue
+         node, level = item
+         if progress is not None:
+            progress.advance()
+         inner = '\n' + '    ' * (level + 1)
+         if node.tags:
+            tags = '[' + ','.join(inner + '    ' + dumps(tag) for tag in node.tags) + inner + ']'
+         else:
+            tags = '[]'
+         yield (
+            '{' + inner + f'"{keys["name"]}": {dumps(node.name)},'
+            + inner + f'"{keys["path"]}": {dumps(node.path)},'
+            + inner + f'"{keys["type"]}": {dumps(node.type)},'
+            + inner + f'"{keys["tags"]}": {tags},'
+            + inner + f'"{keys["children"]}": '
+         )
+         children = list(node.iter_children())
+         closing = '\n' + '    ' * level + '}'
+         if not children:
+            yield '[]' + closing
+            continue
+         stack.append(inner + ']' + closing)
+         child_indent = inner + '    '
+         for index in range(len(children) - 1, -1, -1):
+            stack.append((children[index], level + 2))
+            stack.append(child_indent if index == 0 else ',' + child_indent)
+         yield '['
+
+   def _iter_subtrees(self, shared, progress=None):
+      # One entry per distinct contents, inner contents before the contents holding them
+      dumps = json.dumps
+      written = set()
+      yield ',"subtrees":{'
+      for digest, node in shared.values():
+         if digest in written:
+            continue
+         yield (',' if written else '') + f'{dumps(digest)}:['
+         written.add(digest)
+         for index, child in enumerate(node.iter_children()):
+            if index:
+               yield ','
+            yield from self._iter_compact_nodes(child, shared, with_path=False, progress=progress)
+         yield ']'
+      yield '}'
+
+   def _iter_compact_nodes(self, root_node, shared=None, with_path=True, progress=None):
+      dumps = json.dumps
+      keys = COMPACT_KEYS
+      shared = shared or {}
+      stack = [root_node]
+      while stack:
+         item = stack.pop()
+         if isinstance(item, str):
+            yield item
+            continue
+         node = item
+         if progress is not None:
+            progress.advance()
+         chunk = f'{{"{keys["name"]}":{dumps(node.name)},"{keys["type"]}":{dumps(node.type)}'
+         if with_path and node is root_node:
+            chunk += f',"{keys["path"]}":{dumps(node.path)}'
+         if node.tags:
+            chunk += f',"{keys["tags"]}":{dumps(list(node.tags), separators=(",", ":"))}'
+         entry = shared.get(node.contents_key()) if node.has_children() else None
+         if entry is not None:
+            yield chunk + f',"{keys["children"]}":{{"ref":{dumps(entry[0])}}}}}'
+            continue
+         children = list(node.iter_children())
+         if not children:
+            yield chunk + '}'
+            continue
+         yield chunk + f',"{keys["children"]}":['
+         stack.append(']}')
+         for index in range(len(children) - 1, -1, -1):
+            stack.append(children[index])
+            if index:
+               stack.append(',')
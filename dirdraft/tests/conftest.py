@@ -0,0 +1,8 @@
+import os
+import sys
+import logging
+
+# The sources are imported as top level packages, as when running src/main.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+logging.disable(logging.CRITICAL)
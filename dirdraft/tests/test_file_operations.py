@@ -0,0 +1,132 @@
+import os
+import json
+import stat
+
+import pytest
+
+from core.node import Node
+from core.template import Template
+from utils.template_loader import TemplateLoader, parse_json
+from utils.template_writer import TemplateWriter, get_umask
+from utils.template_catalog import TemplateCatalog
+from utils.binary_format import BinaryTemplateWriter, BinaryTemplateReader, BINARY_EXTENSION, MAGIC, is_binary_template
+
+def build_deep_template(depth):
+   template = Template(None, "Deep")
+   node = template.root_node
+   for i in range(depth):
+      child = Node.from_trusted(f"level_{i}", None, "folder", tags=["folder"])
+      node.add_child(child)
+      node = child
+   node.add_child(Node.from_trusted("leaf.txt", None, "file", tags=["file"]))
+   return template
+
+def test_deep_template_round_trip(tmp_path):
+   # Deeper than json.loads can parse, so the loader falls back to parse_json
+   template = build_deep_template(800)
+   for name, writer in (("indented.json", TemplateWriter()), ("compact.json", TemplateWriter(compact=True))):
+      file_path = os.path.join(tmp_path, name)
+      writer.write(template, file_path)
+      for eager_depth in (None, 2):
+         loaded = TemplateLoader(eager_depth).load(file_path)
+         assert loaded.name == "Deep"
+         assert loaded.root_node.count_nodes() == 802
+         assert loaded.root_node.structural_hash == template.root_node.structural_hash
+
+def test_parse_json_matches_json_loads():
+   for text in ('{"a": [1, -2.5e3, true, false, null], "b": {}, "c": [[]]}', '"caf\\u00e9 \\"x\\""', ' [ ] '):
+      assert parse_json(text) == json.loads(text)
+
+def build_tagged_template():
+   template = Template(None, "Tagged ünïcødé")
+   root = template.root_node
+   docs = Node.from_trusted("Dokumente 文档", None, "folder", tags=["folder", "shared"])
+   root.add_child(docs)
+   docs.add_children([
+      Node.from_trusted("naïve résumé.txt", None, "file", tags=["file"]),
+      Node.from_trusted("emoji 🎉.md", None, "file", tags=["file", "shared", "draft"]),
+      Node.from_trusted("empty", None, "folder"),
+   ])
+   root.add_child(Node.from_trusted("readme", None, "file"))
+   return template
+
+def json_to_binary_to_json(tmp_path, template):
+   first_json = os.path.join(tmp_path, "first.json")
+   binary = os.path.join(tmp_path, "template" + BINARY_EXTENSION)
+   second_json = os.path.join(tmp_path, "second.json")
+   TemplateWriter().write(template, first_json)
+   BinaryTemplateWriter().write(TemplateLoader().load(first_json), binary)
+   assert is_binary_template(binary)
+   TemplateWriter().write(TemplateLoader().load(binary), second_json)
+   with open(first_json, 'rb') as first, open(second_json, 'rb') as second:
+      assert first.read() == second.read()
+   return TemplateLoader().load(second_json)
+
+def test_binary_round_trip_keeps_tags_and_unicode_names(tmp_path):
+   template = build_tagged_template()
+   loaded = json_to_binary_to_json(tmp_path, template)
+   assert loaded.name == template.name
+   assert loaded.root_node.path == template.root_node.path
+   assert loaded.root_node.structural_hash == template.root_node.structural_hash
+   docs = loaded.root_node.get_child("Dokumente 文档")
+   assert docs.tags == ("folder", "shared")
+   assert docs.get_child("emoji 🎉.md").tags == ("file", "shared", "draft")
+   assert [child.name for child in docs.children] == ["naïve résumé.txt", "emoji 🎉.md", "empty"]
+
+def test_binary_round_trip_of_empty_root(tmp_path):
+   template = Template(None, "Empty")
+   loaded = json_to_binary_to_json(tmp_path, template)
+   assert loaded.root_node.count_nodes() == 1
+   assert loaded.root_node.tags == template.root_node.tags
+
+def test_binary_round_trip_of_deep_tree(tmp_path):
+   template = build_deep_template(800)
+   loaded = json_to_binary_to_json(tmp_path, template)
+   assert loaded.root_node.count_nodes() == 802
+   assert loaded.root_node.structural_hash == template.root_node.structural_hash
+
+def test_binary_reader_checks_node_count(tmp_path):
+   file_path = os.path.join(tmp_path, "template" + BINARY_EXTENSION)
+   BinaryTemplateWriter().write(build_tagged_template(), file_path)
+   with open(file_path, 'rb') as file:
+      data = bytearray(file.read())
+   # The node count follows the signature and the version byte
+   data[len(MAGIC) + 1] -= 1
+   with pytest.raises(ValueError):
+      BinaryTemplateReader().decode(bytes(data))
+
+def test_saved_templates_get_the_mode_of_a_new_or_replaced_file(tmp_path):
+   file_path = os.path.join(tmp_path, "template.json")
+   TemplateWriter().write(Template(None, "Modes"), file_path)
+   assert stat.S_IMODE(os.stat(file_path).st_mode) == 0o666 & ~get_umask()
+
+   os.chmod(file_path, 0o640)
+   TemplateWriter().write(Template(None, "Modes"), file_path)
+   assert stat.S_IMODE(os.stat(file_path).st_mode) == 0o640
+
+def test_catalog_records_templates_that_fail_to_parse(tmp_path, monkeypatch):
+   TemplateWriter().write(Template(None, "Good"), os.path.join(tmp_path, "good.json"))
+   broken_path = os.path.join(tmp_path, "broken.json")
+   with open(broken_path, 'w') as file:
+      file.write("{not json")
+
+   catalog = TemplateCatalog(str(tmp_path))
+   assert catalog.refresh() == 2
+   assert [entry.name for entry in catalog.entries()] == ["Good"]
+   assert [failure.file_name for failure in catalog.failures()] == ["broken.json"]
+
+   # The failure is kept in the index, so neither this catalog nor a new one reads the file again
+   loads = []
+   load = TemplateLoader.load
+   monkeypatch.setattr(TemplateLoader, "load", lambda self, *args: loads.append(args) or load(self, *args))
+   assert catalog.refresh() == 0
+   reopened = TemplateCatalog(str(tmp_path))
+   assert reopened.refresh() == 0
+   assert [failure.file_name for failure in reopened.failures()] == ["broken.json"]
+   assert not loads
+
+   # Once the file changes it is read again
+   TemplateWriter().write(Template(None, "Fixed"), broken_path)
+   assert reopened.refresh() == 1
+   assert [entry.name for entry in reopened.entries()] == ["Fixed", "Good"]
+   assert not reopened.failures()
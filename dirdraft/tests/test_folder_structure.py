@@ -0,0 +1,184 @@
+import os
+
+from core.node import Node
+from core.template import Template
+from core.sync import TemplateSync
+from core.dedup import share_subtrees, count_built_descendants
+from core.traversal import iter_nodes
+from core.template_diff import diff
+
+def build_project(base_dir):
+   """
+   Return a template of a small project rooted at base_dir.
+   """
+   root = Node("Project", str(base_dir), "folder", tags=["root_node"], root=True)
+   src = Node.from_trusted("src", None, "folder", tags=["folder"])
+   root.add_child(src)
+   src.add_children([Node.from_trusted("main.py", None, "file"), Node.from_trusted("util.py", None, "file")])
+   docs = Node.from_trusted("docs", None, "folder")
+   root.add_child(docs)
+   docs.add_child(Node.from_trusted("index.md", None, "file"))
+   root.add_child(Node.from_trusted("README.md", None, "file"))
+   return Template(root, "Project")
+
+def list_tree(base_dir):
+   entries = set()
+   for directory, folders, files in os.walk(base_dir):
+      for name in folders + files:
+         entries.add(os.path.relpath(os.path.join(directory, name), base_dir))
+   return entries
+
+def test_sync_plan_lists_missing_extra_and_conflicts(tmp_path):
+   template = build_project(tmp_path)
+   os.makedirs(tmp_path / "src")
+   (tmp_path / "src" / "main.py").write_text("print('kept')")
+   (tmp_path / "src" / "old.py").write_text("")
+   (tmp_path / "docs").write_text("a file where the template has a folder")
+
+   plan = TemplateSync().plan(template.root_node, str(tmp_path))
+
+   assert sorted(node.relative_path for node, _ in plan.missing) == ["README.md", os.path.join("src", "util.py")]
+   assert plan.extra == [(str(tmp_path / "src" / "old.py"), 'file')]
+   assert [(node.name, actual_type) for node, _, actual_type in plan.conflicts] == [("docs", 'file')]
+   # The subtree of a conflicting entry is left out of the plan
+   assert plan.count_missing() == 2
+
+def test_sync_apply_creates_only_missing_entries(tmp_path):
+   template = build_project(tmp_path)
+   os.makedirs(tmp_path / "src")
+   (tmp_path / "src" / "main.py").write_text("print('kept')")
+   (tmp_path / "src" / "old.py").write_text("")
+
+   sync = TemplateSync()
+   report = sync.apply(sync.plan(template.root_node, str(tmp_path)))
+
+   assert not report.failed
+   assert len(report.created) == 4
+   assert list_tree(tmp_path) == {"src", "docs", "README.md", os.path.join("src", "main.py"), os.path.join("src", "util.py"),
+                                  os.path.join("src", "old.py"), os.path.join("docs", "index.md")}
+   # Existing files are never truncated, and extra ones are left alone
+   assert (tmp_path / "src" / "main.py").read_text() == "print('kept')"
+   assert sync.plan(template.root_node, str(tmp_path)).is_empty()
+
+def test_sync_dry_run_changes_nothing(tmp_path):
+   template = build_project(tmp_path)
+   (tmp_path / "notes.txt").write_text("")
+   before = list_tree(tmp_path)
+
+   plan, report = template.sync(str(tmp_path), dry_run=True)
+
+   assert report is None
+   assert plan.count_missing() == 6
+   assert list_tree(tmp_path) == before
+
+def test_sync_plan_of_missing_base_directory(tmp_path):
+   base_dir = tmp_path / "new"
+   template = build_project(base_dir)
+
+   plan = TemplateSync().plan(template.root_node, str(base_dir))
+
+   assert plan.missing == [(template.root_node, str(base_dir))]
+   assert plan.count_missing() == 7
+   assert not os.path.exists(base_dir)
+
+def build_services(count):
+   """
+   Return a tree of count identical service folders, each with a nested source tree.
+   """
+   root = Node("Services", "/services", "folder", tags=["root_node"], root=True)
+   for i in range(count):
+      service = Node.from_trusted(f"service_{i}", None, "folder")
+      root.add_child(service)
+      src = Node.from_trusted("src", None, "folder", tags=["folder"])
+      service.add_children([src, Node.from_trusted("setup.py", None, "file")])
+      src.add_children([Node.from_trusted(f"module_{j}.py", None, "file", tags=["file"]) for j in range(3)])
+   return root
+
+def test_share_subtrees_releases_repeated_contents():
+   root = build_services(3)
+   before = root.structural_hash
+
+   released = share_subtrees(root)
+
+   assert released == 3 * 5
+   assert root.structural_hash == before
+   assert root.count_nodes() == 1 + 3 * 6
+   # Read-only walks leave the shared contents unbuilt
+   assert len(list(iter_nodes(root))) == 1 + 3 * 6
+   assert count_built_descendants(root) == 3
+
+def test_editing_a_shared_subtree_leaves_its_twin_unchanged():
+   root = build_services(2)
+   share_subtrees(root)
+   twin = root.get_child("service_1")
+   twin_hash = twin.structural_hash
+
+   src = root.get_child("service_0").get_child("src")
+   src.add_child(Node.from_trusted("extra.py", None, "file"))
+   src.get_child("module_0.py").rename("renamed.py")
+   src.get_child("module_1.py").tags = ["changed"]
+
+   assert twin.structural_hash == twin_hash
+   assert [child.name for child in twin.get_child("src").children] == ["module_0.py", "module_1.py", "module_2.py"]
+   assert twin.get_child("src").get_child("module_1.py").tags == ("file",)
+   assert [child.name for child in src.children] == ["renamed.py", "module_1.py", "module_2.py", "extra.py"]
+
+def test_topological_sort_returns_editable_nodes_of_shared_subtrees():
+   root = build_services(2)
+   share_subtrees(root)
+
+   nodes = Template(root, "Services").topological_sort(root)
+
+   assert len(nodes) == root.count_nodes()
+   setup = [node for node in nodes if node.name == "setup.py"][0]
+   setup.rename("install.sh")
+   assert setup.parent.get_child("install.sh") is setup
+   assert root.get_child(setup.parent.name) is setup.parent
+
+def test_diff_of_identical_trees_is_empty():
+   assert diff(build_services(3), build_services(3)).is_empty()
+
+def test_diff_detects_folder_rename():
+   a, b = build_services(3), build_services(3)
+   b.get_child("service_1").rename("service_renamed")
+
+   result = diff(a, b)
+
+   assert [(node_a.name, node_b.name) for node_a, node_b in result.renamed] == [("service_1", "service_renamed")]
+   assert not result.added and not result.removed
+   assert diff(a, b, compare_tags=False).renamed == result.renamed
+
+def test_diff_reports_renamed_files_as_removed_and_added():
+   a, b = build_services(1), build_services(1)
+   b.get_child("service_0").get_child("setup.py").rename("install.sh")
+
+   result = diff(a, b)
+
+   assert not result.renamed
+   assert [node.relative_path for node in result.removed] == [os.path.join("service_0", "setup.py")]
+   assert [node.relative_path for node in result.added] == [os.path.join("service_0", "install.sh")]
+
+def test_diff_detects_type_change():
+   a, b = build_services(2), build_services(2)
+   service = b.get_child("service_0")
+   service.remove_child(service.get_child("setup.py"))
+   service.add_child(Node.from_trusted("setup.py", None, "folder"))
+
+   result = diff(a, b)
+
+   assert [(node_a.type, node_b.type) for node_a, node_b in result.retyped] == [("file", "folder")]
+   assert result.retyped[0][1].relative_path == os.path.join("service_0", "setup.py")
+
+def test_diff_ignores_tag_changes_without_compare_tags():
+   a, b = build_services(2), build_services(2)
+   b.get_child("service_0").get_child("src").tags = ["changed"]
+   b.get_child("service_1").get_child("src").get_child("module_2.py").tags = []
+
+   assert [node_b.name for _, node_b in diff(a, b).retagged] == ["src", "module_2.py"]
+   assert diff(a, b, compare_tags=False).is_empty()
+
+   # Other changes are still found when tags differ everywhere
+   b.get_child("service_1").rename("service_renamed")
+   result = diff(a, b, compare_tags=False)
+   assert [(node_a.name, node_b.name) for node_a, node_b in result.renamed] == [("service_1", "service_renamed")]
+   assert not result.retagged